@@ -0,0 +1,136 @@
+"""
+Overload benchmark of the admission control in front of the LLM.
+
+Drives the upstream pool with Poisson arrivals faster than a simulated
+upstream can serve. The upstream runs `--capacity` calls at full speed;
+beyond that every call slows down in proportion (like a saturated model
+server). Clients give up after `--client-timeout` seconds.
+
+Compares:
+  * a fixed limit with an unbounded queue and no deadlines (the previous
+    behaviour: calls queue and run even after their client has left)
+  * the AIMD and gradient limits with a bounded queue and request deadlines
+
+and reports the goodput (answers delivered in time per second), latency of
+those answers, fast 503 rejections, and the upstream time spent on answers
+that nobody received.
+
+Usage:
+    python -m benchmarks.bench_admission [--rate 150] [--duration 10] [--capacity 16] [--latency 0.2]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from src.admission import create_concurrency_limit, request_context
+from src.llm import UpstreamBusyError, UpstreamPool, UpstreamTimeoutError
+
+
+class SaturatingUpstream:
+    """Upstream whose latency grows once more than `capacity` calls run at once."""
+
+    def __init__(self, capacity: int, latency: float):
+        self.capacity = capacity
+        self.latency = latency
+        self.active = 0
+        self.wasted_seconds = 0.0
+
+    async def call(self, client_deadline: float) -> None:
+        self.active += 1
+        start = time.monotonic()
+        try:
+            await asyncio.sleep(self.latency * max(1.0, self.active / self.capacity))
+        finally:
+            self.active -= 1
+            end = time.monotonic()
+            # Upstream time spent after the client had given up
+            self.wasted_seconds += max(0.0, end - max(start, client_deadline))
+
+
+async def run(args, limit_kind: str, admission: bool) -> dict:
+    rng = random.Random(args.seed)
+    upstream = SaturatingUpstream(args.capacity, args.latency)
+    pool = UpstreamPool(
+        max_concurrency=args.initial_limit,
+        queue_timeout=args.client_timeout if admission else 3600,
+        call_timeout=3600,
+        limit=create_concurrency_limit(
+            limit_kind, initial=args.initial_limit, min_limit=1, max_limit=256, latency_threshold=args.latency * 3
+        ),
+        max_queue=args.max_queue if admission else None,
+    )
+    latencies = []
+    outcomes = {"ok": 0, "late": 0, "rejected": 0, "timeout": 0}
+
+    async def one(arrival: float):
+        client_deadline = arrival + args.client_timeout
+        try:
+            with request_context("normal", client_deadline if admission else None):
+                await pool.run(lambda: upstream.call(client_deadline))
+        except UpstreamBusyError:
+            outcomes["rejected"] += 1
+            return
+        except UpstreamTimeoutError:
+            outcomes["timeout"] += 1
+            return
+        latency = time.monotonic() - arrival
+        if latency > args.client_timeout:
+            outcomes["late"] += 1
+        else:
+            outcomes["ok"] += 1
+            latencies.append(latency)
+
+    tasks = []
+    start = arrival = time.monotonic()
+    while arrival - start < args.duration:
+        arrival += rng.expovariate(args.rate)
+        await asyncio.sleep(max(0.0, arrival - time.monotonic()))
+        tasks.append(asyncio.ensure_future(one(arrival)))
+    await asyncio.gather(*tasks)
+
+    latencies.sort()
+    return {
+        "goodput": outcomes["ok"] / args.duration,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0,
+        "outcomes": outcomes,
+        "wasted_s": upstream.wasted_seconds,
+        "final_limit": pool.admission.limit.limit,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=150, help="Arrivals per second")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--capacity", type=int, default=16, help="Calls the upstream serves at full speed")
+    parser.add_argument("--latency", type=float, default=0.2, help="Upstream latency when not saturated")
+    parser.add_argument("--client-timeout", type=float, default=2.0)
+    parser.add_argument("--initial-limit", type=int, default=64)
+    parser.add_argument("--max-queue", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(
+        f"{args.rate:.0f} req/s for {args.duration:.0f}s against an upstream serving "
+        f"{args.capacity / args.latency:.0f} req/s, clients wait {args.client_timeout}s"
+    )
+    print(f"{'admission':<28} {'goodput':>8} {'p50 ms':>8} {'p99 ms':>8} {'wasted s':>9} {'limit':>6}  outcomes")
+    modes = {
+        "fixed, unbounded queue": ("fixed", False),
+        "aimd, queue + deadlines": ("aimd", True),
+        "gradient, queue + deadlines": ("gradient", True),
+    }
+    for name, (limit_kind, admission) in modes.items():
+        result = asyncio.run(run(args, limit_kind, admission))
+        print(
+            f"{name:<28} {result['goodput']:>8.1f} {result['p50_ms']:>8.0f} {result['p99_ms']:>8.0f} "
+            f"{result['wasted_s']:>9.1f} {result['final_limit']:>6}  {result['outcomes']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Agent-side benchmark of the summarization tools against a local API.
+
+Simulates `--agents` agent runs like examples/langchain_agent_demo.py at
+once: each run takes `--steps` steps, and each step makes `--calls` tool
+calls together (parallel tool calling) to summarize sections of
+docs/examples with the demo's options, then "thinks" for `--think`
+seconds. Sections are drawn from a pool of `--sections`, so agents repeat
+some of each other's calls.
+
+The API runs in process over real HTTP with the stub model (`--latency`
+seconds per call) and without its summary cache. Compares:
+  * RequestsPostTool: the previous tool, called by sync agents (one
+    thread each, tool calls one after the other) and by async agents
+    (its aiohttp path, one session per call)
+  * SummarizationTool: sync agents, then async agents without batching
+    or cache, with batching, and with batching and the client-side LRU
+
+and reports tool calls per second, call latency, and the HTTP requests
+and connections the API received.
+
+Usage:
+    python -m benchmarks.bench_agent_tool [--agents 16] [--steps 4] [--calls 3] [--latency 0.1]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.fake_gemini import BackgroundServer
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "docs" / "examples"
+
+
+def make_sections(count: int, tag: str) -> list:
+    """`count` sections of about 2000 characters of the example documents."""
+    text = "\n\n".join(path.read_text(encoding="utf-8") for path in sorted(EXAMPLES.glob("*.md")))
+    size = min(2000, len(text) // count)
+    # Tagged per mode, so that modes do not share the API's summary cache
+    return [f"[{tag}] " + text[index * size : (index + 1) * size] for index in range(count)]
+
+
+def make_plan(args: argparse.Namespace) -> list:
+    """Per agent, per step, the sections summarized by its tool calls."""
+    rng = random.Random(args.seed)
+    return [
+        [[rng.randrange(args.sections) for _ in range(args.calls)] for _ in range(args.steps)]
+        for _ in range(args.agents)
+    ]
+
+
+class CountingApp:
+    """Counts the HTTP requests and client connections an ASGI app receives."""
+
+    def __init__(self, app):
+        self.app = app
+        self.requests = 0
+        self.connections = set()
+
+    def reset(self):
+        self.requests = 0
+        self.connections = set()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            self.requests += 1
+            self.connections.add(tuple(scope["client"]))
+        await self.app(scope, receive, send)
+
+
+def run_sync_agents(plan: list, think: float, call) -> list:
+    """One thread per agent, tool calls one after the other; returns the call latencies."""
+    latencies = []
+
+    def agent(steps):
+        for step in steps:
+            for section in step:
+                start = time.perf_counter()
+                call(section)
+                latencies.append(time.perf_counter() - start)
+            time.sleep(think)
+
+    threads = [threading.Thread(target=agent, args=(steps,)) for steps in plan]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+async def run_async_agents(plan: list, think: float, call) -> list:
+    """All agents on one event loop, the calls of a step together; returns the call latencies."""
+    latencies = []
+
+    async def timed(section):
+        start = time.perf_counter()
+        await call(section)
+        latencies.append(time.perf_counter() - start)
+
+    async def agent(steps):
+        for step in steps:
+            await asyncio.gather(*(timed(section) for section in step))
+            await asyncio.sleep(think)
+
+    await asyncio.gather(*(agent(steps) for steps in plan))
+    return latencies
+
+
+def report(name: str, seconds: float, latencies: list, api: CountingApp) -> None:
+    p50, p99 = statistics.quantiles(latencies, n=100)[49], statistics.quantiles(latencies, n=100)[98]
+    print(
+        f"{name:<40} {len(latencies) / seconds:>8.1f} {p50 * 1000:>8.0f} {p99 * 1000:>8.0f}"
+        f" {api.requests:>9} {len(api.connections):>6}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=16)
+    parser.add_argument("--steps", type=int, default=4, help="Steps per agent run")
+    parser.add_argument("--calls", type=int, default=3, help="Tool calls per step, made together")
+    parser.add_argument("--sections", type=int, default=48, help="Distinct sections the calls draw from")
+    parser.add_argument("--think", type=float, default=0.05, help="Seconds an agent spends between steps")
+    parser.add_argument("--latency", type=float, default=0.1, help="Stub model latency in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    # Configure the app before importing it
+    os.environ["LLM_PROVIDER"] = "stub"
+    os.environ["LLM_STUB_LATENCY_SECONDS"] = str(args.latency)
+    os.environ["RATE_LIMIT_MAX_REQUESTS"] = str(10 ** 9)
+    # Repeated calls reach the model unless the client-side LRU serves them
+    os.environ["CACHE_BACKEND"] = "none"
+    os.environ["NEAR_DUPLICATE_MAX_ENTRIES"] = "0"
+
+    import logging
+
+    from langchain_community.tools import RequestsPostTool
+    from langchain_community.utilities import RequestsWrapper
+
+    from src.main import create_app
+    from tools.langchain_integration import SummarizationTool
+    from tools.summarization_client import SummarizationClient
+
+    logging.disable(logging.INFO)
+    plan = make_plan(args)
+    options = {"length": "short", "style": "bullet", "focus": "costs"}
+    print(f"{args.agents} agents x {args.steps} steps x {args.calls} calls, {args.sections} sections, model latency {args.latency * 1000:.0f} ms")
+    print(f"{'tool':<40} {'calls/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'requests':>9} {'conns':>6}")
+
+    api = CountingApp(create_app())
+    with BackgroundServer(api) as server:
+        url = f"{server.url}/summarize"
+
+        def requests_post_tool_input(sections: list, section: int) -> str:
+            # What the agent passes to RequestsPostTool: a JSON string with the URL
+            return json.dumps({"url": url, "data": {"text": sections[section], **options}})
+
+        # The previous tool, called by sync agents and by async agents
+        requests_tool = RequestsPostTool(requests_wrapper=RequestsWrapper(), allow_dangerous_requests=True)
+        sections = make_sections(args.sections, "requests-sync")
+        api.reset()
+        start = time.perf_counter()
+        latencies = run_sync_agents(plan, args.think, lambda section: requests_tool.invoke(requests_post_tool_input(sections, section)))
+        report("RequestsPostTool, sync agents", time.perf_counter() - start, latencies, api)
+
+        sections = make_sections(args.sections, "requests-async")
+        api.reset()
+        start = time.perf_counter()
+        latencies = asyncio.run(
+            run_async_agents(plan, args.think, lambda section: requests_tool.ainvoke(requests_post_tool_input(sections, section)))
+        )
+        report("RequestsPostTool, async agents", time.perf_counter() - start, latencies, api)
+
+        # The pooled tool, with its features added one at a time
+        modes = [
+            ("SummarizationTool, sync agents", False, {"max_batch_size": 1, "cache_size": 0}),
+            ("SummarizationTool, async", True, {"max_batch_size": 1, "cache_size": 0}),
+            ("SummarizationTool, async + batching", True, {"cache_size": 0}),
+            ("SummarizationTool, async + batching + LRU", True, {}),
+        ]
+        for name, asynchronous, client_options in modes:
+            tool = SummarizationTool(client=SummarizationClient(base_url=server.url, **client_options))
+            sections = make_sections(args.sections, name)
+            api.reset()
+            start = time.perf_counter()
+            if asynchronous:
+                latencies = asyncio.run(
+                    run_async_agents(plan, args.think, lambda section: tool.ainvoke({"text": sections[section], **options}))
+                )
+            else:
+                latencies = run_sync_agents(plan, args.think, lambda section: tool.invoke({"text": sections[section], **options}))
+            report(name, time.perf_counter() - start, latencies, api)
+            tool.client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Throughput benchmark of POST /summarize/batch against one-by-one POST /summarize.
+
+A pipeline that summarizes documents one HTTP request at a time pays the full
+LLM latency per document. The batch endpoint fans the items out concurrently
+on the server, so documents per second grow with BATCH_MAX_PARALLEL.
+
+Usage:
+    python -m benchmarks.bench_batch [--documents 64] [--latency 0.2] [--parallel 16]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import httpx
+
+from benchmarks.fake_gemini import BackgroundServer, create_fake_gemini_app
+
+TEXT = "The cost of AI computing is falling. A technique called distillation is making it cheaper to build decent LLMs."
+
+
+def make_items(count: int, run: str) -> list:
+    # Distinct texts, so items are neither cached nor coalesced
+    return [
+        {"text": f"{TEXT} (run {run}, document {index})", "length": "short", "style": "bullet"}
+        for index in range(count)
+    ]
+
+
+async def one_by_one(http: httpx.AsyncClient, items: list) -> float:
+    start = time.perf_counter()
+    for item in items:
+        (await http.post("/summarize", json=item)).raise_for_status()
+    return time.perf_counter() - start
+
+
+async def batched(http: httpx.AsyncClient, items: list) -> float:
+    start = time.perf_counter()
+    response = await http.post("/summarize/batch", json={"items": items})
+    response.raise_for_status()
+    assert all(result["summary"] for result in response.json()["results"])
+    return time.perf_counter() - start
+
+
+async def batched_ndjson(http: httpx.AsyncClient, items: list) -> tuple:
+    start = time.perf_counter()
+    first_result = None
+    async with http.stream("POST", "/summarize/batch", params={"stream": "true"}, json={"items": items}) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line:
+                json.loads(line)
+                first_result = first_result or time.perf_counter() - start
+    return time.perf_counter() - start, first_result
+
+
+async def run(base_url: str, documents: int) -> None:
+    async with httpx.AsyncClient(base_url=base_url, timeout=600) as http:
+        sequential = await one_by_one(http, make_items(documents, "sequential"))
+        batch = await batched(http, make_items(documents, "batch"))
+        ndjson, first = await batched_ndjson(http, make_items(documents, "ndjson"))
+
+    print(f"{'mode':<22} {'time (s)':>9} {'docs/s':>9}")
+    print(f"{'one by one':<22} {sequential:>9.3f} {documents / sequential:>9.1f}")
+    print(f"{'batch':<22} {batch:>9.3f} {documents / batch:>9.1f}")
+    print(f"{'batch (NDJSON)':<22} {ndjson:>9.3f} {documents / ndjson:>9.1f}   first result after {first:.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake Gemini latency in seconds")
+    parser.add_argument("--parallel", type=int, default=16, help="BATCH_MAX_PARALLEL")
+    args = parser.parse_args()
+
+    with BackgroundServer(create_fake_gemini_app(latency=args.latency)) as fake:
+        # Configure the app before importing it
+        os.environ["GEMINI_API_KEY"] = "bench-key"
+        os.environ["GEMINI_BASE_URL"] = fake.url
+        os.environ["RATE_LIMIT_MAX_REQUESTS"] = str(10 ** 9)
+        os.environ["CACHE_BACKEND"] = "none"
+        os.environ["BATCH_MAX_ITEMS"] = str(max(args.documents, 100))
+        os.environ["BATCH_MAX_PARALLEL"] = str(args.parallel)
+
+        import logging
+        from src import main as app_module
+
+        logging.disable(logging.INFO)
+        # Serve the app over real HTTP so that NDJSON lines are not buffered
+        with BackgroundServer(app_module.app) as api:
+            asyncio.run(run(api.url, args.documents))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Latency benchmark of map-reduce chunked summarization versus a single prompt.
+
+Builds synthetic documents by repeating the `docs/examples/*.md` corpus up to
+several target sizes and summarizes each one through POST /summarize, once
+with chunking disabled and once with it enabled. The fake Gemini server adds
+latency proportional to the prompt size, so one huge prompt is slower than
+several smaller ones processed in parallel.
+
+Usage:
+    python -m benchmarks.bench_chunking [--sizes 50000 200000 800000] [--seconds-per-1k-tokens 0.05]
+"""
+
+import argparse
+import asyncio
+import glob
+import os
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.fake_gemini import BackgroundServer, create_fake_gemini_app
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def build_document(target_chars: int) -> str:
+    """Repeat the example corpus until the document reaches `target_chars`."""
+    corpus = [
+        Path(path).read_text(encoding="utf-8")
+        for path in sorted(glob.glob(str(PROJECT_ROOT / "docs" / "examples" / "*.md")))
+    ]
+    parts = []
+    size = 0
+    copy = 0
+    while size < target_chars:
+        for document in corpus:
+            # Number the copies so that no two sections are identical
+            section = f"Part {copy}.\n\n{document}"
+            parts.append(section)
+            size += len(section) + 2
+        copy += 1
+    return "\n\n".join(parts)[:target_chars]
+
+
+async def summarize_once(app, text: str) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as http:
+        start = time.perf_counter()
+        response = await http.post("/summarize", json={"text": text, "length": "short", "style": "bullet"})
+        elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50_000, 200_000, 800_000], help="document sizes in characters")
+    parser.add_argument("--latency", type=float, default=0.2, help="fixed fake Gemini latency in seconds")
+    parser.add_argument("--seconds-per-1k-tokens", type=float, default=0.05, help="extra fake latency per 1000 prompt tokens")
+    args = parser.parse_args()
+
+    fake_app = create_fake_gemini_app(latency=args.latency, seconds_per_1k_tokens=args.seconds_per_1k_tokens)
+    with BackgroundServer(fake_app) as fake:
+        # Configure the app before importing it
+        os.environ["GEMINI_API_KEY"] = "bench-key"
+        os.environ["GEMINI_BASE_URL"] = fake.url
+        os.environ["RATE_LIMIT_MAX_REQUESTS"] = str(10 ** 9)
+        os.environ["CACHE_BACKEND"] = "none"
+
+        import logging
+        from src import main as app_module
+        from src.config import settings
+
+        logging.disable(logging.INFO)
+        chunking_threshold = settings.CHUNKING_THRESHOLD_TOKENS
+
+        print(f"{'chars':>9} {'single (s)':>11} {'calls':>6} {'chunked (s)':>12} {'calls':>6} {'speedup':>8}")
+        for size in args.sizes:
+            document = build_document(size)
+
+            settings.CHUNKING_THRESHOLD_TOKENS = 10 ** 12
+            before = fake_app.state.requests
+            single = asyncio.run(summarize_once(app_module.app, document))
+            single_calls = fake_app.state.requests - before
+
+            settings.CHUNKING_THRESHOLD_TOKENS = chunking_threshold
+            before = fake_app.state.requests
+            chunked = asyncio.run(summarize_once(app_module.app, document))
+            chunked_calls = fake_app.state.requests - before
+
+            print(
+                f"{size:>9} {single:>11.3f} {single_calls:>6} {chunked:>12.3f} "
+                f"{chunked_calls:>6} {single / chunked:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Throughput benchmark of the Markdown corpus cleaner.
+
+Builds a corpus of `--files` Markdown files (copies of docs/examples) and
+cleans it with:
+  * the previous script: six regex passes over the whole file, one Python
+    process launched per file (timed on `--launches` files, extrapolated)
+  * the same six passes in a single process, which isolates the launch cost
+  * the streaming cleaner in one process, and in a pool of `--workers`
+
+and reports MB/s and files/s for each.
+
+Usage:
+    python -m benchmarks.bench_clean_markdown [--files 2000] [--workers 4] [--launches 20]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from scripts.clean_markdown import clean_corpus, iter_markdown_files
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "docs" / "examples"
+
+# The cleaner before it was rewritten, for comparison
+LEGACY_SCRIPT = r'''
+import re
+import sys
+import json
+
+def clean_markdown_for_json(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    lines = text.split('\n')
+    lines = [line for line in lines if '|' not in line]
+    text = '\n'.join(lines)
+    text = re.sub(r'^(#+\s*|\*\s*|-\s*|>\s*|---|===)', '', text, flags=re.MULTILINE)
+    text = re.sub(r'!\[.*?\]\(.*?\)', '', text)
+    text = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', text)
+    text = re.sub(r'(\*\*|__|\*|_)', '', text)
+    text = re.sub(r'[\s\t\n\r]+', ' ', text)
+    text = text.strip()
+    return json.dumps(text)[1:-1]
+
+if __name__ == "__main__":
+    print(clean_markdown_for_json(sys.argv[1]), end='')
+'''
+
+
+def build_corpus(directory: Path, files: int) -> list:
+    examples = sorted(EXAMPLES.glob("*.md"))
+    texts = [path.read_text(encoding="utf-8") for path in examples]
+    paths = []
+    for index in range(files):
+        path = directory / f"doc_{index:06d}.md"
+        path.write_text(f"# Document {index}\n\n" + texts[index % len(texts)], encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
+
+def report(name: str, files: int, size: int, seconds: float) -> None:
+    print(f"{name:<38} {size / 1e6 / seconds:>8.1f} {files / seconds:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--launches", type=int, default=20, help="Files cleaned with one process launch each")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = Path(tmp) / "corpus"
+        corpus.mkdir()
+        paths = build_corpus(corpus, args.files)
+        size = sum(os.path.getsize(path) for path in paths)
+        legacy_script = Path(tmp) / "legacy_clean_markdown.py"
+        legacy_script.write_text(LEGACY_SCRIPT)
+        namespace = {}
+        exec(compile(LEGACY_SCRIPT, str(legacy_script), "exec"), namespace)
+        legacy_clean = namespace["clean_markdown_for_json"]
+
+        print(f"{len(paths)} files, {size / 1e6:.1f} MB, {args.workers} workers")
+        print(f"{'cleaner':<38} {'MB/s':>8} {'files/s':>9}")
+
+        sample = paths[: args.launches]
+        start = time.perf_counter()
+        for path in sample:
+            subprocess.run([sys.executable, str(legacy_script), path], check=True, stdout=subprocess.DEVNULL)
+        report("previous, one process per file", len(sample), sum(os.path.getsize(p) for p in sample), time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for path in paths:
+            legacy_clean(path)
+        report("previous, single process", len(paths), size, time.perf_counter() - start)
+
+        options = {"length": "short", "style": "bullet", "focus": None}
+        for workers in sorted({1, args.workers}):
+            with open(os.devnull, "w") as output:
+                # Directory expansion is part of the run, as on the command line
+                start = time.perf_counter()
+                stats = clean_corpus(list(iter_markdown_files([str(corpus)])), output, options, workers=workers)
+                seconds = time.perf_counter() - start
+            assert stats["files"] == len(paths)
+            report(f"streaming, {workers} worker{'s' if workers > 1 else ''}", len(paths), size, seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Load benchmark for POST /summarize against a local fake Gemini server.
+
+Fires a fixed number of concurrent requests at the app for several values of
+the upstream concurrency limit and reports the achieved throughput.
+
+Usage:
+    python -m benchmarks.bench_concurrency [--requests 200] [--latency 0.2] [--limits 1 4 16 64]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+from benchmarks.fake_gemini import BackgroundServer, create_fake_gemini_app
+
+PAYLOAD = {
+    "text": "The cost of AI computing is falling. A technique called distillation is making it cheaper to build decent LLMs.",
+    "length": "short",
+    "style": "bullet",
+    "focus": "distillation",
+}
+
+
+async def run_load(app, total_requests: int) -> dict:
+    """Send `total_requests` concurrent requests to the app and time them."""
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    statuses = {}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as http:
+        async def one(index: int):
+            # Distinct texts, so requests are neither cached nor coalesced
+            payload = {**PAYLOAD, "text": f"{PAYLOAD['text']} (document {index})"}
+            start = time.perf_counter()
+            response = await http.post("/summarize", json=payload)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(index) for index in range(total_requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "elapsed": elapsed,
+        "throughput": total_requests / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+        "statuses": statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake Gemini latency in seconds")
+    parser.add_argument("--limits", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    with BackgroundServer(create_fake_gemini_app(latency=args.latency)) as fake:
+        # Configure the app before importing it
+        os.environ["GEMINI_API_KEY"] = "bench-key"
+        os.environ["GEMINI_BASE_URL"] = fake.url
+        os.environ["RATE_LIMIT_MAX_REQUESTS"] = str(10 ** 9)
+        os.environ["LLM_QUEUE_TIMEOUT_SECONDS"] = "600"
+        os.environ["CACHE_BACKEND"] = "none"
+
+        import logging
+        from src import main as app_module
+        from src.llm import UpstreamPool
+
+        logging.disable(logging.INFO)
+
+        print(f"{'limit':>6} {'req/s':>9} {'p50 (s)':>9} {'p99 (s)':>9}  statuses")
+        for limit in args.limits:
+            app_module.llm_pool = UpstreamPool(
+                max_concurrency=limit, queue_timeout=600, call_timeout=60
+            )
+            result = asyncio.run(run_load(app_module.app, args.requests))
+            print(
+                f"{limit:>6} {result['throughput']:>9.1f} {result['p50']:>9.3f} "
+                f"{result['p99']:>9.3f}  {result['statuses']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
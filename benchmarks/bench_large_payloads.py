@@ -0,0 +1,164 @@
+"""
+Latency and peak memory of summarizing large documents, by how they are sent.
+
+Sends documents of `--sizes` MB (copies of docs/examples) to the API in
+process, as:
+  * json: a /summarize request body
+  * json+gzip, json+zstd: the same, compressed (Content-Encoding)
+  * text, text+zstd: the raw text to /summarize/text, options in the query
+
+Each case runs in a fresh process, against the stub model with no latency,
+the caches disabled and inputs over the budget truncated, so that what is
+measured is taking the document in (reading, decompressing, parsing and
+normalizing it), not the summarization. Reports the median latency of
+`--runs` requests and the peak memory (RSS) the requests took beyond the
+request body itself, also as a multiple of the document size (Linux only:
+the peak is read from /proc).
+
+Usage:
+    python -m benchmarks.bench_large_payloads [--sizes 1 10 50] [--runs 3]
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import zstandard
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+EXAMPLES = PROJECT_ROOT / "docs" / "examples"
+
+VARIANTS = ("json", "json+gzip", "json+zstd", "text", "text+zstd")
+
+ENVIRONMENT = {
+    "LLM_PROVIDER": "stub",
+    "LLM_STUB_LATENCY_SECONDS": "0",
+    "INPUT_OVER_BUDGET": "truncate",
+    "CACHE_BACKEND": "none",
+    "NEAR_DUPLICATE_MAX_ENTRIES": "0",
+    "RATE_LIMIT_MAX_REQUESTS": "1000000",
+    "REQUEST_MAX_BODY_BYTES": str(1 << 30),
+    "JOBS_WORKERS": "0",
+    "LOG_LEVEL": "WARNING",
+}
+
+
+def make_document(size: int) -> str:
+    base = "\n\n".join(path.read_text(encoding="utf-8") for path in sorted(EXAMPLES.glob("*.md")))
+    return (base * (size // len(base) + 1))[:size]
+
+
+def encode(variant: str, text: str) -> bytes:
+    kind, _, encoding = variant.partition("+")
+    if kind == "json":
+        body = json.dumps({"text": text, "length": "short", "style": "bullet"}).encode()
+    else:
+        body = text.encode()
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor().compress(body)
+    return body
+
+
+def request_arguments(variant: str, body: bytes) -> dict:
+    kind, _, encoding = variant.partition("+")
+    headers = {"Content-Type": "application/json" if kind == "json" else "text/plain; charset=utf-8"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    url = "/summarize" if kind == "json" else "/summarize/text?length=short&style=bullet"
+    return {"url": url, "content": body, "headers": headers}
+
+
+def memory_status(field: str) -> int:
+    """A memory figure of this process from /proc/self/status, in bytes."""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) * 1024
+    raise RuntimeError(f"{field} not found in /proc/self/status")
+
+
+def reset_peak_memory() -> None:
+    with open("/proc/self/clear_refs", "w") as clear_refs:
+        clear_refs.write("5")  # resets VmHWM, the peak RSS
+
+
+def run_case(variant: str, path: str, runs: int) -> dict:
+    """Send the body in `path` `runs` times (in a fresh process) and return latency and peak memory."""
+    import httpx
+
+    from src.main import create_app
+
+    app = create_app()
+    body = Path(path).read_bytes()
+    small = encode(variant, make_document(2000))
+
+    async def main():
+        async with app.router.lifespan_context(app):
+            while not app.state.ready:
+                await asyncio.sleep(0.01)
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                response = await client.post(**request_arguments(variant, small))
+                response.raise_for_status()
+                # Measure what the requests add to the body already in memory
+                reset_peak_memory()
+                before = memory_status("VmRSS")
+                seconds = []
+                for _ in range(runs):
+                    start = time.perf_counter()
+                    response = await client.post(**request_arguments(variant, body))
+                    seconds.append(time.perf_counter() - start)
+                    response.raise_for_status()
+                peak = memory_status("VmHWM") - before
+        return {"latency": statistics.median(seconds), "peak": peak}
+
+    return asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 10, 50], help="Document sizes, in MB")
+    parser.add_argument("--runs", type=int, default=3, help="Requests per case")
+    parser.add_argument("--variants", nargs="+", default=list(VARIANTS), choices=VARIANTS)
+    parser.add_argument("--case", nargs=2, metavar=("VARIANT", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(*args.case, args.runs)))
+        return
+
+    print(f"{'size':>6} {'variant':<10} {'sent MB':>8} {'latency ms':>11} {'peak MB':>8} {'peak/size':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for megabytes in args.sizes:
+            size = int(megabytes * 1e6)
+            text = make_document(size)
+            for variant in args.variants:
+                path = Path(tmp) / "body"
+                path.write_bytes(encode(variant, text))
+                result = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_large_payloads", "--runs", str(args.runs), "--case", variant, str(path)],
+                    cwd=PROJECT_ROOT,
+                    env={**os.environ, **ENVIRONMENT},
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                )
+                case = json.loads(result.stdout.splitlines()[-1])
+                print(
+                    f"{megabytes:>4g}MB {variant:<10} {path.stat().st_size / 1e6:>8.1f} {case['latency'] * 1000:>11.0f}"
+                    f" {case['peak'] / 1e6:>8.0f} {case['peak'] / size:>9.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
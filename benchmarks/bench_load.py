@@ -0,0 +1,346 @@
+"""
+End-to-end load test of the API with the stub LLM provider.
+
+Replays realistic payloads (the markdown files in docs/examples and the
+requests of requests.jsonl) against POST /summarize (and optionally
+/summarize/stream), either in-process through httpx's ASGI transport or
+against the app served by uvicorn in a subprocess. The stub provider
+replaces Gemini, so runs need no network and measure the service itself.
+
+Two load models:
+  * closed loop (default): `--concurrency` clients send requests back to back
+  * open loop (`--rate`): requests arrive as a Poisson process at that many
+    per second, however slowly they are answered; latency is measured from
+    the scheduled arrival, so queueing in the service is not hidden
+
+Reports throughput, p50/p95/p99 latency, error rate and the peak RSS of the
+serving process (in-process runs include the load generator itself), and
+can save the results as JSON. With `--baseline`, the results are compared
+against a previous JSON file and the run fails (exit code 1) if a metric
+regressed by more than `--tolerance`.
+
+Usage:
+    python -m benchmarks.bench_load [--requests 500] [--concurrency 32] [--rate 50] [--server uvicorn]
+        [--llm-latency 0.2] [--output results.json] [--baseline baseline.json] [--tolerance 0.1]
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import psutil
+
+from .fake_gemini import free_port
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Metrics compared against the baseline, and whether higher values are better
+COMPARED_METRICS = {
+    "throughput_rps": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "error_rate": False,
+    "peak_rss_mb": False,
+}
+# Differences below these are noise, whatever the relative change
+ABSOLUTE_SLACK = {"p50_ms": 1.0, "p95_ms": 2.0, "p99_ms": 5.0, "error_rate": 0.001, "peak_rss_mb": 5.0}
+
+LENGTHS = ("short", "medium", "long")
+STYLES = ("bullet", "paragraph", "numbered")
+
+
+def load_payloads(markdown_glob: str, jsonl_paths: list) -> list:
+    """
+    Build request bodies from the example documents and backlog requests.
+
+    Args:
+        markdown_glob: Glob of markdown files, one payload each
+        jsonl_paths: JSON lines files with `title` and `body` fields; missing files are skipped
+
+    Returns:
+        The payloads, with length and style rotated through the accepted values
+    """
+    texts = []
+    for path in sorted(glob.glob(markdown_glob)):
+        texts.append(Path(path).read_text(encoding="utf-8"))
+    for path in jsonl_paths:
+        if not Path(path).exists():
+            continue
+        with open(path, encoding="utf-8") as lines:
+            for line in lines:
+                if line.strip():
+                    request = json.loads(line)
+                    texts.append(f"{request.get('title', '')}\n\n{request.get('body', '')}")
+    return [
+        {"text": text, "length": LENGTHS[index % len(LENGTHS)], "style": STYLES[index % len(STYLES)]}
+        for index, text in enumerate(texts)
+    ]
+
+
+def percentile(sorted_values: list, percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))]
+
+
+def compare_results(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Compare two runs.
+
+    Args:
+        results: Metrics of this run
+        baseline: Metrics of the reference run
+        tolerance: Allowed relative change in the bad direction (0.1 = 10%)
+
+    Returns:
+        One dict per compared metric, with `regressed` set when the change
+        exceeds both the tolerance and the metric's noise floor
+    """
+    comparison = []
+    for metric, higher_is_better in COMPARED_METRICS.items():
+        if metric not in results or metric not in baseline:
+            continue
+        current, reference = results[metric], baseline[metric]
+        worse_by = reference - current if higher_is_better else current - reference
+        change = (current - reference) / reference if reference else 0.0
+        regressed = worse_by > ABSOLUTE_SLACK.get(metric, 0.0) and worse_by > tolerance * abs(reference)
+        comparison.append({"metric": metric, "baseline": reference, "current": current, "change": change, "regressed": regressed})
+    return comparison
+
+
+class RssSampler:
+    """Samples the resident set size of a process (and its children) in the background."""
+
+    def __init__(self, pid: int, interval: float = 0.05):
+        self.process = psutil.Process(pid)
+        self.interval = interval
+        self.peak = 0
+        self._task = None
+
+    def sample(self) -> int:
+        rss = 0
+        for process in [self.process, *self.process.children(recursive=True)]:
+            try:
+                rss += process.memory_info().rss
+            except psutil.NoSuchProcess:
+                pass
+        self.peak = max(self.peak, rss)
+        return rss
+
+    async def _run(self):
+        while True:
+            await asyncio.to_thread(self.sample)
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self):
+        self._task = asyncio.ensure_future(self._run())
+        return self
+
+    def __exit__(self, *exc_info):
+        self._task.cancel()
+        self.sample()
+
+
+async def send(http: httpx.AsyncClient, payload: dict, stream: bool) -> int:
+    if not stream:
+        response = await http.post("/summarize", json=payload)
+        return response.status_code
+    async with http.stream("POST", "/summarize/stream", json=payload) as response:
+        body = b"".join([chunk async for chunk in response.aiter_bytes()])
+    if response.status_code == 200 and b"event: error" in body:
+        return 502
+    return response.status_code
+
+
+async def run_load(http: httpx.AsyncClient, payloads: list, args, pid: int) -> dict:
+    """Send the requests and collect latencies, statuses and memory."""
+    rng = random.Random(args.seed)
+    latencies = []
+    statuses = {}
+
+    def request(index: int) -> tuple:
+        payload = dict(payloads[index % len(payloads)])
+        if args.distinct:
+            # Different texts are neither cached nor coalesced
+            payload["text"] = f"{payload['text']}\n\n(request {index})"
+        return payload, rng.random() < args.stream_ratio
+
+    async def one(index: int, started: float):
+        payload, stream = request(index)
+        try:
+            status = await send(http, payload, stream)
+        except httpx.HTTPError as exc:
+            status = type(exc).__name__
+        latencies.append(time.perf_counter() - started)
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    with RssSampler(pid) as rss:
+        start = time.perf_counter()
+        if args.rate:
+            # Open loop: Poisson arrivals, however fast the service answers
+            tasks = []
+            arrival = start
+            for index in range(args.requests):
+                arrival += rng.expovariate(args.rate)
+                await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+                tasks.append(asyncio.ensure_future(one(index, arrival)))
+            await asyncio.gather(*tasks)
+        else:
+            # Closed loop: `concurrency` clients, each sending its next request when answered
+            indexes = iter(range(args.requests))
+
+            async def client():
+                for index in indexes:
+                    await one(index, time.perf_counter())
+
+            await asyncio.gather(*(client() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+    return {
+        "requests": args.requests,
+        "elapsed_s": elapsed,
+        "throughput_rps": args.requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "error_rate": errors / args.requests,
+        "statuses": statuses,
+        "peak_rss_mb": rss.peak / 2 ** 20,
+    }
+
+
+def app_environment(args) -> dict:
+    return {
+        "LLM_PROVIDER": "stub",
+        "LLM_STUB_LATENCY_SECONDS": str(args.llm_latency),
+        "LLM_STUB_LATENCY_DISTRIBUTION": args.llm_distribution,
+        "LLM_STUB_ERROR_RATE": str(args.llm_error_rate),
+        "LLM_STUB_SEED": str(args.seed),
+        "RATE_LIMIT_MAX_REQUESTS": str(10 ** 9),
+        "LLM_QUEUE_TIMEOUT_SECONDS": "600",
+        "LOG_LEVEL": args.log_level,
+    }
+
+
+async def run_in_process(payloads: list, args) -> dict:
+    os.environ.update(app_environment(args))
+    from src.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as http:
+            return await run_load(http, payloads, args, os.getpid())
+
+
+async def run_under_uvicorn(payloads: list, args) -> dict:
+    port = free_port()
+    command = [
+        sys.executable, "-m", "uvicorn", "src.main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(args.workers), "--log-level", "warning",
+    ]
+    server = subprocess.Popen(command, cwd=PROJECT_ROOT, env={**os.environ, **app_environment(args)})
+    try:
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=600, limits=limits) as http:
+            deadline = time.monotonic() + 60
+            while True:
+                try:
+                    (await http.get("/metrics")).raise_for_status()
+                    break
+                except httpx.HTTPError:
+                    if server.poll() is not None or time.monotonic() > deadline:
+                        raise RuntimeError("The API server did not start")
+                    await asyncio.sleep(0.1)
+            return await run_load(http, payloads, args, server.pid)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def print_results(results: dict) -> None:
+    print(
+        f"{results['requests']} requests in {results['elapsed_s']:.2f}s: {results['throughput_rps']:.1f} req/s, "
+        f"p50 {results['p50_ms']:.1f} ms, p95 {results['p95_ms']:.1f} ms, p99 {results['p99_ms']:.1f} ms, "
+        f"errors {results['error_rate']:.2%}, peak RSS {results['peak_rss_mb']:.0f} MB"
+    )
+    print(f"statuses: {results['statuses']}")
+
+
+def print_comparison(comparison: list) -> None:
+    print(f"{'metric':<16} {'baseline':>10} {'current':>10} {'change':>8}")
+    for row in comparison:
+        flag = "  REGRESSION" if row["regressed"] else ""
+        print(f"{row['metric']:<16} {row['baseline']:>10.2f} {row['current']:>10.2f} {row['change']:>+8.1%}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", choices=("in-process", "uvicorn"), default="in-process")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32, help="Clients of the closed-loop model")
+    parser.add_argument("--rate", type=float, default=0.0, help="Arrivals per second (open loop); 0 for closed loop")
+    parser.add_argument("--stream-ratio", type=float, default=0.0, help="Share of requests sent to /summarize/stream")
+    parser.add_argument("--distinct", action=argparse.BooleanOptionalAction, default=True, help="Make every text unique (no cache hits)")
+    parser.add_argument("--markdown", default=str(PROJECT_ROOT / "docs" / "examples" / "*.md"))
+    parser.add_argument("--jsonl", nargs="*", default=[str(PROJECT_ROOT / "requests.jsonl")])
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Median stub LLM latency in seconds")
+    parser.add_argument("--llm-distribution", default="lognormal", choices=("constant", "exponential", "lognormal"))
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log-level", default="WARNING", help="LOG_LEVEL of the app")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against the results in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.markdown, args.jsonl)
+    if not payloads:
+        parser.error("No payloads found")
+
+    run = run_under_uvicorn if args.server == "uvicorn" else run_in_process
+    results = asyncio.run(run(payloads, args))
+    print_results(results)
+
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "payloads": len(payloads),
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        changed = sorted(
+            key for key, value in report["config"].items()
+            if key != "tolerance" and baseline.get("config", {}).get(key, value) != value
+        )
+        if changed:
+            print(f"Note: the baseline was recorded with different settings ({', '.join(changed)})")
+        comparison = compare_results(results, baseline["results"], args.tolerance)
+        report["comparison"] = comparison
+        print_comparison(comparison)
+        if any(row["regressed"] for row in comparison):
+            print(f"Regression beyond {args.tolerance:.0%} against {args.baseline}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark of request latency with logging enabled.
+
+Serves an endpoint that logs like /summarize (a handful of lines per
+request around a short simulated upstream call) behind the request logging
+middleware, and compares the previous setup (synchronous file and console
+handlers, eagerly formatted f-strings) with the queue-based mode (background
+writer, lazily formatted messages), with and without sampling of the access
+log lines. Console output goes to /dev/null; log files are written under
+logs/benchmarks and removed afterwards. `--write-latency` makes every
+handler flush sleep, to mimic a slow sink such as a terminal or a network
+file system.
+
+Usage:
+    python -m benchmarks.bench_logging [--requests 5000] [--concurrency 64] [--upstream-latency 0.002] [--write-latency 0.0002]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from src.middleware import RequestLoggingMiddleware
+from utils.logging_config import setup_logging, stop_logging
+
+logger = logging.getLogger("bench_logging")
+
+
+def create_app(lazy: bool, sample_rate: float, upstream_latency: float) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestLoggingMiddleware, logger=logger, sample_rate=sample_rate)
+
+    @app.post("/summarize")
+    async def summarize(payload: dict):
+        text = payload["text"]
+        if lazy:
+            logger.info("📝 Summarization request - Text: %s chars, Length: %s, Style: %s", len(text), "short", "bullet")
+            logger.info("🧹 Text cleaned - Original: %s chars, Cleaned: %s chars", len(text), len(text))
+            logger.info("🔧 Built user prompt - Length: %s chars", len(text) + 200)
+            logger.info("🤖 Calling Gemini 2.5 Flash API...")
+            await asyncio.sleep(upstream_latency)
+            logger.info("✅ Gemini API call successful - Time: %.3fs", upstream_latency)
+            logger.info("📄 Summary generated - Output: %s chars", 42)
+        else:
+            logger.info(f"📝 Summarization request - Text: {len(text)} chars, Length: short, Style: bullet")
+            logger.info(f"🧹 Text cleaned - Original: {len(text)} chars, Cleaned: {len(text)} chars")
+            logger.info(f"🔧 Built user prompt - Length: {len(text) + 200} chars")
+            logger.info("🤖 Calling Gemini 2.5 Flash API...")
+            await asyncio.sleep(upstream_latency)
+            logger.info(f"✅ Gemini API call successful - Time: {upstream_latency:.3f}s")
+            logger.info(f"📄 Summary generated - Output: {42} chars")
+        logger.info("✅ Summarization completed successfully")
+        return {"summary": "* A summary."}
+
+    return app
+
+
+async def run_requests(app: FastAPI, requests: int, concurrency: int) -> dict:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    payload = {"text": "Some text to summarize. " * 20}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/summarize", json=payload)
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests_per_s": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--upstream-latency", type=float, default=0.002)
+    parser.add_argument("--write-latency", type=float, default=0.0, help="Extra seconds per log write")
+    args = parser.parse_args()
+
+    if args.write_latency:
+        flush = logging.StreamHandler.flush
+
+        def slow_flush(handler):
+            time.sleep(args.write_latency)
+            flush(handler)
+
+        logging.StreamHandler.flush = slow_flush
+
+    modes = {
+        "sync, f-strings": dict(use_queue=False, lazy=False, sample_rate=1.0),
+        "queue, lazy": dict(use_queue=True, lazy=True, sample_rate=1.0),
+        "queue, lazy, 10% sampled": dict(use_queue=True, lazy=True, sample_rate=0.1),
+    }
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {args.write_latency * 1000:.2f} ms per log write")
+    print(f"{'logging':<26} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    stderr = sys.stderr
+    for name, mode in modes.items():
+        sys.stderr = open(os.devnull, "w")
+        log_file = setup_logging("bench_logging", "benchmarks", use_queue=mode["use_queue"])
+        try:
+            app = create_app(mode["lazy"], mode["sample_rate"], args.upstream_latency)
+            result = asyncio.run(run_requests(app, args.requests, args.concurrency))
+        finally:
+            stop_logging()
+            logging.basicConfig(handlers=[logging.NullHandler()], force=True)
+            sys.stderr.close()
+            sys.stderr = stderr
+            log_file.unlink(missing_ok=True)
+        print(f"{name:<26} {result['requests_per_s']:>8.0f} {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
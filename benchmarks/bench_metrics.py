@@ -0,0 +1,87 @@
+"""
+Microbenchmark of the metrics instrumentation overhead.
+
+Reports the cost of the individual operations (counter increment,
+histogram observation, labelled lookup, stage span, rendering /metrics),
+and the throughput of a no-op endpoint with and without MetricsMiddleware.
+
+Usage:
+    python -m benchmarks.bench_metrics [--iterations 1000000] [--requests 5000]
+"""
+
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+
+from src.metrics import Counter, Histogram, Registry, span
+from src.middleware import MetricsMiddleware
+
+from .bench_middleware import run_requests
+
+
+def ns_per_call(operation, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        operation()
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+def measure_span():
+    with span("bench"):
+        pass
+
+
+def create_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/noop")
+    async def noop():
+        return {}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=1_000_000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    registry = Registry()
+    counter = Counter("bench_total", "Benchmark counter.", registry=registry)
+    histogram = Histogram("bench_seconds", "Benchmark histogram.", registry=registry)
+    labelled = Histogram("bench_labelled_seconds", "Benchmark histogram.", ("route", "status"), registry=registry)
+    for index in range(100):
+        labelled.labels(f"/route/{index}", "200").observe(0.01)
+
+    operations = {
+        "baseline (empty call)": lambda: None,
+        "time.perf_counter()": time.perf_counter,
+        "counter.inc()": counter.inc,
+        "histogram.observe()": lambda: histogram.observe(0.042),
+        "labels(...).observe()": lambda: labelled.labels("/route/42", "200").observe(0.042),
+        "with span(...)": measure_span,
+    }
+    print(f"{'operation':<24} {'ns/call':>8}")
+    for name, operation in operations.items():
+        print(f"{name:<24} {ns_per_call(operation, args.iterations):>8.0f}")
+
+    renders = 1000
+    render_us = ns_per_call(registry.render, renders) / 1000
+    print(f"{'render (102 series)':<24} {render_us:>8.0f} µs")
+
+    print()
+    print(f"{args.requests} requests to a no-op endpoint, concurrency {args.concurrency}")
+    print(f"{'':<24} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, instrumented in (("without metrics", False), ("with MetricsMiddleware", True)):
+        result = asyncio.run(run_requests(create_app(instrumented), args.requests, args.concurrency))
+        print(f"{name:<24} {result['requests_per_s']:>8.0f} {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
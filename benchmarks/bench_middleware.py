@@ -0,0 +1,119 @@
+"""
+Benchmark of the per-request overhead of the middleware stack.
+
+Drives a no-op endpoint through httpx's ASGI transport, with no middleware,
+with the previous BaseHTTPMiddleware-based rate limiter and request logger,
+and with the current pure ASGI ones, and reports requests per second and
+p50/p99 latency. Log output is disabled so that only the middleware itself
+is measured.
+
+Usage:
+    python -m benchmarks.bench_middleware [--requests 5000] [--concurrency 32]
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.middleware import RequestLoggingMiddleware
+from src.throttling import RateLimiter, RateLimiterMiddleware
+
+logger = logging.getLogger("bench_middleware")
+
+
+class LegacyRateLimiterMiddleware(BaseHTTPMiddleware):
+    """The previous rate limiting middleware, built on BaseHTTPMiddleware."""
+
+    def __init__(self, app, limiter: RateLimiter):
+        super().__init__(app)
+        self.limiter = limiter
+
+    async def dispatch(self, request: Request, call_next):
+        result = await self.limiter.hit(request.client.host)
+        if not result.allowed:
+            return self.limiter.limit_exceeded_response(result)
+
+        response = await call_next(request)
+        response.headers.update(self.limiter.headers(result))
+        return response
+
+
+async def legacy_log_requests(request: Request, call_next):
+    """The previous `@app.middleware("http")` request logger."""
+    start_time = time.time()
+    logger.info(f"🔵 {request.method} {request.url.path} - Client: {request.client.host}")
+    response = await call_next(request)
+    process_time = time.time() - start_time
+    status_emoji = "🟢" if response.status_code < 400 else "🔴"
+    logger.info(f"{status_emoji} {request.method} {request.url.path} - Status: {response.status_code} - Time: {process_time:.3f}s")
+    return response
+
+
+def create_app(stack: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/noop")
+    async def noop():
+        return {}
+
+    limiter = RateLimiter(max_requests=10 ** 9, window_seconds=60)
+    if stack == "BaseHTTPMiddleware":
+        app.add_middleware(LegacyRateLimiterMiddleware, limiter=limiter)
+        app.add_middleware(BaseHTTPMiddleware, dispatch=legacy_log_requests)
+    elif stack == "pure ASGI":
+        app.add_middleware(RateLimiterMiddleware, limiter=limiter)
+        app.add_middleware(RequestLoggingMiddleware, logger=logger)
+    return app
+
+
+async def run_requests(app: FastAPI, requests: int, concurrency: int) -> dict:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get("/noop")
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        # Warm up
+        await asyncio.gather(*(one() for _ in range(min(200, requests))))
+        latencies.clear()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests_per_s": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'middleware stack':<20} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for stack in ("none", "BaseHTTPMiddleware", "pure ASGI"):
+        result = asyncio.run(run_requests(create_app(stack), args.requests, args.concurrency))
+        print(f"{stack:<20} {result['requests_per_s']:>8.0f} {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
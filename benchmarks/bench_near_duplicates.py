@@ -0,0 +1,131 @@
+"""
+Lookup latency of the near-duplicate index with many indexed documents.
+
+Indexes `--documents` synthetic documents (random words with a Zipf-like
+frequency, `--words` words each), then looks up `--queries` near-duplicates
+of indexed documents (a few words changed, a timestamp and a footer added)
+and as many unrelated documents. Reports the latency of computing a
+signature and of the lookup itself, the share of near-duplicates found
+among those whose exact shingle similarity reaches the threshold (and of
+unrelated documents wrongly matched), the process memory taken by the
+index, and for comparison the latency of comparing a signature with every
+indexed one.
+
+Usage:
+    python -m benchmarks.bench_near_duplicates [--documents 100000] [--queries 1000] [--words 800]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import psutil
+
+from src.cache.near_duplicates import NearDuplicateIndex, shingle_hashes
+
+VOCABULARY = 20_000
+
+
+def make_vocabulary(rng: np.random.Generator) -> np.ndarray:
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    lengths = rng.integers(2, 10, VOCABULARY)
+    return np.array(["".join(rng.choice(letters, length)) for length in lengths])
+
+
+def make_document(rng: np.random.Generator, vocabulary: np.ndarray, words: int) -> list:
+    # Zipf-like word frequencies, as in natural text
+    ranks = np.minimum(rng.zipf(1.3, words), VOCABULARY) - 1
+    return vocabulary[ranks].tolist()
+
+
+def make_variant(rng: np.random.Generator, vocabulary: np.ndarray, words: list, changes: int) -> str:
+    words = list(words)
+    for position in rng.integers(0, len(words), changes):
+        words[position] = vocabulary[rng.integers(VOCABULARY)]
+    day = rng.integers(1, 29)
+    return f"Published 2025-10-{day:02d} 08:00 UTC\n" + " ".join(words) + "\nSubscribe to our newsletter. Share this article."
+
+
+def percentiles(seconds: list) -> str:
+    p50, p99 = np.percentile(np.array(seconds) * 1e6, [50, 99])
+    return f"p50 {p50:>8.1f} us   p99 {p99:>8.1f} us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--words", type=int, default=800, help="Words per document")
+    parser.add_argument("--changes", type=int, default=2, help="Words changed in each near-duplicate")
+    parser.add_argument("--threshold", type=float, default=0.9)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vocabulary = make_vocabulary(rng)
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+    index = NearDuplicateIndex(threshold=args.threshold, max_entries=args.documents, min_words=10)
+
+    kept = {}
+    sample = set(rng.choice(args.documents, args.queries, replace=False).tolist())
+    signature_times, add_times = [], []
+    start = time.perf_counter()
+    for number in range(args.documents):
+        words = make_document(rng, vocabulary, args.words)
+        if number in sample:
+            kept[f"doc-{number}"] = words
+        text = " ".join(words)
+        started = time.perf_counter()
+        signature = index.signature(text)
+        added = time.perf_counter()
+        index.add(f"doc-{number}", signature, "short/bullet", f"Summary of document {number}")
+        signature_times.append(added - started)
+        add_times.append(time.perf_counter() - added)
+    build_seconds = time.perf_counter() - start
+    rss_index = process.memory_info().rss - rss_before
+
+    variants = [(key, make_variant(rng, vocabulary, words, args.changes)) for key, words in kept.items()]
+    unrelated = [" ".join(make_document(rng, vocabulary, args.words)) for _ in range(args.queries)]
+
+    hit_times, similar, found = [], 0, 0
+    for key, text in variants:
+        signature = index.signature(text)
+        started = time.perf_counter()
+        match = index.lookup(signature, "short/bullet")
+        hit_times.append(time.perf_counter() - started)
+        original = shingle_hashes(" ".join(kept[key]), index.shingle_words)
+        variant = shingle_hashes(text, index.shingle_words)
+        common = len(np.intersect1d(original, variant))
+        if common / (len(original) + len(variant) - common) >= args.threshold:
+            similar += 1
+            found += match is not None and match.key == key
+
+    miss_times, false_matches = [], 0
+    for text in unrelated:
+        signature = index.signature(text)
+        started = time.perf_counter()
+        match = index.lookup(signature, "short/bullet")
+        miss_times.append(time.perf_counter() - started)
+        false_matches += match is not None
+
+    # Baseline: compare the signature with every indexed signature
+    signatures = index._signatures[: len(index)]
+    scan_times = []
+    for _, text in variants[:100]:
+        signature = index.signature(text)
+        started = time.perf_counter()
+        similarities = np.count_nonzero(signatures == signature, axis=1)
+        similarities.argmax()
+        scan_times.append(time.perf_counter() - started)
+
+    print(f"{len(index)} documents of {args.words} words indexed in {build_seconds:.1f}s, index memory {rss_index / 1e6:.0f} MB")
+    print(f"signature                  {percentiles(signature_times)}")
+    print(f"add                        {percentiles(add_times)}")
+    print(f"lookup, near-duplicate     {percentiles(hit_times)}   found {found}/{similar} above the threshold")
+    print(f"lookup, unrelated          {percentiles(miss_times)}   matched {false_matches / len(unrelated):.1%}")
+    print(f"full scan (baseline)       {percentiles(scan_times)}")
+
+
+if __name__ == "__main__":
+    main()
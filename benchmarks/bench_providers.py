@@ -0,0 +1,81 @@
+"""
+Benchmark of the LLM providers, fully offline.
+
+Sends the same prompts through the upstream pool to the stub provider and
+to the Gemini provider talking to the local fake Gemini server, both with
+the same artificial latency, and reports calls per second and latency
+percentiles. The difference is the cost of the Gemini client and the HTTP
+round trip, which the stub leaves out of load tests of the service.
+
+Usage:
+    python -m benchmarks.bench_providers [--calls 2000] [--concurrency 32] [--latency 0.0]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from src.llm import UpstreamPool, create_llm_provider
+
+from .fake_gemini import BackgroundServer, create_fake_gemini_app
+
+PROMPT = "Summarize the following text in three bullet points. " + "The cost of AI computing is falling. " * 40
+
+
+async def run_calls(provider, calls: int, concurrency: int, stream: bool) -> dict:
+    pool = UpstreamPool(max_concurrency=concurrency, queue_timeout=600, call_timeout=60)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            if stream:
+                async for _ in pool.stream(lambda: provider.stream(PROMPT, "Summarize.")):
+                    pass
+            else:
+                await pool.run(lambda: provider.generate(PROMPT, "Summarize."))
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    elapsed = time.perf_counter() - start
+    await provider.aclose()
+
+    latencies.sort()
+    return {
+        "calls_per_s": calls / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.0, help="Upstream latency in seconds")
+    args = parser.parse_args()
+
+    fake = create_fake_gemini_app(latency=args.latency, stream_chunk_delay=0)
+    print(f"{args.calls} calls, concurrency {args.concurrency}, {args.latency * 1000:.0f} ms upstream latency")
+    print(f"{'provider':<30} {'calls/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    with BackgroundServer(fake) as server:
+        for stream in (False, True):
+            providers = {
+                "stub": lambda: create_llm_provider(
+                    "stub", stub_latency=args.latency, stub_latency_distribution="constant", stub_chunk_delay=0
+                ),
+                "gemini (fake server)": lambda: create_llm_provider(
+                    "gemini", model="fake", api_key="bench", base_url=server.url
+                ),
+            }
+            for name, provider in providers.items():
+                result = asyncio.run(run_calls(provider(), args.calls, args.concurrency, stream))
+                label = f"{name}{', stream' if stream else ''}"
+                print(f"{label:<30} {result['calls_per_s']:>8.0f} {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
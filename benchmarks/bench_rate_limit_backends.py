@@ -0,0 +1,81 @@
+"""
+Benchmark of the rate limit state backends.
+
+Charges requests from many clients through the memory, SQLite and Redis
+backends (the latter against the local stand-in, with an artificial
+round-trip latency) and reports the throughput and per-call latency, once
+with one call at a time and once with many concurrent requests, which share
+SQLite's worker threads and Redis round-trips through pipelining.
+
+Usage:
+    python -m benchmarks.bench_rate_limit_backends [--calls 5000] [--concurrency 64] [--redis-latency 0.0005]
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from src.throttling import MemoryRateLimitBackend, RateLimiter, RedisRateLimitBackend, SQLiteRateLimitBackend
+
+from .fake_redis import FakeRedisServer
+
+
+async def timed_hit(limiter: RateLimiter, client_id: str, latencies: list):
+    start = time.perf_counter()
+    await limiter.hit(client_id)
+    latencies.append(time.perf_counter() - start)
+
+
+async def run_calls(limiter: RateLimiter, calls: int, concurrency: int) -> dict:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int):
+        async with semaphore:
+            await timed_hit(limiter, f"10.0.{index // 256 % 256}.{index % 256}", latencies)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(calls)))
+    elapsed = time.perf_counter() - start
+    await limiter.close()
+
+    latencies.sort()
+    return {
+        "calls_per_s": calls / elapsed,
+        "p50_us": statistics.median(latencies) * 1e6,
+        "p99_us": latencies[int(len(latencies) * 0.99)] * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--redis-latency", type=float, default=0.0005, help="Seconds per round-trip to the stand-in")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, FakeRedisServer(latency=args.redis_latency) as redis:
+        backends = {
+            "memory": lambda: MemoryRateLimitBackend(),
+            "sqlite": lambda: SQLiteRateLimitBackend(str(Path(tmp) / f"rate_limits-{time.perf_counter_ns()}.sqlite3")),
+            "redis (stand-in)": lambda: RedisRateLimitBackend(redis.url, window_seconds=60),
+        }
+
+        print(f"{args.calls} calls, Redis round-trip {args.redis_latency * 1000:.1f} ms")
+        print(f"{'backend':<18} {'concurrency':>11} {'calls/s':>9} {'p50 µs':>8} {'p99 µs':>8}")
+        for name, make_backend in backends.items():
+            for concurrency in (1, args.concurrency):
+                limiter = RateLimiter(max_requests=10, window_seconds=60, backend=make_backend())
+                result = asyncio.run(run_calls(limiter, args.calls, concurrency))
+                print(
+                    f"{name:<18} {concurrency:>11} {result['calls_per_s']:>9.0f} "
+                    f"{result['p50_us']:>8.0f} {result['p99_us']:>8.0f}"
+                )
+        print(f"Redis round-trips: {redis.round_trips} for {redis.commands} commands")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Microbenchmark of the per-IP rate limiter under scanner-like traffic.
+
+Sends requests from many distinct IPs (each IP a few times) through the
+limiter and reports the cost per call and the memory held by the limiter,
+for the current sliding-window counter and the previous list-of-timestamps
+implementation.
+
+Usage:
+    python -m benchmarks.bench_rate_limiter [--ips 100000] [--hits-per-ip 3]
+"""
+
+import argparse
+import asyncio
+import gc
+import time
+import tracemalloc
+from collections import defaultdict
+
+import psutil
+
+from src.throttling import RateLimiter
+
+
+class LegacyRateLimiter:
+    """The previous implementation: one growing list of timestamps per IP."""
+
+    def __init__(self, max_requests: int, window_seconds: int):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.clients = defaultdict(list)
+
+    async def hit(self, client_id: str) -> bool:
+        current_time = time.time()
+        self.clients[client_id] = [
+            timestamp for timestamp in self.clients[client_id]
+            if current_time - timestamp < self.window_seconds
+        ]
+        if len(self.clients[client_id]) >= self.max_requests:
+            return False
+        self.clients[client_id].append(current_time)
+        return True
+
+
+async def send_traffic(limiter, ips: list, hits_per_ip: int) -> float:
+    start = time.perf_counter()
+    for _ in range(hits_per_ip):
+        for ip in ips:
+            await limiter.hit(ip)
+    return time.perf_counter() - start
+
+
+def run_traffic(limiter, ips: list, hits_per_ip: int) -> float:
+    return asyncio.run(send_traffic(limiter, ips, hits_per_ip))
+
+
+def measure(make_limiter, ips: list, hits_per_ip: int) -> dict:
+    # Timing run, without tracemalloc overhead
+    elapsed = run_traffic(make_limiter(), ips, hits_per_ip)
+
+    # Memory run on a fresh limiter
+    gc.collect()
+    rss_before = psutil.Process().memory_info().rss
+    tracemalloc.start()
+    limiter = make_limiter()
+    run_traffic(limiter, ips, hits_per_ip)
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = psutil.Process().memory_info().rss
+
+    calls = len(ips) * hits_per_ip
+    return {
+        "ns_per_call": elapsed / calls * 1e9,
+        "traced_mb": traced / 2 ** 20,
+        "rss_growth_mb": (rss_after - rss_before) / 2 ** 20,
+        "clients": len(getattr(limiter, "backend", limiter).clients),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ips", type=int, default=100_000)
+    parser.add_argument("--hits-per-ip", type=int, default=3)
+    parser.add_argument("--max-clients", type=int, default=100_000)
+    args = parser.parse_args()
+
+    ips = [f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}" for index in range(args.ips)]
+    limiters = {
+        "legacy (timestamp lists)": lambda: LegacyRateLimiter(max_requests=10, window_seconds=60),
+        "sliding-window counter": lambda: RateLimiter(max_requests=10, window_seconds=60, max_clients=args.max_clients),
+    }
+
+    print(f"{args.ips} distinct IPs x {args.hits_per_ip} requests")
+    print(f"{'implementation':<26} {'ns/call':>9} {'traced MB':>10} {'RSS +MB':>8} {'clients':>8}")
+    for name, make_limiter in limiters.items():
+        result = measure(make_limiter, ips, args.hits_per_ip)
+        print(
+            f"{name:<26} {result['ns_per_call']:>9.0f} {result['traced_mb']:>10.1f} "
+            f"{result['rss_growth_mb']:>8.1f} {result['clients']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Startup time of the API, checked against a budget.
+
+Imports `src.main` and `tools.langchain_integration` in fresh interpreters
+under `python -X importtime` (`--runs` times each) and reports the median
+cumulative import time of each, with the imports that cost the most. Then
+starts the app in a fresh process (import, create_app, lifespan startup)
+and reports when it could answer /health and when /ready turned ready.
+
+Runs with the gemini provider and a dummy key (no upstream call is made:
+prewarming is disabled), so that the cost of its client library counts.
+
+Exits with status 1 if a median goes over its budget, e.g. in CI:
+    python -m benchmarks.bench_startup --import-budget-ms 1500 --ready-budget-ms 4000
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5] [--import-budget-ms 1500] [--tools-budget-ms 1500] [--ready-budget-ms 4000]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+ENVIRONMENT = {
+    "LLM_PROVIDER": "gemini",
+    "GEMINI_API_KEY": "bench-key",
+    "STARTUP_PREWARM_CONNECTIONS": "0",
+    "JOBS_WORKERS": "0",
+    "LOG_LEVEL": "WARNING",
+}
+
+# Runs in a fresh interpreter and prints the startup phases, in seconds
+STARTUP_SCRIPT = """
+import asyncio, json, time
+start = time.perf_counter()
+import src.main
+imported = time.perf_counter()
+app = src.main.create_app()
+created = time.perf_counter()
+
+async def main():
+    async with app.router.lifespan_context(app):
+        started = time.perf_counter()
+        while not app.state.ready:
+            await asyncio.sleep(0.005)
+        return started, time.perf_counter()
+
+started, ready = asyncio.run(main())
+print(json.dumps({"import": imported - start, "create_app": created - start, "health": started - start, "ready": ready - start}))
+"""
+
+
+def run_python(args: list, environment: dict) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, **environment},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def import_times(module: str, environment: dict) -> tuple:
+    """
+    Import `module` under -X importtime.
+
+    Returns:
+        Its cumulative import time in seconds, and the cumulative times of
+        the modules it imports directly, by name
+    """
+    stderr = run_python(["-X", "importtime", "-c", f"import {module}"], environment).stderr
+    total, children = None, {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0 and name.strip() == module:
+            total = int(cumulative) / 1e6
+        elif depth == 1:
+            children[name.strip()] = int(cumulative) / 1e6
+    return total, children
+
+
+def report_imports(module: str, runs: int, top: int, environment: dict) -> float:
+    totals, slowest = [], {}
+    for _ in range(runs):
+        total, children = import_times(module, environment)
+        totals.append(total)
+        for name, seconds in children.items():
+            slowest.setdefault(name, []).append(seconds)
+    median = statistics.median(totals)
+    print(f"import {module}: median {median * 1000:.0f} ms (min {min(totals) * 1000:.0f}, max {max(totals) * 1000:.0f})")
+    for name, seconds in sorted(slowest.items(), key=lambda item: -statistics.median(item[1]))[:top]:
+        print(f"    {statistics.median(seconds) * 1000:>7.1f} ms  {name}")
+    return median
+
+
+def check(name: str, seconds: float, budget_ms: float) -> bool:
+    within = seconds * 1000 <= budget_ms
+    print(f"{name:<34} {seconds * 1000:>7.0f} ms   budget {budget_ms:>6.0f} ms   {'ok' if within else 'OVER BUDGET'}")
+    return within
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="Direct imports listed per module")
+    parser.add_argument("--import-budget-ms", type=float, default=1500, help="Budget of importing src.main")
+    parser.add_argument("--tools-budget-ms", type=float, default=1500, help="Budget of importing tools.langchain_integration")
+    parser.add_argument("--ready-budget-ms", type=float, default=4000, help="Budget of the time until /ready is ready")
+    args = parser.parse_args()
+
+    api_import = report_imports("src.main", args.runs, args.top, ENVIRONMENT)
+    tools_import = report_imports("tools.langchain_integration", args.runs, args.top, ENVIRONMENT)
+
+    phases = [json.loads(run_python(["-c", STARTUP_SCRIPT], ENVIRONMENT).stdout) for _ in range(args.runs)]
+    startup = {name: statistics.median(run[name] for run in phases) for name in phases[0]}
+    print("startup (median, from the first import): " + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in startup.items()))
+
+    print()
+    results = [
+        check("import src.main", api_import, args.import_budget_ms),
+        check("import tools.langchain_integration", tools_import, args.tools_budget_ms),
+        check("ready", startup["ready"], args.ready_budget_ms),
+    ]
+    if not all(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+A local stand-in for the Gemini REST API, used by the benchmarks.
+
+It implements just enough of `models/{model}:generateContent` and
+`models/{model}:streamGenerateContent` for `google.genai` to parse the responses, with a configurable artificial latency
+that can grow with the prompt size, like the prefill time of a real model.
+A share of requests can be made to fail (503 UNAVAILABLE, like an
+overloaded model) or to hit a slow tail, to exercise retries and hedging.
+"""
+
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.requests import ClientDisconnect
+
+
+def create_fake_gemini_app(
+    latency: float = 0.2,
+    summary: str = "* A fake summary.",
+    seconds_per_1k_tokens: float = 0.0,
+    stream_chunk_delay: float = 0.05,
+    error_rate: float = 0.0,
+    slow_rate: float = 0.0,
+    slow_latency: float = 2.0,
+    seed: int = None,
+) -> FastAPI:
+    """
+    Build the fake Gemini application.
+
+    Args:
+        latency: Seconds to wait before answering each request
+        summary: Text returned as the generated summary
+        seconds_per_1k_tokens: Extra latency per 1000 prompt tokens (4 chars each)
+        stream_chunk_delay: Seconds between two streamed chunks (one word each)
+        error_rate: Share of requests answered with 503 UNAVAILABLE (after the latency)
+        slow_rate: Share of requests that take `slow_latency` seconds instead
+        slow_latency: Latency of the slow requests
+        seed: Seed of the error and slow request draws, for reproducible runs
+    """
+    rng = random.Random(seed)
+    fake = FastAPI()
+    fake.state.requests = 0
+    fake.state.errors = 0
+    fake.state.in_flight = 0
+    fake.state.peak_in_flight = 0
+    fake.state.cancelled_streams = 0
+
+    def response_body(model: str, text: str, finished: bool) -> dict:
+        candidate = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+        if finished:
+            candidate["finishReason"] = "STOP"
+        return {
+            "candidates": [candidate],
+            "usageMetadata": {
+                "promptTokenCount": 1,
+                "candidatesTokenCount": 1,
+                "totalTokenCount": 2,
+            },
+            "modelVersion": model,
+        }
+
+    def error_response() -> JSONResponse:
+        fake.state.errors += 1
+        error = {"code": 503, "message": "The model is overloaded. Please try again later.", "status": "UNAVAILABLE"}
+        return JSONResponse({"error": error}, status_code=503)
+
+    @fake.post("/{api_version}/models/{target}")
+    async def generate(api_version: str, target: str, request: Request):
+        try:
+            body = json.loads(await request.body())
+        except ClientDisconnect:
+            # A hedged or timed out call was cancelled while sending its prompt
+            return Response(status_code=499)
+        prompt_chars = sum(
+            len(part.get("text", ""))
+            for content in body.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        fake.state.requests += 1
+        model, _, method = target.partition(":")
+        failed = rng.random() < error_rate
+        delay = slow_latency if rng.random() < slow_rate else latency
+        delay += seconds_per_1k_tokens * prompt_chars / 4000
+
+        if method == "streamGenerateContent":
+            await asyncio.sleep(delay)
+            if failed:
+                return error_response()
+            words = summary.split(" ")
+
+            async def chunks():
+                try:
+                    for index, word in enumerate(words):
+                        text = word if index == 0 else f" {word}"
+                        finished = index == len(words) - 1
+                        yield f"data: {json.dumps(response_body(model, text, finished))}\r\n\r\n"
+                        if not finished:
+                            await asyncio.sleep(stream_chunk_delay)
+                except (asyncio.CancelledError, GeneratorExit):
+                    fake.state.cancelled_streams += 1
+                    raise
+
+            return StreamingResponse(chunks(), media_type="text/event-stream")
+
+        fake.state.in_flight += 1
+        fake.state.peak_in_flight = max(fake.state.peak_in_flight, fake.state.in_flight)
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            fake.state.in_flight -= 1
+
+        if failed:
+            return error_response()
+        return JSONResponse(response_body(model, summary, finished=True))
+
+    return fake
+
+
+def free_port() -> int:
+    """Return a free TCP port on localhost."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class BackgroundServer:
+    """Runs an ASGI app under uvicorn in a daemon thread."""
+
+    def __init__(self, app, port: int = None):
+        self.app = app
+        self.port = port or free_port()
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="off")
+        )
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.thread.start()
+        deadline = time.time() + 10
+        while not self.server.started:
+            if time.time() > deadline:
+                raise RuntimeError("Fake server did not start in time")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
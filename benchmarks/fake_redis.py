@@ -0,0 +1,146 @@
+"""
+A local stand-in for a Redis server, used by the tests and benchmarks.
+
+It speaks RESP and implements the handful of commands used by the shared
+rate limit backend (PING, AUTH, SELECT, GET, INCRBY, DECRBY, EXPIRE, DEL,
+DBSIZE, FLUSHDB, and EVAL/EVALSHA of the backend's own Lua script, run by
+an equivalent Python function), with an optional artificial latency per
+round-trip to mimic a server on another host.
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+
+from src.throttling.backends import REDIS_HIT_SCRIPT
+
+from .fake_gemini import free_port
+
+
+class FakeRedisServer:
+    """Runs the stand-in server on an event loop in a daemon thread."""
+
+    def __init__(self, latency: float = 0.0, port: int = None):
+        self.latency = latency
+        self.port = port or free_port()
+        self.data = {}
+        # SHA1 digests of the scripts loaded with EVAL
+        self.scripts = set()
+        self.commands = 0
+        self.round_trips = 0
+        self._loop = asyncio.new_event_loop()
+        self._server = None
+        self.thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"redis://127.0.0.1:{self.port}/0"
+
+    def __enter__(self):
+        self.thread.start()
+        started = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self._serve, "127.0.0.1", self.port), self._loop
+        )
+        self._server = started.result(timeout=10)
+        return self
+
+    def __exit__(self, *exc_info):
+        async def stop():
+            self._server.close()
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(stop(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self.thread.join(timeout=5)
+
+    def _get(self, key: bytes):
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def _incr(self, key: bytes, amount: int) -> bytes:
+        value = int(self._get(key) or 0) + amount
+        expires_at = self.data[key][1] if key in self.data else None
+        self.data[key] = (str(value).encode(), expires_at)
+        return b":%d\r\n" % value
+
+    def _execute(self, command: list) -> bytes:
+        self.commands += 1
+        name = command[0].upper()
+        if name in (b"PING", b"AUTH", b"SELECT"):
+            return b"+OK\r\n" if name != b"PING" else b"+PONG\r\n"
+        if name == b"GET":
+            value = self._get(command[1])
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+        if name == b"INCRBY":
+            return self._incr(command[1], int(command[2]))
+        if name == b"DECRBY":
+            return self._incr(command[1], -int(command[2]))
+        if name == b"EXPIRE":
+            if self._get(command[1]) is None:
+                return b":0\r\n"
+            self.data[command[1]] = (self.data[command[1]][0], time.monotonic() + int(command[2]))
+            return b":1\r\n"
+        if name == b"DEL":
+            return b":%d\r\n" % sum(self.data.pop(key, None) is not None for key in command[1:])
+        if name == b"DBSIZE":
+            return b":%d\r\n" % sum(self._get(key) is not None for key in list(self.data))
+        if name == b"FLUSHDB":
+            self.data.clear()
+            return b"+OK\r\n"
+        if name in (b"EVAL", b"EVALSHA"):
+            return self._eval(name, command[1], command[3:3 + int(command[2])], command[3 + int(command[2]):])
+        return b"-ERR unknown command '%s'\r\n" % name
+
+    def _eval(self, name: bytes, script: bytes, keys: list, args: list) -> bytes:
+        if name == b"EVAL":
+            if script.decode() != REDIS_HIT_SCRIPT:
+                return b"-ERR only the rate limit script is supported\r\n"
+            self.scripts.add(hashlib.sha1(script).hexdigest())
+        elif script.decode() not in self.scripts:
+            return b"-NOSCRIPT No matching script. Please use EVAL.\r\n"
+
+        # REDIS_HIT_SCRIPT, run as one step like Redis does
+        current = int(self._get(keys[0]) or 0)
+        previous = int(self._get(keys[1]) or 0)
+        weight, cost, max_requests, ttl = float(args[0]), int(args[1]), int(args[2]), int(args[3])
+        allowed = previous * weight + current + cost <= max_requests
+        if allowed:
+            self._incr(keys[0], cost)
+            current += cost
+            self.data[keys[0]] = (self.data[keys[0]][0], time.monotonic() + ttl)
+        return b"*3\r\n:%d\r\n:%d\r\n:%d\r\n" % (previous, current, allowed)
+
+    @staticmethod
+    async def _read_command(reader: asyncio.StreamReader) -> list:
+        header = await reader.readuntil(b"\r\n")
+        if not header.startswith(b"*"):
+            raise ConnectionError(f"Unsupported request: {header!r}")
+        command = []
+        for _ in range(int(header[1:-2])):
+            length = int((await reader.readuntil(b"\r\n"))[1:-2])
+            command.append((await reader.readexactly(length + 2))[:-2])
+        return command
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                commands = [await self._read_command(reader)]
+                # Everything already received was pipelined: answer it in one round-trip
+                while reader._buffer:
+                    commands.append(await self._read_command(reader))
+                self.round_trips += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                writer.write(b"".join(self._execute(command) for command in commands))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -16,10 +16,11 @@ llm = ChatGoogleGenerativeAI(
 )
 
 # Create the agent using the summarization tool in tools/langchain_integration.py
+# (a structured chat agent, as the tool takes several arguments)
 agent = initialize_agent(
     tools=[summarization_tool],
     llm=llm,
-    agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+    agent=AgentType.STRUCTURED_CHAT_ZERO_SHOT_REACT_DESCRIPTION,
     verbose=True
 )
 
@@ -1,43 +1,61 @@
-import re
-import sys
-import json
+"""
+Clean Markdown files into plain text for the summarization API.
 
-def clean_markdown_for_json(file_path: str) -> str:
-    """
-    Reads a Markdown file and converts its content into a single-line,
-    plain text string suitable for embedding in a JSON payload.
-    """
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            text = f.read()
+Single file (prints JSON-escaped, single-line text to paste into a request):
+    python scripts/clean_markdown.py docs/examples/example_LLM_costs_overview.md
 
-        # 1. Remove Markdown tables by removing lines with pipe characters
-        lines = text.split('\n')
-        lines = [line for line in lines if '|' not in line]
-        text = '\n'.join(lines)
+Corpus (files, directories and globs; one /summarize request body per line):
+    python scripts/clean_markdown.py docs/examples "corpus/**/*.md" -o requests.jsonl --workers 8
+    python scripts/clean_markdown.py corpus/ --batch-size 50 -o batches.jsonl   # /summarize/batch bodies
 
-        # 2. Remove Markdown headings, list markers, blockquotes, and horizontal rules
-        text = re.sub(r'^(#+\s*|\*\s*|-\s*|>\s*|---|===)', '', text, flags=re.MULTILINE)
+Files are streamed line by line through the same normalization as the API
+(see src/summarization/normalize.py) in a process pool, and written in
+input order.
+"""
 
-        # 3. Remove image tags like ![alt](src)
-        text = re.sub(r'!\[.*?\]\(.*?\)', '', text)
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
 
-        # 4. Remove link tags like [text](url), keeping the text
-        text = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', text)
+# Allow running as `python scripts/clean_markdown.py` from any directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-        # 5. Remove bold/italic markers like **, *, __, _
-        text = re.sub(r'(\*\*|__|\*|_)', '', text)
+from src.summarization import LineNormalizer
 
-        # 6. Replace all newline, tab, and multiple spaces with a single space
-        text = re.sub(r'[\s\t\n\r]+', ' ', text)
+def clean_markdown_file(file_path: str, keep_tables: bool = False, deduplicate: bool = False) -> str:
+    """
+    Stream a Markdown file through the API's normalization.
 
-        # 7. Remove leading/trailing whitespace
-        text = text.strip()
+    Tables, headings, list markers, blockquotes, rules, images, link targets
+    and emphasis markers are removed, and repeated lines with `deduplicate`;
+    paragraphs stay separated by a blank line. The file is read line by
+    line, so memory does not grow with its size.
+    """
+    normalizer = LineNormalizer(deduplicate=deduplicate, drop_tables=not keep_tables)
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        return '\n'.join(normalizer.lines(f))
+
+def clean_markdown_for_json(file_path: str) -> str:
+    """
+    Reads a Markdown file and converts its content into a single-line,
+    plain text string suitable for embedding in a JSON payload.
+    """
+    try:
+        # 1. Strip the Markdown markup and drop tables,
+        # then join the remaining lines into a single line
+        text = ' '.join(clean_markdown_file(file_path).split())
 
-        # 8. NEW: Use json.dumps() to perfectly escape the string for JSON
+        # 2. Use json.dumps() to perfectly escape the string for JSON
         # Then remove the surrounding quotes that json.dumps() adds
         escaped_text = json.dumps(text)[1:-1]
-        
+
         return escaped_text
 
     except FileNotFoundError:
@@ -45,10 +63,148 @@ def clean_markdown_for_json(file_path: str) -> str:
     except Exception as e:
         return f"An error occurred: {e}"
 
+def iter_markdown_files(inputs: Iterable[str], pattern: str = '*.md') -> Iterator[str]:
+    """
+    Expand files, directories (searched recursively for `pattern`) and
+    glob patterns into file paths, each yielded once, in a stable order.
+    """
+    seen = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            paths = sorted(str(path) for path in Path(item).rglob(pattern) if path.is_file())
+        elif glob.has_magic(item):
+            paths = sorted(path for path in glob.glob(item, recursive=True) if os.path.isfile(path))
+        else:
+            paths = [item]
+        for path in paths:
+            if path not in seen:
+                seen.add(path)
+                yield path
+
+def clean_record(path: str, request_options: dict, keep_tables: bool = False, deduplicate: bool = False, include_source: bool = False) -> Tuple[str, int, Optional[str], Optional[str]]:
+    """
+    Clean one file into an NDJSON line (runs in a worker process).
+
+    Returns:
+        The path, its size in bytes, the serialized request body (None if
+        nothing was left to summarize), and an error message (None on success)
+    """
+    try:
+        size = os.path.getsize(path)
+        text = clean_markdown_file(path, keep_tables=keep_tables, deduplicate=deduplicate)
+    except OSError as e:
+        return path, 0, None, str(e)
+    if not text:
+        return path, size, None, None
+    record = {'text': text, **request_options}
+    if include_source:
+        record['source'] = path
+    return path, size, json.dumps(record, ensure_ascii=False), None
+
+def clean_corpus(
+    paths: List[str],
+    output,
+    request_options: dict,
+    workers: int = os.cpu_count() or 1,
+    batch_size: int = 0,
+    keep_tables: bool = False,
+    deduplicate: bool = False,
+    include_source: bool = False,
+    chunksize: int = 16,
+) -> dict:
+    """
+    Clean many files in a process pool and write them to `output` as NDJSON.
+
+    Every line is a /summarize request body, or with `batch_size`, a
+    /summarize/batch body of up to that many items.
+
+    Returns:
+        Counts of files written, skipped (empty) and failed, bytes read and
+        the elapsed seconds
+    """
+    clean = partial(
+        clean_record, request_options=request_options, keep_tables=keep_tables, deduplicate=deduplicate, include_source=include_source
+    )
+    stats = {'files': 0, 'empty': 0, 'failed': 0, 'bytes': 0}
+    batch = []
+    start = time.perf_counter()
+
+    def flush():
+        output.write('{"items": [' + ', '.join(batch) + ']}\n')
+        batch.clear()
+
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        results = executor.map(clean, paths, chunksize=chunksize) if executor else map(clean, paths)
+        for path, size, line, error in results:
+            stats['bytes'] += size
+            if error is not None:
+                stats['failed'] += 1
+                print(f"Skipping {path}: {error}", file=sys.stderr)
+            elif line is None:
+                stats['empty'] += 1
+            elif batch_size:
+                stats['files'] += 1
+                batch.append(line)
+                if len(batch) >= batch_size:
+                    flush()
+            else:
+                stats['files'] += 1
+                output.write(line + '\n')
+        if batch:
+            flush()
+    finally:
+        if executor:
+            executor.shutdown()
+
+    stats['seconds'] = time.perf_counter() - start
+    return stats
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='+', help='Markdown files, directories or glob patterns')
+    parser.add_argument('-o', '--output', help='NDJSON output file (default: stdout)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+    parser.add_argument('--pattern', default='*.md', help='Files searched for in directories')
+    parser.add_argument('--length', choices=('short', 'medium', 'long'), default='short')
+    parser.add_argument('--style', choices=('bullet', 'paragraph', 'numbered'), default='bullet')
+    parser.add_argument('--focus')
+    parser.add_argument('--batch-size', type=int, default=0, help='Write /summarize/batch bodies of this many items')
+    parser.add_argument('--keep-tables', action='store_true', help='Keep table rows (compacted) instead of dropping them')
+    parser.add_argument('--deduplicate', action='store_true', help='Drop lines repeated further down a file (navigation, footers)')
+    parser.add_argument('--include-source', action='store_true', help='Add each file path as "source" (ignored by the API)')
+    args = parser.parse_args(argv)
+
+    # A single file without output options: print it as JSON-escaped text, as before
+    if len(args.inputs) == 1 and os.path.isfile(args.inputs[0]) and args.output is None and not args.batch_size:
+        print(clean_markdown_for_json(args.inputs[0]), end='')  # end='' prevents the trailing newline
+        return
+
+    paths = list(iter_markdown_files(args.inputs, args.pattern))
+    request_options = {'length': args.length, 'style': args.style, 'focus': args.focus}
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        stats = clean_corpus(
+            paths,
+            output,
+            request_options,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            keep_tables=args.keep_tables,
+            deduplicate=args.deduplicate,
+            include_source=args.include_source,
+        )
+    finally:
+        if args.output:
+            output.close()
+
+    seconds = max(stats['seconds'], 1e-9)
+    print(
+        f"Cleaned {stats['files']} files ({stats['empty']} empty, {stats['failed']} failed), "
+        f"{stats['bytes'] / 1e6:.1f} MB in {seconds:.2f}s: "
+        f"{stats['bytes'] / 1e6 / seconds:.1f} MB/s, {len(paths) / seconds:.0f} files/s",
+        file=sys.stderr,
+    )
+
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python scripts.clean_markdown.py <path_to_markdown_file>")
-    else:
-        input_file = sys.argv[1]
-        cleaned_text = clean_markdown_for_json(input_file)
-        print(cleaned_text, end='')  # end='' prevents the trailing newline
\ No newline at end of file
+    main()
@@ -0,0 +1,10 @@
+from .controller import (
+    PRIORITIES,
+    AdmissionController,
+    AdmissionRejectedError,
+    current_deadline,
+    current_priority,
+    request_context,
+)
+from .limits import AIMDLimit, ConcurrencyLimit, FixedLimit, GradientLimit, create_concurrency_limit
+from .middleware import AdmissionMiddleware, PriorityClassifier, parse_api_key_priorities
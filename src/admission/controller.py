@@ -0,0 +1,170 @@
+import asyncio
+import itertools
+import math
+from contextlib import contextmanager
+from contextvars import ContextVar
+from heapq import heapify, heappop, heappush
+from time import monotonic
+from typing import Optional
+
+from ..metrics import ADMISSION_REJECTIONS
+from .limits import ConcurrencyLimit
+
+# Priority classes, most important first
+PRIORITIES = ("high", "normal", "low")
+_RANKS = {priority: rank for rank, priority in enumerate(PRIORITIES)}
+
+_request_priority: ContextVar[str] = ContextVar("_request_priority", default="normal")
+# Deadline of the current request on the time.monotonic() clock
+_request_deadline: ContextVar[Optional[float]] = ContextVar("_request_deadline", default=None)
+
+
+@contextmanager
+def request_context(priority: str = "normal", deadline: Optional[float] = None):
+    """
+    Set the priority class and deadline of the request handled in this block.
+
+    Upstream calls made inside the block (including tasks started from it)
+    queue with this priority and give up at this deadline.
+
+    Args:
+        priority: One of PRIORITIES
+        deadline: time.monotonic() value after which the request is useless, or None
+    """
+    priority_token = _request_priority.set(priority)
+    deadline_token = _request_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _request_deadline.reset(deadline_token)
+        _request_priority.reset(priority_token)
+
+
+def current_priority() -> str:
+    return _request_priority.get()
+
+
+def current_deadline() -> Optional[float]:
+    return _request_deadline.get()
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a call is not admitted; `retry_after` is a hint in seconds."""
+
+    def __init__(self, message: str, reason: str, retry_after: int):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Admits calls up to a concurrency limit, queueing the rest by priority.
+
+    Waiting calls are admitted highest priority first, then in arrival
+    order. The queue holds at most `max_queue` calls: when it is full, a
+    new call is rejected at once, unless it outranks the lowest priority
+    call in the queue, which is then shed in its place. A call waits at most
+    `queue_timeout` seconds, and never past its deadline.
+
+    Every finished call is reported to the `limit`, so that an adaptive
+    limit can follow the upstream's latency.
+    """
+
+    def __init__(self, limit: ConcurrencyLimit, max_queue: Optional[int] = None, queue_timeout: float = 10.0):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        # Heap of [rank, sequence, future] entries
+        self._waiters = []
+        self._sequence = itertools.count()
+        # Moving average of how long calls hold their slot, for Retry-After
+        self._latency = None
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until the queue has likely drained, between 1 and 60."""
+        if self._latency is None:
+            return 1
+        rounds = (len(self._waiters) + 1) / max(1, self.limit.limit)
+        return max(1, min(60, math.ceil(self._latency * rounds)))
+
+    def _reject(self, priority: str, reason: str, message: str) -> AdmissionRejectedError:
+        ADMISSION_REJECTIONS.labels(priority, reason).inc()
+        return AdmissionRejectedError(message, reason, self.retry_after())
+
+    async def acquire(self, priority: str = "normal", deadline: Optional[float] = None) -> None:
+        """
+        Wait for a slot.
+
+        Raises:
+            AdmissionRejectedError: If the queue is full, the call was shed
+                for a more important one, or no slot freed up in time
+        """
+        rank = _RANKS[priority]
+        timeout = self.queue_timeout
+        if deadline is not None:
+            timeout = min(timeout, deadline - monotonic())
+            if timeout <= 0:
+                raise self._reject(priority, "deadline", "Request deadline expired before the upstream call")
+
+        if not self._waiters and self.in_flight < self.limit.limit:
+            self.in_flight += 1
+            return
+
+        if self.max_queue is not None and len(self._waiters) >= self.max_queue:
+            lowest = max(self._waiters, default=None)
+            if lowest is None or lowest[0] <= rank:
+                raise self._reject(priority, "queue_full", "Upstream queue is full")
+            self._remove(lowest)
+            lowest[2].set_exception(self._reject(PRIORITIES[lowest[0]], "shed", "Shed for a higher priority request"))
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [rank, next(self._sequence), future]
+        heappush(self._waiters, entry)
+        try:
+            async with asyncio.timeout(timeout):
+                await future
+        except BaseException as exc:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                # The slot was handed over just as we gave up: pass it on
+                self.in_flight -= 1
+                self._admit_waiters()
+            else:
+                self._remove(entry)
+            if isinstance(exc, TimeoutError):
+                raise self._reject(priority, "timeout", f"No upstream slot available after {timeout:.1f}s") from None
+            raise
+
+    def release(self, latency: Optional[float] = None, dropped: bool = False) -> None:
+        """
+        Free a slot.
+
+        Args:
+            latency: Seconds the call held the slot; None if it was
+                cancelled and says nothing about the upstream
+            dropped: Whether the call failed
+        """
+        if latency is not None:
+            self.limit.update(latency, self.in_flight, dropped)
+            self._latency = latency if self._latency is None else self._latency * 0.9 + latency * 0.1
+        self.in_flight -= 1
+        self._admit_waiters()
+
+    def _admit_waiters(self) -> None:
+        while self._waiters and self.in_flight < self.limit.limit:
+            _, _, future = heappop(self._waiters)
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+    def _remove(self, entry: list) -> None:
+        try:
+            self._waiters.remove(entry)
+        except ValueError:
+            return
+        heapify(self._waiters)
@@ -0,0 +1,149 @@
+import math
+
+
+class ConcurrencyLimit:
+    """
+    Interface of a concurrency limit for upstream calls.
+
+    The admission controller reports every finished call through `update`;
+    adaptive limits move `limit` up while the upstream keeps up and down
+    when its latency grows or calls fail.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+
+    def update(self, latency: float, in_flight: int, dropped: bool) -> None:
+        """
+        Record one finished call.
+
+        Args:
+            latency: Seconds the call held its slot
+            in_flight: Calls in flight when it finished (itself included)
+            dropped: Whether it failed or timed out
+        """
+
+
+class FixedLimit(ConcurrencyLimit):
+    """A constant limit."""
+
+
+class AIMDLimit(ConcurrencyLimit):
+    """
+    Additive increase, multiplicative decrease.
+
+    The limit grows by one after a successful call made while at least half
+    of it was in use, and is multiplied by `backoff_ratio` after a call that
+    failed or took longer than `latency_threshold` seconds.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: int = 1000,
+        backoff_ratio: float = 0.9,
+        latency_threshold: float = 10.0,
+    ):
+        super().__init__(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_threshold = latency_threshold
+
+    def update(self, latency: float, in_flight: int, dropped: bool) -> None:
+        if dropped or latency > self.latency_threshold:
+            self.limit = max(self.min_limit, int(self.limit * self.backoff_ratio))
+        elif in_flight * 2 >= self.limit:
+            self.limit = min(self.max_limit, self.limit + 1)
+
+
+class GradientLimit(ConcurrencyLimit):
+    """
+    Latency gradient limit.
+
+    Compares the recent call latency (a fast moving average) with the
+    lowest latency seen over the last `baseline_window` to `2 *
+    baseline_window` calls, which estimates what the upstream delivers when
+    it is not overloaded. While the recent latency stays within `tolerance`
+    times that baseline the limit grows by about sqrt(limit) per update;
+    above it the limit shrinks in proportion. Failed calls count as a
+    latency spike. The baseline window rolls over, so the limit follows
+    lasting changes of the upstream's speed.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: int = 1000,
+        tolerance: float = 1.5,
+        smoothing: float = 0.2,
+        short_window: int = 10,
+        baseline_window: int = 500,
+    ):
+        super().__init__(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.baseline_window = baseline_window
+        self._short_weight = 2 / (short_window + 1)
+        self._estimate = float(initial)
+        self.short_latency = None
+        # Minimum latency of the current and the previous baseline window
+        self._window_min = self._previous_min = float("inf")
+        self._window_samples = 0
+
+    @property
+    def baseline_latency(self) -> float:
+        return min(self._window_min, self._previous_min)
+
+    def _record_baseline(self, latency: float) -> None:
+        self._window_min = min(self._window_min, latency)
+        self._window_samples += 1
+        if self._window_samples >= self.baseline_window:
+            self._previous_min, self._window_min = self._window_min, float("inf")
+            self._window_samples = 0
+
+    def update(self, latency: float, in_flight: int, dropped: bool) -> None:
+        if dropped:
+            latency = max(latency, self.baseline_latency * self.tolerance * 2)
+        else:
+            self._record_baseline(latency)
+        if self.short_latency is None:
+            self.short_latency = latency
+        self.short_latency += (latency - self.short_latency) * self._short_weight
+
+        # Don't grow a limit that is not being used
+        if not dropped and in_flight * 2 < self.limit:
+            return
+
+        gradient = max(0.5, min(1.0, self.tolerance * self.baseline_latency / self.short_latency))
+        target = self._estimate * gradient + math.sqrt(self._estimate)
+        self._estimate = self._estimate * (1 - self.smoothing) + target * self.smoothing
+        self._estimate = max(self.min_limit, min(self.max_limit, self._estimate))
+        self.limit = int(self._estimate)
+
+
+def create_concurrency_limit(kind: str, initial: int, min_limit: int, max_limit: int, latency_threshold: float) -> ConcurrencyLimit:
+    """
+    Build the concurrency limit selected by configuration.
+
+    Args:
+        kind: fixed, aimd, or gradient
+        initial: Starting (or, for fixed, the only) limit
+        min_limit: Lowest limit an adaptive limit may reach
+        max_limit: Highest limit an adaptive limit may reach
+        latency_threshold: Call latency treated as overload by the aimd limit
+
+    Returns:
+        The limit
+    """
+    if kind == "fixed":
+        return FixedLimit(initial)
+    if kind == "aimd":
+        return AIMDLimit(initial, min_limit=min_limit, max_limit=max_limit, latency_threshold=latency_threshold)
+    if kind == "gradient":
+        return GradientLimit(initial, min_limit=min_limit, max_limit=max_limit)
+    raise ValueError(f"Unknown concurrency limit: {kind!r}")
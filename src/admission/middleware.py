@@ -0,0 +1,92 @@
+from time import monotonic
+from typing import Dict, Sequence
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .controller import PRIORITIES, request_context
+
+
+class PriorityClassifier:
+    """
+    Assign requests to a priority class.
+
+    API keys listed in `api_key_priorities` get their class; other requests
+    get `default`. The priority header can only lower a request's class, so
+    clients may mark background work as `low` but cannot promote themselves.
+    """
+
+    def __init__(
+        self,
+        api_key_priorities: Dict[str, str] = None,
+        default: str = "normal",
+        api_key_header: str = "X-API-Key",
+        priority_header: str = "X-Priority",
+    ):
+        for priority in [default, *(api_key_priorities or {}).values()]:
+            if priority not in PRIORITIES:
+                raise ValueError(f"Unknown priority class: {priority!r}")
+        self.api_key_priorities = api_key_priorities or {}
+        self.default = default
+        self.api_key_header = api_key_header
+        self.priority_header = priority_header
+
+    def classify(self, headers: Headers) -> str:
+        priority = self.api_key_priorities.get(headers.get(self.api_key_header, ""), self.default)
+        requested = headers.get(self.priority_header, "").strip().lower()
+        if requested in PRIORITIES and PRIORITIES.index(requested) > PRIORITIES.index(priority):
+            return requested
+        return priority
+
+
+def parse_api_key_priorities(value: str) -> Dict[str, str]:
+    """Parse "key1:high,key2:low" into {"key1": "high", "key2": "low"}."""
+    priorities = {}
+    for item in value.split(","):
+        key, _, priority = item.strip().rpartition(":")
+        if key:
+            priorities[key] = priority.strip().lower()
+    return priorities
+
+
+class AdmissionMiddleware:
+    """
+    Attach a priority class and a deadline to requests.
+
+    The deadline is `request_timeout` seconds after the request arrived, or
+    sooner if the client sends a shorter `X-Request-Timeout` (in seconds).
+    Upstream calls made while handling the request queue with its priority
+    and are abandoned once its deadline has passed, so that no upstream
+    capacity is spent on answers the client no longer waits for.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        classifier: PriorityClassifier,
+        request_timeout: float,
+        path_prefixes: Sequence[str] = ("/",),
+        timeout_header: str = "X-Request-Timeout",
+    ):
+        self.app = app
+        self.classifier = classifier
+        self.request_timeout = request_timeout
+        self.path_prefixes = tuple(path_prefixes)
+        self.timeout_header = timeout_header
+
+    def _timeout(self, headers: Headers) -> float:
+        try:
+            requested = float(headers.get(self.timeout_header, "inf"))
+        except ValueError:
+            return self.request_timeout
+        return min(self.request_timeout, max(0.0, requested))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        deadline = monotonic() + self._timeout(headers)
+        with request_context(self.classifier.classify(headers), deadline):
+            await self.app(scope, receive, send)
@@ -0,0 +1,10 @@
+from .singleflight import SingleFlight
+from .summary_cache import (
+    CacheBackend,
+    MemoryCacheBackend,
+    SQLiteCacheBackend,
+    SummaryCache,
+    create_cache_backend,
+)
+
+# NearDuplicateIndex lives in .near_duplicates (it needs NumPy) and is imported when the index is used
@@ -0,0 +1,300 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+_UINT32_MAX = np.uint64(0xFFFFFFFF)
+# Odd multiplier of the polynomial shingle hash; odd so that it is invertible mod 2**64
+_BASE = 0x100000001B3
+_BASE_INVERSE = pow(_BASE, -1, 2**64)
+_SPACE = ord(" ") + 1
+# Shingles hashed at once per MinHash block (bounds the temporary matrix)
+_BLOCK = 4096
+
+
+def _powers(base: int, count: int) -> np.ndarray:
+    """base**0 .. base**(count - 1), mod 2**64."""
+    powers = np.full(count, base, dtype=np.uint64)
+    powers[0] = 1
+    return np.cumprod(powers, dtype=np.uint64)
+
+
+def shingle_hashes(text: str, shingle_words: int) -> np.ndarray:
+    """
+    64-bit hashes of the distinct runs of `shingle_words` consecutive words
+    of the lowercased text.
+
+    Uses a polynomial hash with prefix sums, so that every shingle is hashed
+    with a handful of vectorized operations instead of a Python loop.
+    """
+    data = " ".join(text.lower().split()).encode("utf-8")
+    with np.errstate(over="ignore"):
+        chars = np.frombuffer(data, dtype=np.uint8).astype(np.uint64) + np.uint64(1)
+        # hash(chars[s:e]) = base**(e-1) * (prefix[e] - prefix[s]), where
+        # prefix[j] is the sum of chars[i] * base**-i for i < j
+        prefix = np.zeros(len(chars) + 1, dtype=np.uint64)
+        np.cumsum(chars * _powers(_BASE_INVERSE, len(chars)), dtype=np.uint64, out=prefix[1:])
+        spaces = np.flatnonzero(chars == _SPACE)
+        starts = np.concatenate(([0], spaces + 1))
+        ends = np.concatenate((spaces, [len(chars)]))
+        if len(starts) >= shingle_words:
+            starts = starts[: len(starts) - shingle_words + 1]
+            ends = ends[shingle_words - 1 :]
+        else:
+            starts, ends = starts[:1], ends[-1:]
+        hashes = (prefix[ends] - prefix[starts]) * _powers(_BASE, len(chars))[ends - 1]
+    return np.unique(hashes)
+
+
+class NearDuplicateMatch(NamedTuple):
+    # Key of the stored document, its summary, and the estimated Jaccard
+    # similarity of the two documents' shingles
+    key: str
+    summary: str
+    similarity: float
+
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index of recently summarized documents.
+
+    Documents are reduced to the set of their `shingle_words`-word shingles,
+    and each set to a MinHash signature of `num_perm` values; the share of
+    equal values estimates the Jaccard similarity of two documents. The
+    signature is split into `bands`: documents that agree on all values of
+    at least one band are candidates, and are checked against `threshold`
+    on the full signature. Only documents summarized with the same options
+    match.
+
+    Holds at most `max_entries` documents, evicting the least recently used
+    one (and documents older than `ttl_seconds`). Signatures and band hashes
+    live in preallocated arrays, and the band hashes are looked up in one
+    sorted array (new ones wait in a small dict until `pending_size`
+    documents were added), so memory stays at a few hundred bytes per
+    document. Documents shorter than `min_words` words are not indexed: a
+    few changed words already make them mean something else.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        max_entries: int = 10_000,
+        ttl_seconds: float = 3600.0,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_words: int = 5,
+        min_words: int = 50,
+        seed: int = 1,
+        pending_size: int = 1024,
+    ):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_words = shingle_words
+        self.min_words = min_words
+        self.seed = seed
+        self.pending_size = pending_size
+        self.hits = 0
+        self.evictions = 0
+
+        # Random multiply-shift hash functions standing in for permutations,
+        # and random odd multipliers hashing the values of each band
+        rng = np.random.default_rng(seed)
+        self._multipliers = rng.integers(0, 2**64, num_perm, dtype=np.uint64, endpoint=False) | np.uint64(1)
+        self._increments = rng.integers(0, 2**64, num_perm, dtype=np.uint64, endpoint=False)
+        self._band_multipliers = (
+            rng.integers(0, 2**64, (bands, num_perm // bands), dtype=np.uint64, endpoint=False) | np.uint64(1)
+        )
+
+        self._signatures = np.zeros((max_entries, num_perm), dtype=np.uint32)
+        self._options = np.zeros(max_entries, dtype=np.uint64)
+        # Band hashes of each slot (0 when the slot is free); a "cell" is
+        # the flat position slot * bands + band in this array
+        self._band_hashes = np.zeros((max_entries, bands), dtype=np.uint64)
+        # slot -> (key, summary, expires_at), in LRU order
+        self._entries = OrderedDict()
+        self._slots_by_key = {}
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+        # Band hashes (sorted) and their cells, plus the ones added since the
+        # last merge. Cells of evicted documents are dropped lazily: a cell
+        # only counts while it still holds the hash it was indexed under.
+        self._sorted_hashes = np.empty(0, dtype=np.uint64)
+        self._sorted_cells = np.empty(0, dtype=np.int64)
+        self._pending = {}
+        self._pending_documents = 0
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of a text, or None if it is too short to index."""
+        if len(text.split(None, self.min_words)) < self.min_words:
+            return None
+        hashes = shingle_hashes(text, self.shingle_words)
+        signature = np.full(self.num_perm, _UINT32_MAX, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for start in range(0, len(hashes), _BLOCK):
+                block = hashes[start : start + _BLOCK, None] * self._multipliers + self._increments
+                np.minimum(signature, (block >> np.uint64(32)).min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+    @staticmethod
+    def _hash_options(options: str) -> int:
+        return int.from_bytes(hashlib.blake2b(options.encode("utf-8"), digest_size=8).digest(), "little")
+
+    def _band_keys(self, signature: np.ndarray, options_hash: int) -> np.ndarray:
+        """One 64-bit hash per band of the signature and the options (never 0)."""
+        values = signature.reshape(self.bands, -1).astype(np.uint64)
+        with np.errstate(over="ignore"):
+            hashes = (values * self._band_multipliers).sum(axis=1, dtype=np.uint64) + np.uint64(options_hash)
+        return hashes | np.uint64(1)
+
+    def _candidate_slots(self, band_keys: np.ndarray) -> np.ndarray:
+        left = np.searchsorted(self._sorted_hashes, band_keys, side="left").tolist()
+        right = np.searchsorted(self._sorted_hashes, band_keys, side="right").tolist()
+        parts = [self._sorted_cells[start:end] for start, end in zip(left, right) if end > start]
+        for band_key in band_keys.tolist():
+            if band_key in self._pending:
+                parts.append(np.array(self._pending[band_key], dtype=np.int64))
+        if not parts:
+            return parts
+        cells = np.concatenate(parts)
+        # Keep cells that still hold the query's hash of the same band
+        cells = cells[self._band_hashes.reshape(-1)[cells] == band_keys[cells % self.bands]]
+        return np.unique(cells // self.bands)
+
+    def lookup(self, signature: np.ndarray, options: str) -> Optional[NearDuplicateMatch]:
+        """Return the most similar stored document at or above the threshold."""
+        options_hash = self._hash_options(options)
+        slots = self._candidate_slots(self._band_keys(signature, options_hash))
+        if not len(slots):
+            return None
+
+        slots = slots[self._options[slots] == np.uint64(options_hash)]
+        similarities = np.count_nonzero(self._signatures[slots] == signature, axis=1) / self.num_perm
+        now = time.time()
+        for index in np.argsort(-similarities):
+            similarity = float(similarities[index])
+            if similarity < self.threshold:
+                break
+            slot = int(slots[index])
+            key, summary, expires_at = self._entries[slot]
+            if expires_at <= now:
+                self._evict(slot)
+                continue
+            self._entries.move_to_end(slot)
+            self.hits += 1
+            return NearDuplicateMatch(key, summary, similarity)
+        return None
+
+    def add(self, key: str, signature: np.ndarray, options: str, summary: str) -> None:
+        """Index a summarized document, replacing an older one with the same key."""
+        self._add(key, signature, self._hash_options(options), summary, time.time() + self.ttl_seconds)
+
+    def _add(self, key: str, signature: np.ndarray, options_hash: int, summary: str, expires_at: float) -> None:
+        if key in self._slots_by_key:
+            self._evict(self._slots_by_key[key], counted=False)
+        if not self._free_slots:
+            self._evict(next(iter(self._entries)))
+        slot = self._free_slots.pop()
+        band_keys = self._band_keys(signature, options_hash)
+        self._signatures[slot] = signature
+        self._options[slot] = options_hash
+        self._band_hashes[slot] = band_keys
+        self._entries[slot] = (key, summary, expires_at)
+        self._slots_by_key[key] = slot
+
+        for cell, band_key in enumerate(band_keys.tolist(), start=slot * self.bands):
+            self._pending.setdefault(band_key, []).append(cell)
+        self._pending_documents += 1
+        if self._pending_documents >= self.pending_size:
+            self._merge_pending()
+
+    def _merge_pending(self) -> None:
+        """Move the pending band hashes into the sorted array, dropping stale cells."""
+        hashes, cells = self._sorted_hashes, self._sorted_cells
+        live = self._band_hashes.reshape(-1)[cells] == hashes
+        hashes, cells = hashes[live], cells[live]
+
+        pending_hashes = np.fromiter(
+            (band_key for band_key, band_cells in self._pending.items() for _ in band_cells), dtype=np.uint64
+        )
+        pending_cells = np.fromiter(
+            (cell for band_cells in self._pending.values() for cell in band_cells), dtype=np.int64
+        )
+        order = np.argsort(pending_hashes, kind="stable")
+        pending_hashes, pending_cells = pending_hashes[order], pending_cells[order]
+        positions = np.searchsorted(hashes, pending_hashes)
+        self._sorted_hashes = np.insert(hashes, positions, pending_hashes)
+        self._sorted_cells = np.insert(cells, positions, pending_cells)
+        self._pending = {}
+        self._pending_documents = 0
+
+    def _evict(self, slot: int, counted: bool = True) -> None:
+        key, _, _ = self._entries.pop(slot)
+        del self._slots_by_key[key]
+        self._band_hashes[slot] = 0
+        self._free_slots.append(slot)
+        if counted:
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "evictions": self.evictions,
+        }
+
+    def _parameters(self) -> dict:
+        return {"num_perm": self.num_perm, "bands": self.bands, "shingle_words": self.shingle_words, "seed": self.seed}
+
+    def save(self, path: str) -> None:
+        """Write the unexpired documents to an .npz file (replaced atomically)."""
+        now = time.time()
+        slots = [slot for slot, entry in self._entries.items() if entry[2] > now]
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            np.savez(
+                f,
+                signatures=self._signatures[slots],
+                options=self._options[slots],
+                entries=np.array(
+                    json.dumps({"parameters": self._parameters(), "entries": [self._entries[slot] for slot in slots]})
+                ),
+            )
+        os.replace(temporary, path)
+
+    def load(self, path: str) -> int:
+        """
+        Add the documents saved in `path`, least recently used first.
+
+        Returns:
+            The number of documents loaded; 0 if the file is missing or was
+            written with other hashing parameters
+        """
+        if not os.path.exists(path):
+            return 0
+        with np.load(path, allow_pickle=False) as data:
+            saved = json.loads(str(data["entries"]))
+            signatures = data["signatures"]
+            options = data["options"].tolist()
+        if saved["parameters"] != self._parameters():
+            return 0
+        now = time.time()
+        loaded = 0
+        for signature, options_hash, (key, summary, expires_at) in zip(signatures, options, saved["entries"]):
+            if expires_at > now:
+                self._add(key, signature, options_hash, summary, expires_at)
+                loaded += 1
+        return loaded
@@ -0,0 +1,72 @@
+import asyncio
+from time import monotonic
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key starts the call; callers arriving while it is
+    still running wait for the same result (or exception). Each caller waits
+    until its own deadline at most. A caller being cancelled or timing out
+    does not cancel the shared call unless it was the last one waiting for it.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(
+        self, key: str, call: Callable[[], Awaitable[T]], deadline: Optional[float] = None
+    ) -> Tuple[T, bool]:
+        """
+        Run `call()` once for all concurrent callers using `key`.
+
+        Args:
+            key: Identity of the call
+            call: Zero-argument callable returning the awaitable to run
+            deadline: time.monotonic() value after which this caller stops
+                waiting, or None
+
+        Returns:
+            A tuple of the result and whether it was shared with an earlier caller
+
+        Raises:
+            TimeoutError: If the deadline passed before the call finished
+        """
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+
+        flight.waiters += 1
+        try:
+            timeout = None if deadline is None else deadline - monotonic()
+            result = await asyncio.wait_for(asyncio.shield(flight.task), timeout)
+        except (asyncio.CancelledError, TimeoutError):
+            if not flight.task.done() and flight.waiters == 1:
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+        return result, shared
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
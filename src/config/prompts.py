@@ -32,4 +32,55 @@ def build_user_prompt(text: str, length: str, style: str, focus: str = None) ->
     if focus:
         prompt += f"\n\nSpecial emphasis: Focus particularly on aspects related to '{focus}'."
     
-    return prompt
\ No newline at end of file
+    return prompt
+
+def build_chunk_prompt(text: str, focus: str = None) -> str:
+    """
+    Constructs the prompt that summarizes one section of a long document
+    (the "map" step of chunked summarization).
+    
+    Args:
+        text: The section to summarize
+        focus: Optional topic to emphasize
+        
+    Returns:
+        Formatted prompt string
+    """
+    prompt = (
+        "[Task] The following text is one section of a longer document. "
+        "Summarize it in a concise paragraph, keeping all key facts, figures and names:\n\n"
+        f"{text}"
+    )
+    
+    if focus:
+        prompt += f"\n\nSpecial emphasis: Keep every detail related to '{focus}'."
+    
+    return prompt
+
+def build_reduce_prompt(summaries: list, length: str, style: str, focus: str = None) -> str:
+    """
+    Constructs the prompt that merges section summaries into the final summary
+    (the "reduce" step of chunked summarization).
+    
+    Args:
+        summaries: Summaries of consecutive sections, in document order
+        length: short, medium, or long
+        style: bullet, paragraph, or numbered
+        focus: Optional topic to emphasize
+        
+    Returns:
+        Formatted prompt string
+    """
+    sections = "\n\n".join(
+        f"Section {index}: {summary}" for index, summary in enumerate(summaries, start=1)
+    )
+    prompt = (
+        "[Task] The following are summaries of consecutive sections of one document. "
+        f"Combine them into a single {length} {style} summary of the whole document:\n\n"
+        f"{sections}"
+    )
+    
+    if focus:
+        prompt += f"\n\nSpecial emphasis: Focus particularly on aspects related to '{focus}'."
+    
+    return prompt
@@ -0,0 +1,170 @@
+"""
+Runtime settings for the summarization API.
+
+Every value can be overridden through environment variables (or a `.env` file).
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Logging: LOG_QUEUE writes log records from a background thread; the log
+# file can be JSON lines and rotated by size (bytes) or time ('midnight', 'H', ...).
+# LOG_REQUEST_SAMPLE_RATE is the fraction of successful requests whose
+# access log lines are written (failed requests are always logged)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_QUEUE = os.getenv("LOG_QUEUE", "true").lower() in ("1", "true", "yes")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", "0"))
+LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN") or None
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+LOG_REQUEST_SAMPLE_RATE = float(os.getenv("LOG_REQUEST_SAMPLE_RATE", "1.0"))
+
+# LLM provider: gemini, or stub (a local stand-in for offline runs and load tests)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+
+# Gemini model and endpoint (GEMINI_API_KEY is required by the gemini provider)
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL") or None
+
+# Stub provider: median latency of a call and its distribution (constant,
+# exponential or lognormal with spread LLM_STUB_LATENCY_SIGMA), words per
+# summary, delay between streamed words, share of failing calls, and the
+# seed of the random draws (unset: different on every run)
+LLM_STUB_LATENCY_SECONDS = float(os.getenv("LLM_STUB_LATENCY_SECONDS", "0.2"))
+LLM_STUB_LATENCY_DISTRIBUTION = os.getenv("LLM_STUB_LATENCY_DISTRIBUTION", "lognormal")
+LLM_STUB_LATENCY_SIGMA = float(os.getenv("LLM_STUB_LATENCY_SIGMA", "0.5"))
+LLM_STUB_OUTPUT_WORDS = int(os.getenv("LLM_STUB_OUTPUT_WORDS", "60"))
+LLM_STUB_CHUNK_DELAY_SECONDS = float(os.getenv("LLM_STUB_CHUNK_DELAY_SECONDS", "0.01"))
+LLM_STUB_ERROR_RATE = float(os.getenv("LLM_STUB_ERROR_RATE", "0"))
+LLM_STUB_SEED = int(os.getenv("LLM_STUB_SEED")) if os.getenv("LLM_STUB_SEED") else None
+
+# Startup: the LLM client is built after the app starts serving (/health
+# answers at once, /ready once it is built); this many upstream connections
+# are opened before /ready reports ready (0 skips it), for at most the timeout
+STARTUP_PREWARM_CONNECTIONS = int(os.getenv("STARTUP_PREWARM_CONNECTIONS", "1"))
+STARTUP_PREWARM_TIMEOUT_SECONDS = float(os.getenv("STARTUP_PREWARM_TIMEOUT_SECONDS", "5"))
+
+# Upstream concurrency: how many LLM calls may be in flight per worker,
+# how long a request may wait for a free slot, and the deadline of one call
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "10"))
+LLM_CALL_TIMEOUT_SECONDS = float(os.getenv("LLM_CALL_TIMEOUT_SECONDS", "60"))
+
+# Admission control in front of the LLM: the concurrency limit can adapt to
+# the upstream latency (fixed, aimd or gradient, starting at
+# LLM_MAX_CONCURRENCY and kept within the min/max bounds); the aimd limit
+# backs off when a call takes longer than ADMISSION_LATENCY_THRESHOLD_SECONDS.
+# At most ADMISSION_MAX_QUEUE calls wait; beyond that requests get a 503.
+ADMISSION_LIMIT = os.getenv("ADMISSION_LIMIT", "aimd")
+ADMISSION_MIN_CONCURRENCY = int(os.getenv("ADMISSION_MIN_CONCURRENCY", "4"))
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "256"))
+ADMISSION_LATENCY_THRESHOLD_SECONDS = float(os.getenv("ADMISSION_LATENCY_THRESHOLD_SECONDS", "30"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "256"))
+# Deadline of a request (clients can ask for less with X-Request-Timeout);
+# upstream calls still running past it are abandoned
+ADMISSION_REQUEST_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_REQUEST_TIMEOUT_SECONDS", "120"))
+# Priority classes (high, normal, low) of API keys sent in X-API-Key, as
+# "key1:high,key2:low"; other requests get the default class
+ADMISSION_API_KEY_PRIORITIES = os.getenv("ADMISSION_API_KEY_PRIORITIES", "")
+ADMISSION_DEFAULT_PRIORITY = os.getenv("ADMISSION_DEFAULT_PRIORITY", "normal")
+
+# Keep-alive connection pool of the Gemini client (HTTP/2 needs the `h2` package)
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "64"))
+UPSTREAM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", "32"))
+UPSTREAM_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY_SECONDS", "30"))
+UPSTREAM_HTTP2 = os.getenv("UPSTREAM_HTTP2", "true").lower() == "true"
+
+# Retries of failed LLM calls: attempts per call, backoff bounds, and the
+# share of calls that may be retried (caps the extra load during an outage)
+LLM_RETRY_MAX_ATTEMPTS = int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", "3"))
+LLM_RETRY_BASE_DELAY_SECONDS = float(os.getenv("LLM_RETRY_BASE_DELAY_SECONDS", "0.2"))
+LLM_RETRY_MAX_DELAY_SECONDS = float(os.getenv("LLM_RETRY_MAX_DELAY_SECONDS", "5"))
+LLM_RETRY_BUDGET_RATIO = float(os.getenv("LLM_RETRY_BUDGET_RATIO", "0.2"))
+# Hedging: start a second call once the first runs past this latency
+# percentile (0 disables; hedges are paid for in tokens)
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0"))
+LLM_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "0.5"))
+
+# Asynchronous summarization jobs (POST /summarize/jobs), queued in SQLite.
+# JOBS_WORKERS jobs run at once in each API process; with 0, run the workers
+# in a separate process instead (python -m src.jobs)
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "4"))
+JOBS_SQLITE_PATH = os.getenv("JOBS_SQLITE_PATH", "cache/jobs.sqlite3")
+# Jobs queued or running at once before new ones are rejected with a 503
+JOBS_MAX_PENDING = int(os.getenv("JOBS_MAX_PENDING", "10000"))
+# A job whose worker stops renewing its lease (e.g. crashed) runs again,
+# up to JOBS_MAX_ATTEMPTS times; transient failures are retried after a delay
+JOBS_LEASE_SECONDS = float(os.getenv("JOBS_LEASE_SECONDS", "60"))
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "3"))
+JOBS_RETRY_DELAY_SECONDS = float(os.getenv("JOBS_RETRY_DELAY_SECONDS", "5"))
+# Finished jobs are kept this long, then deleted
+JOBS_TTL_SECONDS = float(os.getenv("JOBS_TTL_SECONDS", "86400"))
+JOBS_CLEANUP_INTERVAL_SECONDS = float(os.getenv("JOBS_CLEANUP_INTERVAL_SECONDS", "60"))
+JOBS_POLL_INTERVAL_SECONDS = float(os.getenv("JOBS_POLL_INTERVAL_SECONDS", "1"))
+# Longest long-poll of GET /summarize/jobs/{id}?wait=...
+JOBS_MAX_WAIT_SECONDS = float(os.getenv("JOBS_MAX_WAIT_SECONDS", "30"))
+# Admission priority class of job LLM calls (jobs are background work)
+JOBS_PRIORITY = os.getenv("JOBS_PRIORITY", "low")
+# Webhook deliveries: timeout and attempts per delivery, and the secret
+# bodies are signed with (X-Webhook-Signature, unsigned when empty)
+JOBS_WEBHOOK_TIMEOUT_SECONDS = float(os.getenv("JOBS_WEBHOOK_TIMEOUT_SECONDS", "10"))
+JOBS_WEBHOOK_MAX_ATTEMPTS = int(os.getenv("JOBS_WEBHOOK_MAX_ATTEMPTS", "3"))
+JOBS_WEBHOOK_SECRET = os.getenv("JOBS_WEBHOOK_SECRET", "")
+# Hosts webhooks may be posted to (comma-separated). When empty, any host
+# that only resolves to public addresses: loopback, private, link-local and
+# other internal addresses are refused, so callers cannot reach them (SSRF)
+JOBS_WEBHOOK_ALLOWED_HOSTS = [host.strip() for host in os.getenv("JOBS_WEBHOOK_ALLOWED_HOSTS", "").split(",") if host.strip()]
+
+# Per-IP rate limiting
+RATE_LIMIT_MAX_REQUESTS = int(os.getenv("RATE_LIMIT_MAX_REQUESTS", "10"))
+RATE_LIMIT_WINDOW_SECONDS = int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "60"))
+# Maximum number of clients tracked at once (bounds the limiter's memory)
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))
+# Where the counts live: memory (per worker), sqlite (shared by all workers
+# on the host) or redis (shared by all replicas)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", "cache/rate_limits.sqlite3")
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+
+# Summary cache: memory, sqlite (shared by all workers on the host) or none
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "3600"))
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "cache/summaries.sqlite3")
+
+# Near-duplicate reuse: a request whose text is at least this similar
+# (estimated Jaccard similarity of its word shingles) to a recently
+# summarized one with the same options gets that summary. Texts shorter
+# than NEAR_DUPLICATE_MIN_WORDS are never matched; 0 entries disables it.
+# NEAR_DUPLICATE_PATH keeps the index across restarts (empty: memory only)
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.9"))
+NEAR_DUPLICATE_MAX_ENTRIES = int(os.getenv("NEAR_DUPLICATE_MAX_ENTRIES", "10000"))
+NEAR_DUPLICATE_TTL_SECONDS = float(os.getenv("NEAR_DUPLICATE_TTL_SECONDS", "3600"))
+NEAR_DUPLICATE_MIN_WORDS = int(os.getenv("NEAR_DUPLICATE_MIN_WORDS", "50"))
+NEAR_DUPLICATE_PATH = os.getenv("NEAR_DUPLICATE_PATH", "")
+
+# Request bodies: gzip and zstd bodies (Content-Encoding) are decompressed
+# while read; bodies over this size (64 MiB), compressed or not, get a 413
+REQUEST_MAX_BODY_BYTES = int(os.getenv("REQUEST_MAX_BODY_BYTES", "67108864"))
+
+# Input normalization before the LLM call: strip Markdown markup and, if
+# enabled, drop repeated lines (whitespace is always collapsed)
+INPUT_MARKDOWN_CLEANUP = os.getenv("INPUT_MARKDOWN_CLEANUP", "true").lower() == "true"
+INPUT_DEDUPLICATE_LINES = os.getenv("INPUT_DEDUPLICATE_LINES", "false").lower() == "true"
+# What to do with normalized inputs above CHUNKING_THRESHOLD_TOKENS: chunk
+# (map-reduce summarization) or truncate them to the threshold
+INPUT_OVER_BUDGET = os.getenv("INPUT_OVER_BUDGET", "chunk")
+
+# Map-reduce summarization of large documents: inputs estimated above the
+# threshold are split into chunks of CHUNK_TOKENS that are summarized in parallel
+CHUNKING_THRESHOLD_TOKENS = int(os.getenv("CHUNKING_THRESHOLD_TOKENS", "8000"))
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "2000"))
+CHUNK_MAX_PARALLEL = int(os.getenv("CHUNK_MAX_PARALLEL", "8"))
+
+# Batch summarization: maximum items per batch and items processed at once
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+BATCH_MAX_PARALLEL = int(os.getenv("BATCH_MAX_PARALLEL", "16"))
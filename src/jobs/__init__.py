@@ -0,0 +1,12 @@
+from .queue import (
+    FAILED,
+    FINISHED_STATES,
+    QUEUED,
+    RUNNING,
+    SUCCEEDED,
+    Job,
+    JobQueueFullError,
+    SQLiteJobQueue,
+)
+from .webhooks import SIGNATURE_HEADER, WebhookSender, WebhookURLError, sign_payload
+from .worker import JobError, JobWorkerPool, job_payload
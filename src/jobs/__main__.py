@@ -0,0 +1,41 @@
+"""
+Run summarization job workers outside the API processes.
+
+Start the API with JOBS_WORKERS=0 and run the jobs here instead, so that
+long summarizations do not compete with the API's own requests:
+
+    JOBS_WORKERS=8 python -m src.jobs
+
+Both must use the same JOBS_SQLITE_PATH. Stop with Ctrl+C or SIGTERM:
+running jobs are put back in the queue.
+"""
+
+import asyncio
+import signal
+
+from ..config import settings
+from ..main import check_settings, configure_logging, job_workers, llm, logger
+
+
+async def run() -> None:
+    configure_logging()
+    check_settings()
+    stopping = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopping.set)
+
+    await llm.start()
+    logger.info(f"🏗️ Job worker process started: {settings.JOBS_WORKERS} workers, queue {settings.JOBS_SQLITE_PATH}")
+    job_workers.start()
+    try:
+        await stopping.wait()
+    finally:
+        logger.info("🛑 Job worker process shutting down")
+        await job_workers.stop()
+        await llm.aclose()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,248 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+# Job states; succeeded and failed are final
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED_STATES = (SUCCEEDED, FAILED)
+
+
+class Job(NamedTuple):
+    id: str
+    status: str
+    request: dict
+    result: Optional[dict]
+    error: Optional[dict]
+    webhook_url: Optional[str]
+    attempts: int
+    created_at: float
+    updated_at: float
+    # Identifies the current claim; a worker whose lease was taken over by
+    # another one can no longer finish the job
+    lease: Optional[str]
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+
+class JobQueueFullError(Exception):
+    """Raised when enqueueing while too many jobs are waiting."""
+
+
+_COLUMNS = "id, status, request, result, error, webhook_url, attempts, created_at, updated_at, lease"
+
+
+def _row_to_job(row) -> Job:
+    job_id, status, request, result, error, webhook_url, attempts, created_at, updated_at, lease = row
+    return Job(
+        id=job_id,
+        status=status,
+        request=json.loads(request),
+        result=json.loads(result) if result is not None else None,
+        error=json.loads(error) if error is not None else None,
+        webhook_url=webhook_url,
+        attempts=attempts,
+        created_at=created_at,
+        updated_at=updated_at,
+        lease=lease,
+    )
+
+
+class SQLiteJobQueue:
+    """
+    Durable job queue in a SQLite file, shared by every process on the host.
+
+    Delivery is at least once: a worker claims a job with a lease of
+    `lease_seconds`, which it renews while the job runs. If the worker dies,
+    the lease runs out and the job is claimed again, until `max_attempts`
+    claims have been made. Finished jobs are kept for `ttl_seconds`.
+
+    All methods block on disk I/O; call them off the event loop.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        lease_seconds: float = 60.0,
+        max_attempts: int = 3,
+        ttl_seconds: float = 86400.0,
+        max_pending: Optional[int] = None,
+    ):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.ttl_seconds = ttl_seconds
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " request TEXT NOT NULL,"
+            " result TEXT,"
+            " error TEXT,"
+            " webhook_url TEXT,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            # Queued jobs: when they may run; running jobs: when their lease ends
+            " available_at REAL NOT NULL,"
+            " expires_at REAL,"
+            " lease TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_available_at ON jobs (status, available_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_expires_at ON jobs (expires_at)")
+
+    def enqueue(self, request: dict, webhook_url: Optional[str] = None) -> Job:
+        """
+        Add a job.
+
+        Raises:
+            JobQueueFullError: If `max_pending` jobs are already queued or running
+        """
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            if self.max_pending is not None and self._pending() >= self.max_pending:
+                raise JobQueueFullError(f"{self.max_pending} jobs are already pending")
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, request, webhook_url, created_at, updated_at, available_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(request), webhook_url, now, now, now),
+            )
+        return Job(job_id, QUEUED, request, None, None, webhook_url, 0, now, now, None)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a job, or None if it does not exist or has expired."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE id = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (job_id, time.time()),
+            ).fetchone()
+        return _row_to_job(row) if row is not None else None
+
+    def claim(self) -> Optional[Job]:
+        """
+        Claim the oldest runnable job: a queued one, or a running one whose
+        lease has run out (and that has attempts left; see `abandon`).
+
+        Returns:
+            The claimed job with a fresh lease, or None if there is none
+        """
+        now = time.time()
+        with self._lock:
+            # A single statement, so that concurrent claims never get the same job
+            row = self._conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ?, available_at = ?, lease = ?"
+                " WHERE id = (SELECT id FROM jobs WHERE status IN (?, ?) AND available_at <= ? AND attempts < ?"
+                "  ORDER BY available_at LIMIT 1)"
+                f" RETURNING {_COLUMNS}",
+                (RUNNING, now, now + self.lease_seconds, uuid.uuid4().hex, QUEUED, RUNNING, now, self.max_attempts),
+            ).fetchone()
+        return _row_to_job(row) if row is not None else None
+
+    def abandon(self) -> List[Job]:
+        """
+        Fail the running jobs whose lease ran out on their last attempt: their
+        workers kept dying.
+
+        Returns:
+            The jobs failed
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ?, available_at = ?, expires_at = ?, lease = NULL"
+                f" WHERE status = ? AND available_at <= ? AND attempts >= ? RETURNING {_COLUMNS}",
+                (
+                    FAILED,
+                    json.dumps({"status_code": 500, "detail": f"Job abandoned after {self.max_attempts} attempts"}),
+                    now,
+                    now,
+                    now + self.ttl_seconds,
+                    RUNNING,
+                    now,
+                    self.max_attempts,
+                ),
+            ).fetchall()
+        return [_row_to_job(row) for row in rows]
+
+    def _update_claimed(self, job: Job, assignments: str, params: tuple) -> Optional[Job]:
+        """Update a job still held under `job.lease`; None if the lease was lost."""
+        with self._lock:
+            row = self._conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE id = ? AND lease = ? RETURNING {_COLUMNS}",
+                (*params, time.time(), job.id, job.lease),
+            ).fetchone()
+        return _row_to_job(row) if row is not None else None
+
+    def renew(self, job: Job) -> bool:
+        """Extend the lease of a running job; False if the lease was lost."""
+        return self._update_claimed(job, "available_at = ?", (time.time() + self.lease_seconds,)) is not None
+
+    def complete(self, job: Job, result: dict) -> Optional[Job]:
+        """Mark a job succeeded with its result."""
+        return self._update_claimed(
+            job,
+            "status = ?, result = ?, expires_at = ?, lease = NULL",
+            (SUCCEEDED, json.dumps(result), time.time() + self.ttl_seconds),
+        )
+
+    def fail(self, job: Job, error: dict, retry_delay: Optional[float] = None) -> Optional[Job]:
+        """
+        Record a failed attempt.
+
+        Args:
+            job: The claimed job
+            error: Error reported to clients if the job is not retried
+            retry_delay: Seconds after which to run the job again, or None
+                to fail it for good (it also fails once out of attempts)
+        """
+        if retry_delay is not None and job.attempts < self.max_attempts:
+            return self._update_claimed(
+                job,
+                "status = ?, error = ?, available_at = ?, lease = NULL",
+                (QUEUED, json.dumps(error), time.time() + retry_delay),
+            )
+        return self._update_claimed(
+            job,
+            "status = ?, error = ?, expires_at = ?, lease = NULL",
+            (FAILED, json.dumps(error), time.time() + self.ttl_seconds),
+        )
+
+    def release(self, job: Job) -> Optional[Job]:
+        """Put a claimed job back in the queue without counting the attempt."""
+        return self._update_claimed(
+            job,
+            "status = ?, attempts = attempts - 1, available_at = ?, lease = NULL",
+            (QUEUED, time.time()),
+        )
+
+    def purge_expired(self) -> int:
+        """Delete finished jobs past their TTL, returning how many were deleted."""
+        with self._lock:
+            return self._conn.execute("DELETE FROM jobs WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def _pending(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)).fetchone()[0]
+
+    def count(self, status: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
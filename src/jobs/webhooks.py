@@ -0,0 +1,133 @@
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import random
+import socket
+from typing import Iterable, Optional
+
+import httpx
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+SIGNATURE_HEADER = "X-Webhook-Signature"
+
+
+class WebhookURLError(ValueError):
+    """Raised for webhook URLs the service refuses to post to."""
+
+
+def sign_payload(secret: str, body: bytes) -> str:
+    """HMAC-SHA256 signature of a webhook body, as sent in X-Webhook-Signature."""
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+class WebhookSender:
+    """
+    Posts job results to client-supplied URLs.
+
+    Deliveries that fail with a connection error, a timeout, `429` or a
+    `5xx` response are retried up to `max_attempts` times with jittered
+    exponential backoff. With a `secret`, every body is signed so receivers
+    can check it came from this service.
+
+    Only URLs that pass `check_url` are posted to: hosts in `allowed_hosts`
+    or, without an allowlist, hosts whose addresses are all public, so that
+    callers cannot make the service reach internal ones (SSRF).
+    """
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        secret: Optional[str] = None,
+        allowed_hosts: Optional[Iterable[str]] = None,
+    ):
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.secret = secret
+        self.allowed_hosts = {host.lower() for host in allowed_hosts or ()}
+        # Opened by start(), so that the sender can be started again after aclose()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def start(self) -> None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout, follow_redirects=False)
+
+    async def check_url(self, url: str) -> None:
+        """
+        Check that webhooks may be posted to `url`: an http(s) URL whose host
+        is in `allowed_hosts` or, without an allowlist, only resolves to
+        public addresses (not loopback, private, link-local or reserved).
+
+        Raises:
+            WebhookURLError: If the URL is refused
+        """
+        try:
+            parsed = httpx.URL(url)
+        except httpx.InvalidURL as exc:
+            raise WebhookURLError(f"Invalid webhook URL: {exc}") from None
+        if parsed.scheme not in ("http", "https") or not parsed.host:
+            raise WebhookURLError("Webhook URL must be an http or https URL with a host")
+        host = parsed.host.lower()
+        if self.allowed_hosts:
+            if host not in self.allowed_hosts:
+                raise WebhookURLError(f"Webhook host {host} is not allowed")
+            return
+
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        try:
+            addresses = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except OSError:
+            raise WebhookURLError(f"Webhook host {host} cannot be resolved") from None
+        for *_, sockaddr in addresses:
+            address = ipaddress.ip_address(sockaddr[0].split("%")[0])
+            if address.version == 6 and address.ipv4_mapped is not None:
+                address = address.ipv4_mapped
+            if not address.is_global or address.is_multicast:
+                raise WebhookURLError(f"Webhook host {host} resolves to a non-public address")
+
+    async def send(self, url: str, payload: dict) -> bool:
+        """
+        Deliver one payload.
+
+        Returns:
+            Whether the receiver accepted it with a 2xx response
+        """
+        # Checked again: the host may resolve elsewhere than when the job was queued
+        try:
+            await self.check_url(url)
+        except WebhookURLError as exc:
+            logger.warning("⚠️ Webhook delivery to %s refused: %s", url, exc)
+            return False
+        self.start()
+        body = json.dumps(payload).encode()
+        headers = {"Content-Type": "application/json"}
+        if self.secret:
+            headers[SIGNATURE_HEADER] = sign_payload(self.secret, body)
+
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = await self._client.post(url, content=body, headers=headers)
+            except httpx.HTTPError as exc:
+                outcome, retryable = f"{type(exc).__name__}: {exc}", True
+            else:
+                if response.is_success:
+                    return True
+                outcome = f"HTTP {response.status_code}"
+                retryable = response.status_code == 429 or response.status_code >= 500
+            if not retryable or attempt == self.max_attempts:
+                logger.warning("⚠️ Webhook delivery to %s failed after %s attempts: %s", url, attempt, outcome)
+                return False
+            await asyncio.sleep(random.uniform(0, self.base_delay * 2 ** (attempt - 1)))
+        return False
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
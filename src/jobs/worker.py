@@ -0,0 +1,216 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+
+from utils.logging_config import get_logger
+
+from .queue import FINISHED_STATES, QUEUED, RUNNING, Job, SQLiteJobQueue
+from .webhooks import WebhookSender
+
+logger = get_logger(__name__)
+
+
+class JobError(Exception):
+    """
+    Raised by a job handler when the job failed.
+
+    `status_code` and `detail` are reported to the client; a `retryable`
+    failure runs the job again later, while attempts remain.
+    """
+
+    def __init__(self, status_code: int, detail: str, retryable: bool = False):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retryable = retryable
+
+
+def job_payload(job: Job) -> dict:
+    """Public view of a job, as returned by the API and posted to webhooks."""
+    return {
+        "id": job.id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+        "result": job.result,
+        "error": job.error if job.status in FINISHED_STATES else None,
+    }
+
+
+class JobWorkerPool:
+    """
+    Runs queued jobs with `workers` concurrent asyncio workers.
+
+    Idle workers poll the queue every `poll_interval` seconds, and are woken
+    at once by `notify()` when a job is enqueued in this process. Leases of
+    running jobs are renewed in the background; on shutdown, running jobs
+    are put back in the queue. Finished jobs past their TTL are purged every
+    `cleanup_interval` seconds. Queue errors (e.g. a locked database) are
+    logged and the worker tries again after `poll_interval` seconds.
+
+    `counts` holds the number of queued and running jobs (of all processes)
+    as of the last `refresh_counts()`, for metrics.
+
+    With `workers=0` the pool runs nothing and only serves `wait()`, for API
+    processes whose jobs are run by a separate worker process.
+    """
+
+    def __init__(
+        self,
+        queue: SQLiteJobQueue,
+        handler: Callable[[dict], Awaitable[dict]],
+        workers: int,
+        poll_interval: float = 1.0,
+        retry_delay: float = 5.0,
+        cleanup_interval: float = 60.0,
+        webhooks: Optional[WebhookSender] = None,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.cleanup_interval = cleanup_interval
+        self.webhooks = webhooks
+        self.running = 0
+        self.counts = {QUEUED: 0, RUNNING: 0}
+        self._tasks = []
+        self._deliveries = set()
+        # Replaced after every set(), so each waiter sees the next change
+        self._job_enqueued = asyncio.Event()
+        self._job_finished = asyncio.Event()
+
+    def start(self) -> None:
+        if self.webhooks is not None:
+            self.webhooks.start()
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.ensure_future(self._clean_up()))
+
+    async def stop(self) -> None:
+        """Stop the workers, putting their running jobs back in the queue."""
+        tasks = self._tasks + list(self._deliveries)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        if self.webhooks is not None:
+            await self.webhooks.aclose()
+
+    async def enqueue(self, request: dict, webhook_url: Optional[str] = None) -> Job:
+        """Add a job and wake an idle worker."""
+        job = await asyncio.to_thread(self.queue.enqueue, request, webhook_url)
+        self._job_enqueued.set()
+        self._job_enqueued = asyncio.Event()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await asyncio.to_thread(self.queue.get, job_id)
+
+    async def refresh_counts(self) -> dict:
+        """Count queued and running jobs (off the event loop) into `counts`."""
+        try:
+            for status in self.counts:
+                self.counts[status] = await asyncio.to_thread(self.queue.count, status)
+        except Exception:
+            logger.exception("❌ Counting jobs failed, keeping the previous counts")
+        return self.counts
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """
+        Return a job once it has finished, or as it is after `timeout` seconds.
+
+        Jobs finished by this process are seen at once; jobs finished by
+        other processes within `poll_interval`.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            finished = self._job_finished
+            job = await self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job.finished or remaining <= 0:
+                return job
+            try:
+                await asyncio.wait_for(finished.wait(), min(remaining, self.poll_interval))
+            except TimeoutError:
+                pass
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                enqueued = self._job_enqueued
+                for abandoned in await asyncio.to_thread(self.queue.abandon):
+                    logger.warning("⚠️ Job %s abandoned after %s attempts", abandoned.id, abandoned.attempts)
+                    self._finished(abandoned)
+                job = await asyncio.to_thread(self.queue.claim)
+                if job is None:
+                    try:
+                        await asyncio.wait_for(enqueued.wait(), self.poll_interval)
+                    except TimeoutError:
+                        pass
+                    continue
+                await self._run(job)
+            except Exception:
+                # The job, if any, is claimed again once its lease expires
+                logger.exception("❌ Job worker error, retrying in %ss", self.poll_interval)
+                await asyncio.sleep(self.poll_interval)
+
+    async def _run(self, job: Job) -> None:
+        logger.info("🏗️ Job %s started (attempt %s)", job.id, job.attempts)
+        start_time = time.perf_counter()
+        self.running += 1
+        heartbeat = asyncio.ensure_future(self._renew_lease(job))
+        try:
+            result = await self.handler(job.request)
+        except asyncio.CancelledError:
+            await asyncio.to_thread(self.queue.release, job)
+            raise
+        except JobError as exc:
+            error = {"status_code": exc.status_code, "detail": exc.detail}
+            updated = await asyncio.to_thread(
+                self.queue.fail, job, error, self.retry_delay if exc.retryable else None
+            )
+        except Exception as exc:
+            logger.error("❌ Job %s failed: %s", job.id, exc, exc_info=True)
+            error = {"status_code": 500, "detail": "Internal server error"}
+            updated = await asyncio.to_thread(self.queue.fail, job, error, self.retry_delay)
+        else:
+            updated = await asyncio.to_thread(self.queue.complete, job, result)
+        finally:
+            heartbeat.cancel()
+            self.running -= 1
+
+        if updated is None:
+            logger.warning("⚠️ Job %s lost its lease to another worker, dropping its result", job.id)
+            return
+        logger.info("✅ Job %s %s - Time: %.3fs", job.id, updated.status, time.perf_counter() - start_time)
+        if updated.finished:
+            self._finished(updated)
+
+    def _finished(self, job: Job) -> None:
+        """Wake the long-polls waiting for a finished job and post it to its webhook."""
+        self._job_finished.set()
+        self._job_finished = asyncio.Event()
+        if job.webhook_url and self.webhooks is not None:
+            delivery = asyncio.ensure_future(self.webhooks.send(job.webhook_url, job_payload(job)))
+            self._deliveries.add(delivery)
+            delivery.add_done_callback(self._deliveries.discard)
+
+    async def _renew_lease(self, job: Job) -> None:
+        while True:
+            await asyncio.sleep(self.queue.lease_seconds / 3)
+            try:
+                if not await asyncio.to_thread(self.queue.renew, job):
+                    return
+            except Exception:
+                logger.exception("❌ Renewing the lease of job %s failed", job.id)
+
+    async def _clean_up(self) -> None:
+        while True:
+            try:
+                purged = await asyncio.to_thread(self.queue.purge_expired)
+                if purged:
+                    logger.info("🧹 Purged %s expired jobs", purged)
+            except Exception:
+                logger.exception("❌ Purging expired jobs failed")
+            await asyncio.sleep(self.cleanup_interval)
@@ -0,0 +1,7 @@
+from .pool import RequestDeadlineError, UpstreamPool, UpstreamBusyError, UpstreamTimeoutError
+from .provider import LazyProvider, LLMProvider, create_llm_provider
+from .resilience import Hedging, RetryBudget, RetryPolicy, is_retryable
+from .stub import StubProvider, StubUnavailableError
+from .transport import UpstreamTransport, http2_available, pooled_transport_factory, track_responses
+
+# GeminiProvider lives in .gemini and is imported on demand by create_llm_provider
@@ -0,0 +1,89 @@
+import asyncio
+from typing import AsyncIterator, List
+
+import anyio
+import httpx
+from google import genai
+from google.genai import types
+
+from .provider import LLMProvider
+from .transport import UpstreamTransport, track_responses
+
+# Endpoint used by google.genai when no base URL is configured
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com/"
+
+
+async def _close_responses(responses: List[httpx.Response]) -> None:
+    # Shielded: this also runs while the caller is being cancelled
+    with anyio.CancelScope(shield=True):
+        for response in responses:
+            await response.aclose()
+
+
+class GeminiProvider(LLMProvider):
+    """
+    Google Gemini through the `google.genai` async client.
+
+    The client runs on an `UpstreamTransport` (a pooled httpx transport
+    instead of one aiohttp session per call), whose streamed responses can
+    be closed when a stream is abandoned.
+    """
+
+    name = "Gemini"
+
+    def __init__(self, api_key: str, model: str, base_url: str = None, transport: httpx.AsyncBaseTransport = None):
+        super().__init__(model)
+        self.base_url = base_url or DEFAULT_BASE_URL
+        self.transport = transport if transport is not None else UpstreamTransport()
+        self.client = genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(
+                base_url=base_url,
+                async_client_args={"transport": self.transport},
+            ),
+        )
+
+    async def generate(self, prompt: str, system_instruction: str) -> str:
+        response = await self.client.aio.models.generate_content(
+            model=self.model,
+            config=types.GenerateContentConfig(system_instruction=system_instruction),
+            contents=prompt,
+        )
+        return response.text.strip()
+
+    async def stream(self, prompt: str, system_instruction: str) -> AsyncIterator[str]:
+        responses = []
+        try:
+            chunks = await track_responses(
+                lambda: self.client.aio.models.generate_content_stream(
+                    model=self.model,
+                    config=types.GenerateContentConfig(system_instruction=system_instruction),
+                    contents=prompt,
+                ),
+                responses,
+            )
+        except BaseException:
+            await _close_responses(responses)
+            raise
+        return self._fragments(chunks, responses)
+
+    async def _fragments(self, chunks, responses: List[httpx.Response]) -> AsyncIterator[str]:
+        try:
+            async for chunk in chunks:
+                if chunk.text:
+                    yield chunk.text
+        finally:
+            # Drop the upstream connection if the stream was abandoned early
+            await _close_responses(responses)
+
+    async def prewarm(self, connections: int = 1) -> None:
+        # Concurrent requests, so that HTTP/1.1 opens one connection each; the
+        # endpoint root answers with an error, but the connections stay pooled
+        async def connect():
+            response = await self.transport.handle_async_request(httpx.Request("HEAD", self.base_url))
+            await response.aclose()
+
+        await asyncio.gather(*(connect() for _ in range(connections)))
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
@@ -0,0 +1,229 @@
+import asyncio
+from contextlib import asynccontextmanager
+from time import monotonic, perf_counter
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+from ..admission import (
+    AdmissionController,
+    AdmissionRejectedError,
+    ConcurrencyLimit,
+    FixedLimit,
+    current_deadline,
+    current_priority,
+)
+from ..metrics import UPSTREAM_ERRORS, UPSTREAM_LATENCY, UPSTREAM_QUEUE_WAIT
+from .resilience import RetryPolicy
+
+T = TypeVar("T")
+
+# Marks an exhausted upstream iterator
+_END_OF_STREAM = object()
+
+
+class UpstreamBusyError(Exception):
+    """Raised when a call is not admitted; `retry_after` is a hint in seconds."""
+
+    def __init__(self, message: str, retry_after: Optional[int] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class UpstreamTimeoutError(Exception):
+    """Raised when an upstream call runs past its deadline."""
+
+
+class RequestDeadlineError(UpstreamTimeoutError):
+    """Raised when the request deadline, not `call_timeout`, cut an upstream call short."""
+
+
+class UpstreamPool:
+    """
+    Bounds the number of concurrent upstream (LLM) calls made by one worker.
+
+    Callers wait at most `queue_timeout` seconds for a free slot and each call
+    is cancelled once it runs longer than `call_timeout` seconds. With a
+    `retry` policy, failed calls are retried (and slow ones hedged) within
+    that same deadline and slot. Queue waits, call durations and failures
+    are recorded in the upstream metrics.
+
+    Slots are handed out by an `AdmissionController`: at most
+    `max_concurrency` calls run at once, unless an adaptive `limit` is
+    given, and at most `max_queue` wait, by the priority class of the
+    current request (see `admission.request_context`). Calls never wait or
+    run past the current request's deadline; calls cut short by that
+    deadline are not reported to the limit, so clients with short deadlines
+    cannot shrink it for everyone.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        queue_timeout: float,
+        call_timeout: float,
+        retry: RetryPolicy = None,
+        limit: ConcurrencyLimit = None,
+        max_queue: Optional[int] = None,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.call_timeout = call_timeout
+        self.retry = retry
+        self.admission = AdmissionController(
+            limit if limit is not None else FixedLimit(max_concurrency),
+            max_queue=max_queue,
+            queue_timeout=queue_timeout,
+        )
+
+    @property
+    def in_flight(self) -> int:
+        return self.admission.in_flight
+
+    @property
+    def waiting(self) -> int:
+        return self.admission.waiting
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Hold one upstream slot for the duration of the block.
+
+        Raises:
+            UpstreamBusyError: If the call is not admitted (see `AdmissionController`)
+        """
+        wait_start = perf_counter()
+        try:
+            await self.admission.acquire(current_priority(), current_deadline())
+        except AdmissionRejectedError as exc:
+            UPSTREAM_ERRORS.labels("busy").inc()
+            raise UpstreamBusyError(str(exc), retry_after=exc.retry_after) from None
+        UPSTREAM_QUEUE_WAIT.observe(perf_counter() - wait_start)
+
+        start = perf_counter()
+        # None while the outcome says nothing about the upstream (cancelled)
+        dropped = None
+        try:
+            yield
+            dropped = False
+        except RequestDeadlineError:
+            # The client's deadline cut the call short, not the upstream
+            raise
+        except Exception:
+            dropped = True
+            raise
+        finally:
+            latency = perf_counter() - start if dropped is not None else None
+            self.admission.release(latency, bool(dropped))
+
+    def _time_left(self) -> float:
+        """Seconds a call may run: `call_timeout`, cut short by the request deadline."""
+        deadline = current_deadline()
+        if deadline is None:
+            return self.call_timeout
+        return min(self.call_timeout, deadline - monotonic())
+
+    def _timeout_error(self, timeout: float) -> "UpstreamTimeoutError":
+        if timeout < self.call_timeout:
+            return RequestDeadlineError("Upstream call ran past the request deadline")
+        return UpstreamTimeoutError(f"Upstream call exceeded {self.call_timeout:.1f}s")
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `call()` once a slot is available.
+
+        Args:
+            call: Zero-argument callable returning the awaitable to run
+
+        Returns:
+            The result of the awaited call
+
+        Raises:
+            UpstreamBusyError: If the call is not admitted
+            UpstreamTimeoutError: If the call exceeds `call_timeout` or the request deadline
+        """
+        async with self.slot():
+            start = perf_counter()
+            timeout = self._time_left()
+            try:
+                attempts = self.retry.run(call) if self.retry is not None else call()
+                result = await asyncio.wait_for(attempts, timeout=max(0.0, timeout))
+            except asyncio.TimeoutError:
+                UPSTREAM_ERRORS.labels("timeout").inc()
+                raise self._timeout_error(timeout) from None
+            except Exception:
+                UPSTREAM_ERRORS.labels("error").inc()
+                raise
+            UPSTREAM_LATENCY.labels("generate").observe(perf_counter() - start)
+            return result
+
+    async def stream(self, call: Callable[[], Awaitable[AsyncIterator[T]]]) -> AsyncIterator[T]:
+        """
+        Iterate over the async iterator returned by `call()` while holding a slot.
+
+        The whole stream shares one `call_timeout` deadline (or the request
+        deadline, if that is sooner). Failures before
+        the first item are retried according to the `retry` policy; once an
+        item was yielded the stream is never restarted. Closing the returned
+        generator (e.g. when the client disconnects) closes the upstream
+        iterator and frees the slot.
+
+        Raises:
+            UpstreamBusyError: If the call is not admitted
+            UpstreamTimeoutError: If the stream exceeds `call_timeout` or the request deadline
+        """
+        async with self.slot():
+            start = perf_counter()
+            timeout = self._time_left()
+            deadline = asyncio.get_running_loop().time() + timeout
+            iterator = None
+            try:
+                iterator, item = await self._open_stream(call, deadline, timeout)
+                while item is not _END_OF_STREAM:
+                    yield item
+                    item = await self._next_item(iterator, deadline, timeout)
+                UPSTREAM_LATENCY.labels("stream").observe(perf_counter() - start)
+            except UpstreamTimeoutError:
+                UPSTREAM_ERRORS.labels("timeout").inc()
+                raise
+            except Exception:
+                UPSTREAM_ERRORS.labels("error").inc()
+                raise
+            finally:
+                aclose = getattr(iterator, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+
+    async def _next_item(self, iterator: AsyncIterator[T], deadline: float, timeout: float):
+        try:
+            return await self._before_deadline(iterator.__anext__(), deadline, timeout)
+        except StopAsyncIteration:
+            return _END_OF_STREAM
+
+    async def _open_stream(self, call: Callable[[], Awaitable[AsyncIterator[T]]], deadline: float, timeout: float):
+        """Open the upstream stream and read its first item, retrying failures."""
+        if self.retry is not None:
+            self.retry.budget.record_call()
+        attempt = 0
+        while True:
+            attempt += 1
+            iterator = None
+            try:
+                iterator = await self._before_deadline(call(), deadline, timeout)
+                return iterator, await self._next_item(iterator, deadline, timeout)
+            except Exception as exc:
+                aclose = getattr(iterator, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+                if self.retry is None or not self.retry.should_retry(exc, attempt):
+                    raise
+            await self._before_deadline(asyncio.sleep(self.retry.backoff(attempt)), deadline, timeout)
+
+    async def _before_deadline(self, awaitable: Awaitable[T], deadline: float, timeout: float) -> T:
+        # asyncio.timeout_at awaits in the current task, so a cancelled
+        # __anext__ never leaves the iterator running in the background
+        try:
+            async with asyncio.timeout_at(deadline):
+                return await awaitable
+        except TimeoutError:
+            raise self._timeout_error(timeout) from None
@@ -0,0 +1,170 @@
+import asyncio
+import threading
+from functools import partial
+from typing import AsyncIterator, Callable
+
+import httpx
+
+from ..summarization import estimate_tokens
+
+
+class LLMProvider:
+    """
+    Interface of a text generation backend.
+
+    `generate` returns the whole completion. `stream` is awaited to open the
+    upstream stream, so that failures before any output surface (and can be
+    retried) there, and returns an iterator of text fragments; closing the
+    iterator drops the upstream stream.
+    """
+
+    # Provider name shown in logs
+    name = "llm"
+
+    def __init__(self, model: str):
+        self.model = model
+
+    async def generate(self, prompt: str, system_instruction: str) -> str:
+        raise NotImplementedError
+
+    async def stream(self, prompt: str, system_instruction: str) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Estimate the number of tokens of `text` without calling the upstream.
+
+        Used on every request to route large inputs to chunking, so it must
+        be cheap; providers with a different tokenizer ratio override it.
+        """
+        return estimate_tokens(text)
+
+    async def prewarm(self, connections: int = 1) -> None:
+        """Open `connections` upstream connections ahead of the first call."""
+
+    async def aclose(self) -> None:
+        pass
+
+
+class LazyProvider(LLMProvider):
+    """
+    Provider built on first use, so that importing the app does not pay for
+    the provider's client library (google.genai takes about a second).
+
+    `start` builds it in a worker thread, off the event loop; calls made
+    before it finished wait for it.
+    """
+
+    def __init__(self, factory: Callable[[], LLMProvider], name: str, model: str):
+        super().__init__(model)
+        self.name = name
+        self.factory = factory
+        self.provider = None
+        self._lock = threading.Lock()
+
+    def _build(self) -> LLMProvider:
+        with self._lock:
+            if self.provider is None:
+                self.provider = self.factory()
+        return self.provider
+
+    async def start(self) -> LLMProvider:
+        """Build the provider (once) and return it."""
+        if self.provider is None:
+            await asyncio.to_thread(self._build)
+        return self.provider
+
+    async def generate(self, prompt: str, system_instruction: str) -> str:
+        provider = await self.start()
+        return await provider.generate(prompt, system_instruction)
+
+    async def stream(self, prompt: str, system_instruction: str) -> AsyncIterator[str]:
+        provider = await self.start()
+        return await provider.stream(prompt, system_instruction)
+
+    async def prewarm(self, connections: int = 1) -> None:
+        provider = await self.start()
+        await provider.prewarm(connections)
+
+    async def aclose(self) -> None:
+        if self.provider is not None:
+            await self.provider.aclose()
+
+
+# Display names of the providers, known before their module is imported
+PROVIDER_NAMES = {"gemini": "Gemini", "stub": "Stub"}
+
+
+def create_llm_provider(
+    kind: str,
+    model: str = None,
+    api_key: str = None,
+    base_url: str = None,
+    transport: httpx.AsyncBaseTransport = None,
+    stub_latency: float = 0.2,
+    stub_latency_distribution: str = "lognormal",
+    stub_latency_sigma: float = 0.5,
+    stub_output_words: int = 60,
+    stub_chunk_delay: float = 0.01,
+    stub_error_rate: float = 0.0,
+    stub_seed: int = None,
+    lazy: bool = False,
+) -> LLMProvider:
+    """
+    Build the LLM provider selected by configuration.
+
+    Args:
+        kind: gemini or stub
+        model: Model name (the stub defaults to "stub")
+        api_key: API key of the gemini provider
+        base_url: Override of the Gemini endpoint
+        transport: httpx transport of the Gemini client
+        stub_latency: Median latency of a stub call in seconds
+        stub_latency_distribution: constant, exponential or lognormal
+        stub_latency_sigma: Spread of the lognormal distribution
+        stub_output_words: Words per stub summary
+        stub_chunk_delay: Seconds between two streamed stub fragments
+        stub_error_rate: Share of stub calls failing with a retryable error
+        stub_seed: Seed of the stub's latency and error draws
+        lazy: Return a LazyProvider, which builds the provider on first use
+
+    Returns:
+        The provider
+    """
+    if kind not in PROVIDER_NAMES:
+        raise ValueError(f"Unknown LLM provider: {kind!r}")
+    if lazy:
+        factory = partial(
+            create_llm_provider,
+            kind,
+            model=model,
+            api_key=api_key,
+            base_url=base_url,
+            transport=transport,
+            stub_latency=stub_latency,
+            stub_latency_distribution=stub_latency_distribution,
+            stub_latency_sigma=stub_latency_sigma,
+            stub_output_words=stub_output_words,
+            stub_chunk_delay=stub_chunk_delay,
+            stub_error_rate=stub_error_rate,
+            stub_seed=stub_seed,
+        )
+        return LazyProvider(factory, name=PROVIDER_NAMES[kind], model=model or kind)
+    if kind == "gemini":
+        # Imported on demand: google.genai is slow to import and not needed by the stub
+        from .gemini import GeminiProvider
+
+        return GeminiProvider(api_key=api_key, model=model, base_url=base_url, transport=transport)
+    if kind == "stub":
+        from .stub import StubProvider
+
+        return StubProvider(
+            model=model or "stub",
+            latency=stub_latency,
+            latency_distribution=stub_latency_distribution,
+            latency_sigma=stub_latency_sigma,
+            output_words=stub_output_words,
+            chunk_delay=stub_chunk_delay,
+            error_rate=stub_error_rate,
+            seed=stub_seed,
+        )
@@ -0,0 +1,198 @@
+import asyncio
+import random
+from bisect import insort
+from collections import deque
+from time import monotonic, perf_counter
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+
+from ..metrics import UPSTREAM_HEDGES, UPSTREAM_RETRIES
+
+T = TypeVar("T")
+
+# Upstream statuses worth another attempt: timeouts, rate limits and server errors
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Whether a failed upstream call may succeed if attempted again."""
+    if isinstance(exc, httpx.TransportError):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS_CODES
+    # google.genai.errors.APIError carries the HTTP status as `code`
+    return getattr(exc, "code", None) in RETRYABLE_STATUS_CODES
+
+
+class RetryBudget:
+    """
+    Caps retries (and hedges) to a fraction of the calls made.
+
+    A token bucket: every call deposits `ratio` tokens, every retry spends
+    one, and `min_per_second` tokens trickle in so that a mostly idle worker
+    can still retry. When the upstream is down, retries stop once the
+    budget is spent instead of multiplying the load on it.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, max_tokens: float = 20.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._updated = monotonic()
+
+    def _refill(self, amount: float) -> None:
+        now = monotonic()
+        self._tokens = min(self.max_tokens, self._tokens + amount + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+    def record_call(self) -> None:
+        self._refill(self.ratio)
+
+    def try_spend(self) -> bool:
+        self._refill(0.0)
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class LatencyTracker:
+    """Percentile of the most recent `size` latencies."""
+
+    def __init__(self, size: int = 500, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._recent = deque(maxlen=size)
+        self._sorted = []
+
+    def record(self, latency: float) -> None:
+        if len(self._recent) == self._recent.maxlen:
+            self._sorted.pop(self._sorted.index(self._recent[0]))
+        self._recent.append(latency)
+        insort(self._sorted, latency)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """The latency below which `percentile`% of samples fall, or None without enough samples."""
+        if len(self._sorted) < self.min_samples:
+            return None
+        index = min(len(self._sorted) - 1, int(len(self._sorted) * percentile / 100))
+        return self._sorted[index]
+
+
+class Hedging:
+    """
+    Fire a second attempt when the first is slower than usual.
+
+    Once an attempt has run past the `percentile` of recent latencies (and
+    at least `min_delay` seconds), an identical attempt is started next to
+    it; whichever succeeds first wins and the other is cancelled. Hedges are
+    paid from the retry budget.
+    """
+
+    def __init__(self, percentile: float = 95, min_delay: float = 0.5):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.latencies = LatencyTracker()
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while latencies are unknown."""
+        latency = self.latencies.percentile(self.percentile)
+        if latency is None:
+            return None
+        return max(self.min_delay, latency)
+
+
+class RetryPolicy:
+    """
+    Retry failed upstream calls with jittered exponential backoff.
+
+    Only retryable failures (see `is_retryable`) are retried, at most
+    `max_attempts` attempts in total, and only while the retry budget
+    allows. Before the n-th retry the policy sleeps for a random delay
+    between 0 and min(`max_delay`, `base_delay` * 2**(n-1)) ("full jitter"),
+    which spreads out clients that failed together.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.2,
+        max_delay: float = 5.0,
+        budget: RetryBudget = None,
+        hedging: Hedging = None,
+    ):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget if budget is not None else RetryBudget()
+        self.hedging = hedging
+
+    def backoff(self, retry: int) -> float:
+        """Delay before the `retry`-th retry (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+    def should_retry(self, exc: BaseException, attempt: int) -> bool:
+        """Whether to retry after `attempt` (1-based) failed with `exc`, spending budget if so."""
+        if attempt >= self.max_attempts or not is_retryable(exc):
+            return False
+        if not self.budget.try_spend():
+            return False
+        UPSTREAM_RETRIES.inc()
+        return True
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await `call()`, retrying (and hedging) according to the policy.
+
+        Args:
+            call: Zero-argument callable returning the awaitable to run
+
+        Returns:
+            The result of the first successful attempt
+        """
+        self.budget.record_call()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await self._attempt(call)
+            except Exception as exc:
+                if not self.should_retry(exc, attempt):
+                    raise
+            await asyncio.sleep(self.backoff(attempt))
+
+    async def _timed(self, call: Callable[[], Awaitable[T]]) -> T:
+        start = perf_counter()
+        result = await call()
+        if self.hedging is not None:
+            self.hedging.latencies.record(perf_counter() - start)
+        return result
+
+    async def _attempt(self, call: Callable[[], Awaitable[T]]) -> T:
+        hedge_delay = self.hedging.delay() if self.hedging is not None else None
+        if hedge_delay is None:
+            return await self._timed(call)
+
+        tasks = [asyncio.ensure_future(self._timed(call))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+            if not done and self.budget.try_spend():
+                UPSTREAM_HEDGES.inc()
+                tasks.append(asyncio.ensure_future(self._timed(call)))
+
+            # The first success wins; fail only once every attempt failed
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                if not pending:
+                    raise tasks[0].exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
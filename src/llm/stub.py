@@ -0,0 +1,95 @@
+import asyncio
+import math
+import random
+import zlib
+from typing import AsyncIterator
+
+from .provider import LLMProvider
+
+LATENCY_DISTRIBUTIONS = ("constant", "exponential", "lognormal")
+
+# Words per bullet of a stub summary
+WORDS_PER_LINE = 12
+
+
+class StubUnavailableError(Exception):
+    """Injected failure of the stub provider; retryable like a 503 from Gemini."""
+
+    code = 503
+
+
+class StubProvider(LLMProvider):
+    """
+    Local stand-in for a model, for load tests and offline runs.
+
+    The summary is built from the prompt's own words, so identical prompts
+    always get identical summaries. Latency is drawn from a configurable
+    distribution around a median of `latency` seconds: `constant`,
+    `exponential` (same median, long tail) or `lognormal` (spread set by
+    `latency_sigma`). Streams wait for that latency, then send one word
+    every `chunk_delay` seconds.
+    """
+
+    name = "Stub"
+
+    def __init__(
+        self,
+        model: str = "stub",
+        latency: float = 0.2,
+        latency_distribution: str = "lognormal",
+        latency_sigma: float = 0.5,
+        output_words: int = 60,
+        chunk_delay: float = 0.01,
+        error_rate: float = 0.0,
+        seed: int = None,
+    ):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency_distribution!r}")
+        super().__init__(model)
+        self.latency = latency
+        self.latency_distribution = latency_distribution
+        self.latency_sigma = latency_sigma
+        self.output_words = output_words
+        self.chunk_delay = chunk_delay
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self.calls = 0
+
+    def sample_latency(self) -> float:
+        if self.latency <= 0 or self.latency_distribution == "constant":
+            return max(0.0, self.latency)
+        if self.latency_distribution == "exponential":
+            return self._random.expovariate(math.log(2) / self.latency)
+        return self.latency * math.exp(self._random.gauss(0, self.latency_sigma))
+
+    def summarize(self, prompt: str) -> str:
+        """The deterministic summary of `prompt`."""
+        words = prompt.split() or ["empty"]
+        offset = zlib.crc32(prompt.encode()) % len(words)
+        picked = [words[(offset + index) % len(words)] for index in range(self.output_words)]
+        return "\n".join(
+            "* " + " ".join(picked[start:start + WORDS_PER_LINE])
+            for start in range(0, len(picked), WORDS_PER_LINE)
+        )
+
+    async def _respond(self) -> None:
+        self.calls += 1
+        failed = self._random.random() < self.error_rate
+        await asyncio.sleep(self.sample_latency())
+        if failed:
+            raise StubUnavailableError("Stub provider failure (injected)")
+
+    async def generate(self, prompt: str, system_instruction: str) -> str:
+        await self._respond()
+        return self.summarize(prompt)
+
+    async def stream(self, prompt: str, system_instruction: str) -> AsyncIterator[str]:
+        await self._respond()
+        return self._fragments(self.summarize(prompt))
+
+    async def _fragments(self, summary: str) -> AsyncIterator[str]:
+        for index, word in enumerate(summary.split(" ")):
+            if index:
+                await asyncio.sleep(self.chunk_delay)
+                word = " " + word
+            yield word
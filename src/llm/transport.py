@@ -0,0 +1,99 @@
+import asyncio
+import importlib.util
+import weakref
+from contextvars import ContextVar
+from typing import Awaitable, Callable, List, Optional, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+
+_tracked_responses: ContextVar[Optional[List[httpx.Response]]] = ContextVar("_tracked_responses", default=None)
+
+
+def http2_available() -> bool:
+    """Whether httpx can speak HTTP/2 (needs the optional `h2` package)."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def pooled_transport_factory(
+    max_connections: int = 64,
+    max_keepalive_connections: int = 32,
+    keepalive_expiry: float = 30.0,
+    http2: bool = True,
+) -> Callable[[], httpx.AsyncHTTPTransport]:
+    """
+    Build a factory of keep-alive connection pools for `UpstreamTransport`.
+
+    Args:
+        max_connections: Maximum open connections per pool
+        max_keepalive_connections: Idle connections kept open for reuse
+        keepalive_expiry: Seconds an idle connection is kept open
+        http2: Multiplex requests over HTTP/2 connections; falls back to
+            HTTP/1.1 when `h2` is not installed
+
+    Returns:
+        A zero-argument callable creating one transport
+    """
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+    http2 = http2 and http2_available()
+    return lambda: httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+
+
+class UpstreamTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport used by the Gemini client.
+
+    Connections are pooled per event loop, so the same client keeps working
+    when it is driven from several loops (e.g. FastAPI's TestClient).
+
+    Responses opened inside `track_responses` are recorded. `google.genai`
+    does not close a streamed HTTP response when its iterator is abandoned
+    early, so the upstream generation keeps running; closing the recorded
+    responses drops the connection instead.
+    """
+
+    def __init__(self, transport_factory: Callable[[], httpx.AsyncBaseTransport] = httpx.AsyncHTTPTransport):
+        self.transport_factory = transport_factory
+        self._transports = weakref.WeakKeyDictionary()
+
+    def _transport(self) -> httpx.AsyncBaseTransport:
+        loop = asyncio.get_running_loop()
+        transport = self._transports.get(loop)
+        if transport is None:
+            transport = self._transports[loop] = self.transport_factory()
+        return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self._transport().handle_async_request(request)
+        responses = _tracked_responses.get()
+        if responses is not None:
+            responses.append(response)
+        return response
+
+    async def aclose(self) -> None:
+        transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+
+async def track_responses(call: Callable[[], Awaitable[T]], responses: List[httpx.Response]) -> T:
+    """
+    Await `call()` and append every HTTP response it opens to `responses`.
+
+    Args:
+        call: Zero-argument callable returning the awaitable to run
+        responses: List receiving the opened responses
+
+    Returns:
+        The result of the awaited call
+    """
+    token = _tracked_responses.set(responses)
+    try:
+        return await call()
+    finally:
+        _tracked_responses.reset(token)
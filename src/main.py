@@ -1,43 +1,255 @@
-import os
+import asyncio
+import email.message
+import threading
 import time
 from contextlib import asynccontextmanager
+from typing import Optional
 
-from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
-from google import genai
-from google.genai import types
+import orjson
+from fastapi import APIRouter, FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
 
-from .config.prompts import SYSTEM_INSTRUCTION, build_user_prompt
-from .schemas import RequestModel, ResponseModel
-from .throttling import RateLimiterMiddleware
+from .admission import (
+    AdmissionMiddleware,
+    PriorityClassifier,
+    create_concurrency_limit,
+    current_deadline,
+    current_priority,
+    parse_api_key_priorities,
+    request_context,
+)
+from .cache import SingleFlight, SummaryCache, create_cache_backend
+from .config import settings
+from .config.prompts import SYSTEM_INSTRUCTION, build_reduce_prompt, build_user_prompt
+from .jobs import QUEUED, RUNNING, JobError, JobQueueFullError, JobWorkerPool, SQLiteJobQueue, WebhookSender, WebhookURLError, job_payload
+from .llm import (
+    Hedging,
+    RetryBudget,
+    RetryPolicy,
+    UpstreamBusyError,
+    UpstreamPool,
+    UpstreamTimeoutError,
+    UpstreamTransport,
+    create_llm_provider,
+    http2_available,
+    pooled_transport_factory,
+)
+from .metrics import PROMPT_SIZE, REGISTRY, SUMMARY_SIZE, FunctionCounter, FunctionGauge, span
+from .middleware import MetricsMiddleware, ORJSONRoute, RequestBodyMiddleware, RequestLoggingMiddleware
+from .schemas import (
+    BatchItemError,
+    BatchItemResult,
+    BatchRequestModel,
+    BatchResponseModel,
+    JobModel,
+    JobRequestModel,
+    RequestModel,
+    ResponseModel,
+    SummaryLength,
+    SummaryStyle,
+)
+from .summarization import map_chunks, map_reduce_summarize, normalize_text, split_into_chunks, truncate_to_tokens
+from .throttling import RateLimiter, RateLimiterMiddleware, client_key, create_rate_limit_backend
 from utils.logging_config import setup_logging, get_logger
 
-# Set up logging for the FastAPI app
-app_log_file = setup_logging("fastapi_app", "api")
 logger = get_logger(__name__)
 
-load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    logger.error("❌ GEMINI_API_KEY not found in environment variables")
-    raise ValueError("GEMINI_API_KEY is required")
+def configure_logging():
+    """Set up logging for the FastAPI app (and the job worker process)."""
+    return setup_logging(
+        "fastapi_app",
+        "api",
+        use_queue=settings.LOG_QUEUE,
+        json_lines=settings.LOG_FORMAT == "json",
+        max_bytes=settings.LOG_MAX_BYTES,
+        rotate_when=settings.LOG_ROTATE_WHEN,
+        backup_count=settings.LOG_BACKUP_COUNT,
+        level=settings.LOG_LEVEL,
+    )
+
+def check_settings() -> None:
+    """
+    Reject configurations the app cannot run with.
+
+    Raises:
+        ValueError: If a required setting is missing or invalid
+    """
+    if settings.LLM_PROVIDER == "gemini" and not settings.GEMINI_API_KEY:
+        logger.error("❌ GEMINI_API_KEY not found in environment variables")
+        raise ValueError("GEMINI_API_KEY is required (or set LLM_PROVIDER=stub to run without Gemini)")
+
+    if settings.INPUT_OVER_BUDGET not in ("chunk", "truncate"):
+        raise ValueError(f"Unknown INPUT_OVER_BUDGET: {settings.INPUT_OVER_BUDGET!r}")
+
+# The Gemini client runs on a pooled keep-alive httpx transport (instead of one
+# aiohttp session per call) whose streamed responses can be closed on client
+# disconnect. It is built on first use (or by the startup warm-up), so that
+# importing the app does not import google.genai.
+llm = create_llm_provider(
+    settings.LLM_PROVIDER,
+    model=settings.GEMINI_MODEL if settings.LLM_PROVIDER == "gemini" else None,
+    api_key=settings.GEMINI_API_KEY,
+    base_url=settings.GEMINI_BASE_URL,
+    transport=UpstreamTransport(
+        pooled_transport_factory(
+            max_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.UPSTREAM_KEEPALIVE_EXPIRY_SECONDS,
+            http2=settings.UPSTREAM_HTTP2,
+        )
+    ),
+    stub_latency=settings.LLM_STUB_LATENCY_SECONDS,
+    stub_latency_distribution=settings.LLM_STUB_LATENCY_DISTRIBUTION,
+    stub_latency_sigma=settings.LLM_STUB_LATENCY_SIGMA,
+    stub_output_words=settings.LLM_STUB_OUTPUT_WORDS,
+    stub_chunk_delay=settings.LLM_STUB_CHUNK_DELAY_SECONDS,
+    stub_error_rate=settings.LLM_STUB_ERROR_RATE,
+    stub_seed=settings.LLM_STUB_SEED,
+    lazy=True,
+)
+
+# Bound the number of concurrent LLM calls made by this worker (adapting the
+# limit to the upstream latency, and shedding load once too many calls
+# wait), and retry (or hedge) the ones that fail transiently
+llm_pool = UpstreamPool(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    queue_timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+    call_timeout=settings.LLM_CALL_TIMEOUT_SECONDS,
+    limit=create_concurrency_limit(
+        settings.ADMISSION_LIMIT,
+        initial=settings.LLM_MAX_CONCURRENCY,
+        min_limit=settings.ADMISSION_MIN_CONCURRENCY,
+        max_limit=settings.ADMISSION_MAX_CONCURRENCY,
+        latency_threshold=settings.ADMISSION_LATENCY_THRESHOLD_SECONDS,
+    ),
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    retry=RetryPolicy(
+        max_attempts=settings.LLM_RETRY_MAX_ATTEMPTS,
+        base_delay=settings.LLM_RETRY_BASE_DELAY_SECONDS,
+        max_delay=settings.LLM_RETRY_MAX_DELAY_SECONDS,
+        budget=RetryBudget(ratio=settings.LLM_RETRY_BUDGET_RATIO),
+        hedging=(
+            Hedging(percentile=settings.LLM_HEDGE_PERCENTILE, min_delay=settings.LLM_HEDGE_MIN_DELAY_SECONDS)
+            if settings.LLM_HEDGE_PERCENTILE > 0
+            else None
+        ),
+    ),
+)
+
+# Cache summaries of identical requests
+summary_cache = SummaryCache(
+    create_cache_backend(
+        settings.CACHE_BACKEND,
+        max_entries=settings.CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.CACHE_TTL_SECONDS,
+        sqlite_path=settings.CACHE_SQLITE_PATH,
+    )
+)
+
+# Reuse the summaries of nearly identical recent requests (same article
+# with another footer, timestamp, ...), which the exact-match cache misses.
+# Built on first use: the index needs NumPy.
+near_duplicates = None
+# warm_up builds the index on a worker thread while requests may ask for it
+near_duplicates_lock = threading.Lock()
+
+def near_duplicate_index():
+    """Return the near-duplicate index, or None if it is disabled."""
+    global near_duplicates
+    if near_duplicates is None and settings.NEAR_DUPLICATE_MAX_ENTRIES > 0:
+        with near_duplicates_lock:
+            if near_duplicates is None:
+                from .cache.near_duplicates import NearDuplicateIndex
+
+                near_duplicates = NearDuplicateIndex(
+                    threshold=settings.NEAR_DUPLICATE_THRESHOLD,
+                    max_entries=settings.NEAR_DUPLICATE_MAX_ENTRIES,
+                    ttl_seconds=settings.NEAR_DUPLICATE_TTL_SECONDS,
+                    min_words=settings.NEAR_DUPLICATE_MIN_WORDS,
+                )
+    return near_duplicates
+
+# Share one LLM call between identical requests that are in flight together
+single_flight = SingleFlight()
+
+async def call_llm(prompt: str) -> str:
+    """Send one prompt to the LLM provider through the upstream pool and return the generated text."""
+    PROMPT_SIZE.observe(len(prompt))
+    return await llm_pool.run(lambda: llm.generate(prompt, SYSTEM_INSTRUCTION))
+
+def stream_llm(prompt: str):
+    """Stream one prompt through the LLM provider, yielding text fragments as they arrive."""
+    PROMPT_SIZE.observe(len(prompt))
+    return llm_pool.stream(lambda: llm.stream(prompt, SYSTEM_INSTRUCTION))
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+async def warm_up(app: FastAPI) -> None:
+    """
+    Build the LLM client and open its upstream connections, then mark the
+    app ready (/ready). Runs after startup, so that /health answers meanwhile.
+    """
+    start = time.perf_counter()
+    try:
+        await llm.start()
+    except Exception as e:
+        logger.error(f"❌ {llm.name} provider failed to initialize: {e}", exc_info=True)
+        return
+    logger.info(f"✅ {llm.name} provider initialized successfully (model {llm.model}) in {time.perf_counter() - start:.2f}s")
+    await asyncio.to_thread(near_duplicate_index)
 
-client = genai.Client(api_key=api_key)
-logger.info("✅ Gemini client initialized successfully")
+    if settings.STARTUP_PREWARM_CONNECTIONS > 0:
+        try:
+            await asyncio.wait_for(llm.prewarm(settings.STARTUP_PREWARM_CONNECTIONS), settings.STARTUP_PREWARM_TIMEOUT_SECONDS)
+            logger.info(f"🔥 Opened {settings.STARTUP_PREWARM_CONNECTIONS} upstream connections")
+        except Exception as e:
+            # Calls open their connections themselves; only the first ones are slower
+            logger.warning(f"⚠️ Upstream prewarm failed: {e!r}")
+
+    app.state.ready = True
+    logger.info(f"✅ Ready to serve summaries ({time.perf_counter() - start:.2f}s after startup)")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handle application startup and shutdown"""
     # Startup
     logger.info(f"🚀 FastAPI application starting up")
-    logger.info(f"📁 API logs saved to: {app_log_file}")
-    logger.info(f"🔧 Rate limiting: 10 requests per minute per IP")
+    logger.info(f"📁 API logs saved to: {app.state.log_file}")
+    logger.info(f"🔧 Rate limiting: {settings.RATE_LIMIT_MAX_REQUESTS} requests per {settings.RATE_LIMIT_WINDOW_SECONDS}s per IP ({settings.RATE_LIMIT_BACKEND} backend)")
+    logger.info(f"🔧 Summary cache: {settings.CACHE_BACKEND} (max {settings.CACHE_MAX_ENTRIES} entries, TTL {settings.CACHE_TTL_SECONDS}s)")
+    if settings.NEAR_DUPLICATE_MAX_ENTRIES > 0:
+        logger.info(f"🔧 Near-duplicate reuse: similarity >= {settings.NEAR_DUPLICATE_THRESHOLD:g} (max {settings.NEAR_DUPLICATE_MAX_ENTRIES} entries, TTL {settings.NEAR_DUPLICATE_TTL_SECONDS:g}s)")
+        if settings.NEAR_DUPLICATE_PATH:
+            loaded = await asyncio.to_thread(near_duplicate_index().load, settings.NEAR_DUPLICATE_PATH)
+            logger.info(f"📂 Loaded {loaded} near-duplicate index entries from {settings.NEAR_DUPLICATE_PATH}")
+    logger.info(f"🔧 Input normalization: Markdown cleanup {'on' if settings.INPUT_MARKDOWN_CLEANUP else 'off'}, duplicate lines {'dropped' if settings.INPUT_DEDUPLICATE_LINES else 'kept'}")
+    if settings.INPUT_OVER_BUDGET == "truncate":
+        logger.info(f"🔧 Inputs truncated to {settings.CHUNKING_THRESHOLD_TOKENS} tokens")
+    else:
+        logger.info(f"🔧 Chunked summarization above {settings.CHUNKING_THRESHOLD_TOKENS} tokens ({settings.CHUNK_TOKENS} tokens per chunk)")
+    logger.info(f"🔧 Upstream concurrency: {settings.LLM_MAX_CONCURRENCY} calls ({settings.ADMISSION_LIMIT} limit), queue of {settings.ADMISSION_MAX_QUEUE} for up to {settings.LLM_QUEUE_TIMEOUT_SECONDS}s, call timeout {settings.LLM_CALL_TIMEOUT_SECONDS}s, request deadline {settings.ADMISSION_REQUEST_TIMEOUT_SECONDS}s")
+    logger.info(f"🔧 LLM provider: {settings.LLM_PROVIDER} (model {llm.model})")
+    logger.info(f"🔧 Upstream connections: max {settings.UPSTREAM_MAX_CONNECTIONS} ({settings.UPSTREAM_MAX_KEEPALIVE_CONNECTIONS} kept alive for {settings.UPSTREAM_KEEPALIVE_EXPIRY_SECONDS}s), HTTP/2 {'on' if settings.UPSTREAM_HTTP2 and http2_available() else 'off'}")
+    logger.info(f"🔧 Upstream retries: {settings.LLM_RETRY_MAX_ATTEMPTS} attempts, budget {settings.LLM_RETRY_BUDGET_RATIO:.0%} of calls, hedging {'at p' + format(settings.LLM_HEDGE_PERCENTILE, 'g') if settings.LLM_HEDGE_PERCENTILE > 0 else 'off'}")
+    logger.info(f"🔧 Summarization jobs: {settings.JOBS_WORKERS} workers, queue {settings.JOBS_SQLITE_PATH}, up to {settings.JOBS_MAX_ATTEMPTS} attempts, kept {settings.JOBS_TTL_SECONDS:g}s")
+    job_workers.start()
+    app.state.ready = False
+    warm_up_task = asyncio.create_task(warm_up(app))
     
     yield
     
     # Shutdown
     logger.info("🛑 FastAPI application shutting down")
+    app.state.ready = False
+    warm_up_task.cancel()
+    await job_workers.stop()
+    if near_duplicates is not None and settings.NEAR_DUPLICATE_PATH:
+        await asyncio.to_thread(near_duplicates.save, settings.NEAR_DUPLICATE_PATH)
+        logger.info(f"💾 Saved {len(near_duplicates)} near-duplicate index entries to {settings.NEAR_DUPLICATE_PATH}")
+    await rate_limiter.close()
+    await llm.aclose()
 
 tags_metadata = [
     {
@@ -47,57 +259,287 @@ tags_metadata = [
             "description": "Gemini 2.5 Flash Model Docs",
             "url": "https://cloud.google.com/vertex-ai/generative-ai/docs/models/gemini/2-5-flash",
         },
-    }
+    },
+    {
+        "name": "cache",
+        "description": "Statistics of the summary cache.",
+    },
+    {
+        "name": "monitoring",
+        "description": "Prometheus metrics.",
+    },
 ]
 
-app = FastAPI(
-    lifespan=lifespan,
-    openapi_tags=tags_metadata,
-    title="FastAPI summarization Agent",
-    description="An API that summarizes text using Google Gemini 2.5 Flash with user-defined preferences.",
-    version="1.0.0",
-    contact={
-        "name": "Andreas Baschir",
-        "url": "https://www.linkedin.com/in/andreas-baschir-21b963236/",
-        "email": "andreas.baschir@stud.etti.upb.ro",
-    },
-    docs_url="/",
-    redoc_url=None,
+# Per-IP rate limiting: max 10 requests per minute per IP by default.
+# The limiter is shared with /summarize/batch, which charges one request per item.
+rate_limiter = RateLimiter(
+    max_requests=settings.RATE_LIMIT_MAX_REQUESTS,
+    window_seconds=settings.RATE_LIMIT_WINDOW_SECONDS,
+    max_clients=settings.RATE_LIMIT_MAX_CLIENTS,
+    backend=create_rate_limit_backend(
+        settings.RATE_LIMIT_BACKEND,
+        window_seconds=settings.RATE_LIMIT_WINDOW_SECONDS,
+        max_clients=settings.RATE_LIMIT_MAX_CLIENTS,
+        sqlite_path=settings.RATE_LIMIT_SQLITE_PATH,
+        redis_url=settings.RATE_LIMIT_REDIS_URL,
+    ),
 )
 
-# Apply rate limiting middleware: max 10 requests per minute per IP
-app.add_middleware(RateLimiterMiddleware, max_requests=10, window_seconds=60)
+# Endpoints, added to the app by create_app (JSON bodies are parsed with orjson)
+router = APIRouter(route_class=ORJSONRoute)
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Log all HTTP requests and responses with timing"""
-    start_time = time.time()
-    
-    # Log incoming request
-    logger.info(f"🔵 {request.method} {request.url.path} - Client: {request.client.host}")
-    
-    # Process request
-    response = await call_next(request)
-    
-    # Calculate processing time
-    process_time = time.time() - start_time
-    
-    # Log response with timing
-    status_emoji = "🟢" if response.status_code < 400 else "🔴"
-    logger.info(f"{status_emoji} {request.method} {request.url.path} - Status: {response.status_code} - Time: {process_time:.3f}s")
-    
-    return response
+FunctionCounter("summary_cache_hits_total", "Requests served from the summary cache.", lambda: summary_cache.hits, registry=REGISTRY)
+FunctionCounter("summary_cache_misses_total", "Summary cache lookups that missed.", lambda: summary_cache.misses, registry=REGISTRY)
+FunctionCounter("near_duplicate_hits_total", "Requests served the summary of a near-duplicate text.", lambda: near_duplicates.hits if near_duplicates is not None else 0, registry=REGISTRY)
+FunctionCounter("coalesced_requests_total", "Requests that joined an identical in-flight LLM call.", lambda: single_flight.coalesced, registry=REGISTRY)
+FunctionCounter("rate_limited_requests_total", "Requests rejected with 429 by the rate limiter.", lambda: rate_limiter.rejections, registry=REGISTRY)
+FunctionGauge("upstream_concurrency_limit", "Current limit of concurrent LLM calls.", lambda: llm_pool.admission.limit.limit, registry=REGISTRY)
+FunctionGauge("upstream_in_flight", "LLM calls in flight.", lambda: llm_pool.in_flight, registry=REGISTRY)
+FunctionGauge("upstream_queue_length", "LLM calls waiting for a slot.", lambda: llm_pool.waiting, registry=REGISTRY)
 
-@app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Log all unhandled exceptions"""
-    logger.error(f"🔴 Unhandled exception on {request.method} {request.url.path}: {str(exc)}", exc_info=True)
+    logger.error("🔴 Unhandled exception on %s %s: %s", request.method, request.url.path, exc, exc_info=True)
     return JSONResponse(
         status_code=500,
         content={"detail": "Internal server error"}
     )
 
-@app.post("/summarize", tags=["summarize"], response_model=ResponseModel)
+# Texts longer than this are normalized and hashed on a worker thread:
+# megabytes of text take seconds, which would stall every other request
+PREPARE_IN_THREAD_CHARS = 64 * 1024
+
+async def prepare_request(request: RequestModel):
+    """
+    Validate the request and normalize its text in place.
+
+    Inputs over the token budget are truncated to it if INPUT_OVER_BUDGET
+    is truncate (otherwise the caller summarizes them chunk by chunk).
+
+    Returns:
+        A tuple of the token count of the normalized text, the summary cache
+        key, and the response meta block
+    """
+    # Validate and normalize the input text
+    # (without copying the text, which may be megabytes long)
+    if not request.text or request.text.isspace():
+        logger.warning("⚠️ Empty text submitted for summarization")
+        raise HTTPException(status_code=400, detail="Text cannot be empty")
+
+    if len(request.text) > PREPARE_IN_THREAD_CHARS:
+        return await asyncio.to_thread(normalize_request, request)
+    return normalize_request(request)
+
+def normalize_request(request: RequestModel):
+    """Normalize (and maybe truncate) the text of a validated request, then hash it; see prepare_request."""
+    normalized = normalize_text(
+        request.text,
+        markdown=settings.INPUT_MARKDOWN_CLEANUP,
+        deduplicate=settings.INPUT_DEDUPLICATE_LINES,
+        count_tokens=llm.count_tokens,
+    )
+    if not normalized.text:
+        logger.warning("⚠️ Text without content submitted for summarization")
+        raise HTTPException(status_code=400, detail="Text contains nothing to summarize")
+    request.text = normalized.text
+    tokens = normalized.tokens
+
+    if normalized.saved_tokens:
+        logger.info("🧹 Text normalized - Tokens: %s -> %s, Duplicate lines: %s", normalized.input_tokens, tokens, normalized.duplicate_lines)
+
+    truncated = settings.INPUT_OVER_BUDGET == "truncate" and tokens > settings.CHUNKING_THRESHOLD_TOKENS
+    if truncated:
+        request.text = truncate_to_tokens(request.text, settings.CHUNKING_THRESHOLD_TOKENS)
+        tokens = llm.count_tokens(request.text)
+        logger.info("✂️ Large input - Truncated to %s tokens", tokens)
+
+    meta = {
+        "model": llm.model,
+        "length": request.length,
+        "style": request.style,
+        "focus": request.focus,
+        "cached": False,
+        "tokens": {"input": normalized.input_tokens, "prompt": tokens, "saved": normalized.saved_tokens},
+        "truncated": truncated,
+    }
+
+    cache_key = summary_cache.make_key(
+        text=request.text,
+        length=request.length,
+        style=request.style,
+        focus=request.focus,
+        model=llm.model,
+        system_instruction=SYSTEM_INSTRUCTION
+    )
+    return tokens, cache_key, meta
+
+def near_duplicate_options(request: RequestModel) -> str:
+    """Key of everything besides the text that influences a summary."""
+    return summary_cache.make_key(
+        text="",
+        length=request.length,
+        style=request.style,
+        focus=request.focus,
+        model=llm.model,
+        system_instruction=SYSTEM_INSTRUCTION
+    )
+
+async def find_near_duplicate(request: RequestModel, meta: dict):
+    """
+    Look for a recent summary of a nearly identical text with the same options.
+
+    On a match, `meta` reports the cache key of the reused summary
+    (`reused_from`) and the estimated similarity of the two texts.
+
+    Returns:
+        A tuple of the MinHash signature of the (normalized) request text,
+        None if it is too short to match or the index is disabled, and the
+        reused summary, None if there is no match
+    """
+    index = near_duplicate_index()
+    if index is None:
+        return None, None
+    # Hashing the shingles of a large text takes milliseconds
+    signature = await asyncio.to_thread(index.signature, request.text)
+    if signature is None:
+        return None, None
+    match = index.lookup(signature, near_duplicate_options(request))
+    if match is None:
+        return signature, None
+    logger.info("♻️ Near-duplicate hit - Similarity: %.3f, Output: %s chars", match.similarity, len(match.summary))
+    meta["cached"] = True
+    meta["reused_from"] = match.key
+    meta["similarity"] = round(match.similarity, 3)
+    return signature, match.summary
+
+def remember_near_duplicate(request: RequestModel, cache_key: str, signature, summary: str) -> None:
+    """Index a freshly generated summary for near-duplicate requests."""
+    if signature is not None and summary:
+        near_duplicates.add(cache_key, signature, near_duplicate_options(request), summary)
+
+def split_request_text(text: str) -> list:
+    """Split a large normalized input into chunks for map-reduce summarization."""
+    chunks = split_into_chunks(text, settings.CHUNK_TOKENS)
+    logger.info("✂️ Large input - Split into %s chunks of up to %s tokens", len(chunks), settings.CHUNK_TOKENS)
+    return chunks
+
+def upstream_http_error(exc: Exception) -> HTTPException:
+    """Log a failed LLM call and map it to the HTTP error returned to the client."""
+    if isinstance(exc, UpstreamBusyError):
+        logger.warning("⏳ LLM call rejected: %s", exc)
+        return HTTPException(
+            status_code=503,
+            detail="Summarization capacity exhausted, please retry later",
+            headers={"Retry-After": str(exc.retry_after or max(1, int(settings.LLM_QUEUE_TIMEOUT_SECONDS)))},
+        )
+    if isinstance(exc, (UpstreamTimeoutError, TimeoutError)):
+        logger.error("⌛ LLM call timed out: %s", str(exc) or "request deadline passed")
+        return HTTPException(status_code=504, detail="Timed out generating summary")
+    logger.error("❌ LLM call failed: %s", exc, exc_info=exc)
+    return HTTPException(status_code=500, detail=f"Error generating summary: {str(exc)}")
+
+async def summarize_text(request: RequestModel) -> ResponseModel:
+    """
+    Summarize one request: serve it from the cache, or call the LLM.
+
+    Raises:
+        HTTPException: If the request is invalid or the LLM call fails
+    """
+    # Log incoming summarization request
+    logger.info("📝 Summarization request - Text: %s chars, Length: %s, Style: %s, Focus: %s", len(request.text), request.length, request.style, request.focus)
+
+    with span("validate"):
+        tokens, cache_key, meta = await prepare_request(request)
+
+    # Serve identical requests from the cache
+    with span("cache_lookup"):
+        cached_summary = await summary_cache.get(cache_key)
+    if cached_summary is not None:
+        logger.info("💾 Cache hit - Output: %s chars", len(cached_summary))
+        meta["cached"] = True
+        SUMMARY_SIZE.observe(len(cached_summary))
+        return ResponseModel(summary=cached_summary, meta=meta)
+
+    # Then nearly identical ones
+    with span("near_duplicate_lookup"):
+        signature, reused_summary = await find_near_duplicate(request, meta)
+    if reused_summary is not None:
+        SUMMARY_SIZE.observe(len(reused_summary))
+        return ResponseModel(summary=reused_summary, meta=meta)
+
+    if tokens > settings.CHUNKING_THRESHOLD_TOKENS:
+        # Large documents are summarized chunk by chunk, then merged
+        with span("prompt"):
+            chunks = split_request_text(request.text)
+
+        def generate():
+            return map_reduce_summarize(
+                chunks,
+                length=request.length,
+                style=request.style,
+                focus=request.focus,
+                generate=call_llm,
+                chunk_tokens=settings.CHUNK_TOKENS,
+                max_parallel=settings.CHUNK_MAX_PARALLEL
+            )
+    else:
+        # Build the user prompt using the separated function
+        with span("prompt"):
+            user_prompt = build_user_prompt(
+                text=request.text,
+                length=request.length,
+                style=request.style,
+                focus=request.focus
+            )
+        
+        logger.info("🔧 Built user prompt - Length: %s chars", len(user_prompt))
+
+        def generate():
+            return call_llm(user_prompt)
+
+    # The shared call serves every identical request that joins it, so it must
+    # not inherit this request's deadline: it runs until the last caller stops
+    # waiting (each waits until its own deadline). Requests only join calls of
+    # their own priority class, which the call keeps.
+    priority, deadline = current_priority(), current_deadline()
+
+    async def shared_generate():
+        with request_context(priority):
+            return await generate()
+
+    try:
+        # Log API call attempt
+        logger.info("🤖 Calling %s API (%s)...", llm.name, llm.model)
+        
+        # Call the external API without blocking the event loop; identical
+        # requests already in flight share the pending call
+        api_start_time = time.perf_counter()
+        with span("upstream"):
+            summary, shared = await single_flight.do(f"{cache_key}:{priority}", shared_generate, deadline)
+        api_time = time.perf_counter() - api_start_time
+        
+        if shared:
+            logger.info("🔗 Joined identical in-flight LLM call - Time: %.3fs", api_time)
+        else:
+            logger.info("✅ LLM call successful - Time: %.3fs", api_time)
+        
+    except Exception as e:
+        raise upstream_http_error(e)
+
+    summary_length = len(summary)
+    SUMMARY_SIZE.observe(summary_length)
+    
+    logger.info("📄 Summary generated - Output: %s chars", summary_length)
+
+    if not shared:
+        with span("cache_store"):
+            await summary_cache.set(cache_key, summary)
+            remember_near_duplicate(request, cache_key, signature, summary)
+    
+    logger.info("✅ Summarization completed successfully")
+    return ResponseModel(summary=summary, meta=meta)
+
+@router.post("/summarize", tags=["summarize"], response_model=ResponseModel)
 async def summarize(request: RequestModel):
     """
     Summarizes a given block of text using the Gemini 2.5 Flash model.
@@ -116,67 +558,479 @@ async def summarize(request: RequestModel):
     ### Response Body
     - **summary** (str): The generated summary of the text.
     - **meta** (dict): Metadata about the request, including the model used,
-      length, style, and focus.
+      length, style, focus, whether the summary was served from the cache,
+      the token counts of the text before and after normalization
+      (`tokens`), and whether it was truncated to the token budget.
+      A summary reused from a nearly identical text also reports that
+      text's cache key (`reused_from`) and the `similarity` of the two.
+
+    The text is normalized before summarization: whitespace is collapsed,
+    Markdown markup (tables, link targets, emphasis, ...) and repeated
+    lines are removed.
+    """
+    result = await summarize_text(request)
+    with span("serialize"):
+        return Response(content=result.model_dump_json(), media_type="application/json")
+
+@router.post(
+    "/summarize/text",
+    tags=["summarize"],
+    response_model=ResponseModel,
+    openapi_extra={"requestBody": {"required": True, "content": {"text/plain": {"schema": {"type": "string"}}}}},
+)
+async def summarize_plain_text(http_request: Request, length: SummaryLength, style: SummaryStyle, focus: Optional[str] = None):
+    """
+    Summarizes a text sent as the raw request body (`text/plain`).
+
+    The same as `/summarize`, without JSON: the text needs no escaping and
+    is decoded straight from the body, which makes it the cheapest way to
+    send large documents. Like every request body, it may be compressed
+    (`Content-Encoding: gzip` or `zstd`) and may not exceed
+    `REQUEST_MAX_BODY_BYTES`.
+
+    ### Request Body
+    The text to summarize, in the charset of the Content-Type (UTF-8 by default).
+
+    ### Query Parameters
+    - **length** (str): `short`, `medium` or `long`.
+    - **style** (str): `bullet`, `paragraph` or `numbered`.
+    - **focus** (Optional[str]): An optional topic or keyword to emphasize.
+
+    ### Response Body
+    The same as `/summarize`.
+    """
+    content_type = email.message.Message()
+    content_type["content-type"] = http_request.headers.get("content-type", "text/plain")
+    charset = content_type.get_content_charset("utf-8")
+
+    with span("read_body"):
+        body = bytearray()
+        async for chunk in http_request.stream():
+            body += chunk
+        try:
+            text = body.decode(charset)
+        except (LookupError, UnicodeDecodeError):
+            raise HTTPException(status_code=400, detail=f"Request body is not valid {charset} text")
+        del body
+
+    request = RequestModel(text=text, length=length, style=style, focus=focus)
+    # Only the request holds the text now, so it is freed once normalized
+    del text
+    result = await summarize_text(request)
+    with span("serialize"):
+        return Response(content=result.model_dump_json(), media_type="application/json")
+
+@router.post(
+    "/summarize/stream",
+    tags=["summarize"],
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}, "description": "Server-sent events"}},
+)
+async def summarize_stream(request: RequestModel):
+    """
+    Streams a summary of the given text as server-sent events.
+
+    Takes the same request body as `/summarize`. The summary is forwarded
+    while Gemini generates it, so the first words arrive long before the
+    whole summary is ready. Large documents are first summarized chunk by
+    chunk; only the final merge step is streamed.
+
+    ### Events
+    - **summary**: `{"text": ...}` with the next fragment of the summary.
+    - **meta**: The same metadata block as `/summarize`, sent once at the end.
+    - **error**: `{"detail": ...}` if Gemini fails after streaming started.
+
+    If the client disconnects, the upstream Gemini stream is cancelled.
     """
 
     # Log incoming summarization request
-    logger.info(f"📝 Summarization request - Text: {len(request.text)} chars, Length: {request.length}, Style: {request.style}, Focus: {request.focus}")
+    logger.info("📝 Streaming summarization request - Text: %s chars, Length: %s, Style: %s, Focus: %s", len(request.text), request.length, request.style, request.focus)
 
-    # Validate and clean the input text
-    if not request.text.strip():
-        logger.warning("⚠️ Empty text submitted for summarization")
-        raise HTTPException(status_code=400, detail="Text cannot be empty")
+    with span("validate"):
+        tokens, cache_key, meta = await prepare_request(request)
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
 
-    original_length = len(request.text)
-    request.text = request.text.replace("\r", "").replace("\n", " ").replace("\t", " ")
-    cleaned_length = len(request.text)
-    
-    if original_length != cleaned_length:
-        logger.info(f"🧹 Text cleaned - Original: {original_length} chars, Cleaned: {cleaned_length} chars")
+    # Replay cached summaries as a single event
+    with span("cache_lookup"):
+        cached_summary = await summary_cache.get(cache_key)
+    if cached_summary is not None:
+        logger.info("💾 Cache hit - Output: %s chars", len(cached_summary))
+        meta["cached"] = True
+        SUMMARY_SIZE.observe(len(cached_summary))
 
-    # Build the user prompt using the separated function
-    user_prompt = build_user_prompt(
-        text=request.text,
-        length=request.length,
-        style=request.style,
-        focus=request.focus
-    )
-    
-    logger.info(f"🔧 Built user prompt - Length: {len(user_prompt)} chars")
+        async def replay():
+            yield sse_event("summary", {"text": cached_summary})
+            yield sse_event("meta", meta)
+
+        return StreamingResponse(replay(), media_type="text/event-stream", headers=headers)
+
+    with span("near_duplicate_lookup"):
+        signature, reused_summary = await find_near_duplicate(request, meta)
+    if reused_summary is not None:
+        SUMMARY_SIZE.observe(len(reused_summary))
+
+        async def replay_near_duplicate():
+            yield sse_event("summary", {"text": reused_summary})
+            yield sse_event("meta", meta)
+
+        return StreamingResponse(replay_near_duplicate(), media_type="text/event-stream", headers=headers)
 
     try:
-        # Log API call attempt
-        logger.info("🤖 Calling Gemini 2.5 Flash API...")
-        
-        # Call the external API
-        api_start_time = time.time()
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            config=types.GenerateContentConfig(
-                system_instruction=SYSTEM_INSTRUCTION
-            ),
-            contents=user_prompt
-        )
-        api_time = time.time() - api_start_time
-        
-        logger.info(f"✅ Gemini API call successful - Time: {api_time:.3f}s")
-        
+        if tokens > settings.CHUNKING_THRESHOLD_TOKENS:
+            # Summarize the chunks up front and stream only the merge step
+            partials = await map_chunks(
+                split_request_text(request.text),
+                focus=request.focus,
+                generate=call_llm,
+                chunk_tokens=settings.CHUNK_TOKENS,
+                max_parallel=settings.CHUNK_MAX_PARALLEL
+            )
+            user_prompt = build_reduce_prompt(partials, request.length, request.style, request.focus)
+        else:
+            user_prompt = build_user_prompt(
+                text=request.text,
+                length=request.length,
+                style=request.style,
+                focus=request.focus
+            )
+
+        logger.info("🤖 Streaming from %s API (%s)...", llm.name, llm.model)
+        api_start_time = time.perf_counter()
+        upstream = stream_llm(user_prompt)
+
+        # Wait for the first fragment so that failures before any output
+        # are still reported with a proper HTTP status code
+        with span("upstream_first_fragment"):
+            try:
+                first_text = await upstream.__anext__()
+            except StopAsyncIteration:
+                first_text = ""
+        logger.info("⚡ First summary fragment received - Time: %.3fs", time.perf_counter() - api_start_time)
+
     except Exception as e:
-        logger.error(f"❌ Gemini API call failed: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Error generating summary: {str(e)}")
+        raise upstream_http_error(e)
 
-    # Extract and return the response
-    summary = response.text.strip()
-    summary_length = len(summary)
-    
-    logger.info(f"📄 Summary generated - Output: {summary_length} chars")
-   
-    meta = {
-        "model": "gemini-2.5-flash",
-        "length": request.length,
-        "style": request.style,
-        "focus": request.focus
+    async def events():
+        fragments = [first_text]
+        try:
+            if first_text:
+                yield sse_event("summary", {"text": first_text})
+            async for text in upstream:
+                fragments.append(text)
+                yield sse_event("summary", {"text": text})
+        except asyncio.CancelledError:
+            logger.info("🔌 Client disconnected - Cancelling LLM stream")
+            raise
+        except Exception as e:
+            logger.error("❌ LLM stream failed: %s", e, exc_info=True)
+            yield sse_event("error", {"detail": f"Error generating summary: {str(e)}"})
+            return
+        finally:
+            await upstream.aclose()
+
+        summary = "".join(fragments).strip()
+        SUMMARY_SIZE.observe(len(summary))
+        logger.info("📄 Summary streamed - Output: %s chars - Time: %.3fs", len(summary), time.perf_counter() - api_start_time)
+        await summary_cache.set(cache_key, summary)
+        remember_near_duplicate(request, cache_key, signature, summary)
+        yield sse_event("meta", meta)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+
+
+async def summarize_batch_item(index: int, item: RequestModel, semaphore: asyncio.Semaphore) -> BatchItemResult:
+    """Summarize one batch item, turning failures into a per-item error."""
+    async with semaphore:
+        try:
+            response = await summarize_text(item)
+        except HTTPException as e:
+            return BatchItemResult(index=index, error=BatchItemError(status_code=e.status_code, detail=str(e.detail)))
+        except Exception as e:
+            logger.error("❌ Batch item %s failed: %s", index, e, exc_info=True)
+            return BatchItemResult(index=index, error=BatchItemError(status_code=500, detail="Internal server error"))
+    return BatchItemResult(index=index, summary=response.summary, meta=response.meta)
+
+@router.post(
+    "/summarize/batch",
+    tags=["summarize"],
+    response_model=BatchResponseModel,
+    responses={200: {"content": {"application/x-ndjson": {}}, "description": "Results, as JSON or NDJSON when `stream=true`"}},
+)
+async def summarize_batch(batch: BatchRequestModel, http_request: Request, stream: bool = False):
+    """
+    Summarizes several texts in one request.
+
+    Items are processed concurrently (at most `BATCH_MAX_PARALLEL` at a time)
+    and each one counts as one request against the per-IP rate limit. A
+    failing item does not fail the batch: its result carries an `error`
+    instead of a `summary`.
+
+    ### Request Body
+    - **items** (list): Up to `BATCH_MAX_ITEMS` request bodies of `/summarize`.
+
+    ### Query Parameters
+    - **stream** (bool): If true, results are streamed as NDJSON, one line per
+      item in completion order, instead of one JSON document in request order.
+
+    ### Response Body
+    - **results** (list): Per item, its `index` and either `summary` and
+      `meta`, or `error` with `status_code` and `detail`.
+    """
+    items = batch.items
+    logger.info("📦 Batch summarization request - Items: %s, Stream: %s", len(items), stream)
+
+    if len(items) > settings.BATCH_MAX_ITEMS:
+        logger.warning("⚠️ Batch too large - Items: %s, Max: %s", len(items), settings.BATCH_MAX_ITEMS)
+        raise HTTPException(status_code=413, detail=f"A batch may contain at most {settings.BATCH_MAX_ITEMS} items")
+
+    # The middleware already charged this HTTP request; charge the other items
+    if len(items) > 1:
+        client = client_key(http_request.scope)
+        rate_limit = await rate_limiter.hit(client, cost=len(items) - 1)
+        if not rate_limit.allowed:
+            logger.warning("🚫 Batch rejected by rate limit - Client: %s, Items: %s", client, len(items))
+            return rate_limiter.limit_exceeded_response(rate_limit)
+
+    semaphore = asyncio.Semaphore(settings.BATCH_MAX_PARALLEL)
+    batch_start_time = time.perf_counter()
+
+    if not stream:
+        results = await asyncio.gather(
+            *(summarize_batch_item(index, item, semaphore) for index, item in enumerate(items))
+        )
+        logger.info("✅ Batch completed - Items: %s, Time: %.3fs", len(items), time.perf_counter() - batch_start_time)
+        return BatchResponseModel(results=results)
+
+    async def lines():
+        tasks = [
+            asyncio.ensure_future(summarize_batch_item(index, item, semaphore))
+            for index, item in enumerate(items)
+        ]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                result = await next_result
+                yield result.model_dump_json() + "\n"
+            logger.info("✅ Batch streamed - Items: %s, Time: %.3fs", len(items), time.perf_counter() - batch_start_time)
+        finally:
+            # Stop the remaining items if the client went away
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+async def run_summarize_job(request: dict) -> dict:
+    """Summarize the request of one job, as background work."""
+    with request_context(settings.JOBS_PRIORITY):
+        try:
+            response = await summarize_text(RequestModel(**request))
+        except HTTPException as e:
+            # Capacity and upstream failures are worth another attempt
+            raise JobError(e.status_code, str(e.detail), retryable=e.status_code >= 500)
+    return response.model_dump()
+
+# Run summarization jobs from a durable queue shared by all processes on the host
+job_workers = JobWorkerPool(
+    SQLiteJobQueue(
+        settings.JOBS_SQLITE_PATH,
+        lease_seconds=settings.JOBS_LEASE_SECONDS,
+        max_attempts=settings.JOBS_MAX_ATTEMPTS,
+        ttl_seconds=settings.JOBS_TTL_SECONDS,
+        max_pending=settings.JOBS_MAX_PENDING,
+    ),
+    run_summarize_job,
+    workers=settings.JOBS_WORKERS,
+    poll_interval=settings.JOBS_POLL_INTERVAL_SECONDS,
+    retry_delay=settings.JOBS_RETRY_DELAY_SECONDS,
+    cleanup_interval=settings.JOBS_CLEANUP_INTERVAL_SECONDS,
+    webhooks=WebhookSender(
+        timeout=settings.JOBS_WEBHOOK_TIMEOUT_SECONDS,
+        max_attempts=settings.JOBS_WEBHOOK_MAX_ATTEMPTS,
+        secret=settings.JOBS_WEBHOOK_SECRET or None,
+        allowed_hosts=settings.JOBS_WEBHOOK_ALLOWED_HOSTS,
+    ),
+)
+# Counted by the /metrics handler before rendering: queue reads block on disk I/O
+FunctionGauge("summary_jobs_queued", "Summarization jobs waiting for a worker.", lambda: job_workers.counts[QUEUED], registry=REGISTRY)
+FunctionGauge("summary_jobs_running", "Summarization jobs being run by any worker.", lambda: job_workers.counts[RUNNING], registry=REGISTRY)
+
+@router.post("/summarize/jobs", tags=["summarize"], response_model=JobModel, status_code=202)
+async def create_summarize_job(request: JobRequestModel, response: Response):
+    """
+    Queues a summarization and returns its job ID at once.
+
+    Use this for long documents instead of holding a connection open while
+    `/summarize` works. The job is stored durably and run by a worker; poll
+    `GET /summarize/jobs/{id}` (with `wait` to long-poll) for the result, or
+    pass a `webhook_url` to have the finished job POSTed to you.
+
+    ### Request Body
+    The request body of `/summarize`, plus:
+    - **webhook_url** (Optional[str]): URL the finished job is POSTed to.
+      Internal hosts (loopback, private and link-local addresses) are
+      refused with `400`, and so are hosts outside
+      `JOBS_WEBHOOK_ALLOWED_HOSTS` when it is set.
+
+    ### Response Body
+    The job status (see `GET /summarize/jobs/{id}`), with a `Location` header.
+    """
+    # (without copying the text, which may be megabytes long)
+    if not request.text or request.text.isspace():
+        logger.warning("⚠️ Empty text submitted for summarization")
+        raise HTTPException(status_code=400, detail="Text cannot be empty")
+
+    webhook_url = str(request.webhook_url) if request.webhook_url else None
+    if webhook_url is not None:
+        try:
+            await job_workers.webhooks.check_url(webhook_url)
+        except WebhookURLError as e:
+            logger.warning("⚠️ Webhook URL refused: %s", e)
+            raise HTTPException(status_code=400, detail=str(e))
+    try:
+        job = await job_workers.enqueue(request.model_dump(exclude={"webhook_url"}), webhook_url)
+    except JobQueueFullError as e:
+        logger.warning("⏳ Job rejected: %s", e)
+        raise HTTPException(
+            status_code=503,
+            detail="Too many summarization jobs pending, please retry later",
+            headers={"Retry-After": str(max(1, int(settings.JOBS_RETRY_DELAY_SECONDS)))},
+        )
+
+    logger.info("📥 Job %s queued - Text: %s chars, Webhook: %s", job.id, len(request.text), webhook_url is not None)
+    response.headers["Location"] = f"/summarize/jobs/{job.id}"
+    return job_payload(job)
+
+@router.get("/summarize/jobs/{job_id}", tags=["summarize"], response_model=JobModel)
+async def get_summarize_job(job_id: str, wait: float = 0):
+    """
+    Returns the status of a summarization job.
+
+    ### Query Parameters
+    - **wait** (float): Seconds to wait for the job to finish before
+      answering (long-poll), up to `JOBS_MAX_WAIT_SECONDS`. Without it, the
+      current status is returned at once.
+
+    ### Response Body
+    - **id**, **status** (`queued`, `running`, `succeeded` or `failed`),
+      **attempts**, **created_at**, **updated_at**
+    - **result**: The `/summarize` response body, once the job succeeded.
+    - **error**: `status_code` and `detail`, if the job failed.
+
+    Finished jobs are deleted after `JOBS_TTL_SECONDS`; unknown and expired
+    jobs return 404.
+    """
+    wait = min(max(wait, 0.0), settings.JOBS_MAX_WAIT_SECONDS)
+    job = await job_workers.wait(job_id, wait) if wait > 0 else await job_workers.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_payload(job)
+
+@router.get("/cache/stats", tags=["cache"])
+async def cache_stats():
+    """Returns hit, miss, and eviction counters of the summary cache and the near-duplicate index."""
+    return {
+        **summary_cache.stats(),
+        "coalesced": single_flight.coalesced,
+        "near_duplicates": near_duplicates.stats() if near_duplicates is not None else None,
     }
-    
-    logger.info("✅ Summarization completed successfully")
-    return ResponseModel(summary=summary, meta=meta)
+
+@router.get("/metrics", tags=["monitoring"], response_class=Response)
+async def metrics():
+    """
+    Returns the service metrics in the Prometheus text format.
+
+    Includes latency histograms of requests, request stages, upstream LLM
+    calls and their queue wait, prompt and summary sizes, and counters of
+    cache hits, coalesced requests, rate-limited requests and upstream errors.
+    Not subject to the rate limit.
+    """
+    await job_workers.refresh_counts()
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@router.get("/health", tags=["monitoring"])
+async def health():
+    """
+    Liveness probe: answers as soon as the process serves HTTP.
+
+    Not subject to the rate limit.
+    """
+    return {"status": "ok"}
+
+@router.get("/ready", tags=["monitoring"], responses={503: {"description": "Still starting up, or shutting down"}})
+async def ready(request: Request):
+    """
+    Readiness probe: answers 200 once the LLM client is built and (with
+    `STARTUP_PREWARM_CONNECTIONS`) its upstream connections are open, and
+    503 before that and during shutdown. Route traffic to the instance only
+    once it is ready.
+
+    Not subject to the rate limit.
+    """
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"status": "starting", "provider": llm.provider is not None})
+    return {"status": "ready", "provider": True}
+
+def create_app() -> FastAPI:
+    """
+    Build the FastAPI application (`uvicorn --factory src.main:create_app`).
+
+    Only sets up logging and the middleware stack: the LLM client is built
+    by the lifespan, in the background, and /ready reports when it is done.
+
+    Raises:
+        ValueError: If the configuration is invalid (see check_settings)
+    """
+    log_file = configure_logging()
+    check_settings()
+
+    app = FastAPI(
+        lifespan=lifespan,
+        openapi_tags=tags_metadata,
+        title="FastAPI summarization Agent",
+        description="An API that summarizes text using Google Gemini 2.5 Flash with user-defined preferences.",
+        version="1.0.0",
+        contact={
+            "name": "Andreas Baschir",
+            "url": "https://www.linkedin.com/in/andreas-baschir-21b963236/",
+            "email": "andreas.baschir@stud.etti.upb.ro",
+        },
+        docs_url="/",
+        redoc_url=None,
+        default_response_class=ORJSONResponse,
+    )
+    app.state.log_file = log_file
+    app.state.ready = False
+    app.include_router(router)
+    app.add_exception_handler(Exception, global_exception_handler)
+
+    # Decompress gzip/zstd request bodies and reject oversized ones early
+    app.add_middleware(RequestBodyMiddleware, max_body_bytes=settings.REQUEST_MAX_BODY_BYTES)
+
+    # Apply rate limiting middleware (probes and metrics scrapes are exempt)
+    app.add_middleware(RateLimiterMiddleware, limiter=rate_limiter, exempt_paths=("/metrics", "/health", "/ready"))
+
+    # Give summarization requests a priority class and a deadline, which their
+    # upstream calls inherit (capacity protection, unlike the per-IP rate limit)
+    app.add_middleware(
+        AdmissionMiddleware,
+        classifier=PriorityClassifier(
+            api_key_priorities=parse_api_key_priorities(settings.ADMISSION_API_KEY_PRIORITIES),
+            default=settings.ADMISSION_DEFAULT_PRIORITY,
+        ),
+        request_timeout=settings.ADMISSION_REQUEST_TIMEOUT_SECONDS,
+        path_prefixes=("/summarize",),
+    )
+
+    # Log all HTTP requests and responses with timing (outermost, so 429s are logged too)
+    app.add_middleware(RequestLoggingMiddleware, logger=logger, sample_rate=settings.LOG_REQUEST_SAMPLE_RATE)
+
+    # Record request latency histograms for /metrics
+    app.add_middleware(MetricsMiddleware)
+    return app
+
+def __getattr__(name: str):
+    # `src.main:app` (uvicorn, tests): the app is built on first access
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
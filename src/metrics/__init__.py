@@ -0,0 +1,15 @@
+from .instruments import (
+    ADMISSION_REJECTIONS,
+    PROMPT_SIZE,
+    REGISTRY,
+    REQUEST_LATENCY,
+    STAGE_LATENCY,
+    SUMMARY_SIZE,
+    UPSTREAM_ERRORS,
+    UPSTREAM_HEDGES,
+    UPSTREAM_LATENCY,
+    UPSTREAM_QUEUE_WAIT,
+    UPSTREAM_RETRIES,
+    span,
+)
+from .registry import Counter, FunctionCounter, FunctionGauge, Histogram, Registry
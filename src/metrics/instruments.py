@@ -0,0 +1,89 @@
+from time import perf_counter
+
+from .registry import SIZE_BUCKETS, Counter, Histogram, Registry
+
+# Metrics served by /metrics
+REGISTRY = Registry()
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving an HTTP request until its response was fully sent.",
+    ("method", "route", "status"),
+    registry=REGISTRY,
+)
+STAGE_LATENCY = Histogram(
+    "request_stage_duration_seconds",
+    "Time spent in each stage of request handling.",
+    ("stage",),
+    registry=REGISTRY,
+)
+UPSTREAM_QUEUE_WAIT = Histogram(
+    "upstream_queue_wait_seconds",
+    "Time LLM calls waited for a free upstream concurrency slot.",
+    registry=REGISTRY,
+)
+UPSTREAM_LATENCY = Histogram(
+    "upstream_request_duration_seconds",
+    "Duration of successful LLM calls (whole stream for streamed calls), excluding the queue wait.",
+    ("kind",),
+    registry=REGISTRY,
+)
+UPSTREAM_ERRORS = Counter(
+    "upstream_errors_total",
+    "Failed LLM calls: busy (no free slot), timeout, or error.",
+    ("reason",),
+    registry=REGISTRY,
+)
+UPSTREAM_RETRIES = Counter(
+    "upstream_retries_total",
+    "LLM call attempts retried after a retryable failure.",
+    registry=REGISTRY,
+)
+UPSTREAM_HEDGES = Counter(
+    "upstream_hedges_total",
+    "Hedged LLM call attempts started because the first one was slow.",
+    registry=REGISTRY,
+)
+ADMISSION_REJECTIONS = Counter(
+    "admission_rejections_total",
+    "LLM calls not admitted: queue_full, shed (for a higher priority call), timeout, or deadline.",
+    ("priority", "reason"),
+    registry=REGISTRY,
+)
+PROMPT_SIZE = Histogram(
+    "prompt_size_chars",
+    "Size of the prompts sent to the LLM, in characters.",
+    buckets=SIZE_BUCKETS,
+    registry=REGISTRY,
+)
+SUMMARY_SIZE = Histogram(
+    "summary_size_chars",
+    "Size of the summaries returned to clients, in characters.",
+    buckets=SIZE_BUCKETS,
+    registry=REGISTRY,
+)
+
+
+class span:
+    """
+    Time a stage of request handling into `request_stage_duration_seconds`.
+
+    Usage:
+        with span("validate"):
+            ...
+
+    Runs on the monotonic perf_counter clock; the duration is recorded even
+    if the block raises.
+    """
+
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, stage: str):
+        self._histogram = STAGE_LATENCY.labels(stage)
+
+    def __enter__(self) -> "span":
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self._histogram.observe(perf_counter() - self._start)
@@ -0,0 +1,3 @@
+from .metrics import MetricsMiddleware
+from .request_body import ORJSONRequest, ORJSONRoute, RequestBodyMiddleware
+from .request_logging import RequestLoggingMiddleware
@@ -0,0 +1,42 @@
+from time import perf_counter
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..metrics import REQUEST_LATENCY
+
+
+class MetricsMiddleware:
+    """
+    Record the latency of every HTTP request in `http_request_duration_seconds`.
+
+    Requests are labelled with their route template (e.g. `/summarize`)
+    rather than the raw path, so unmatched paths share one `unmatched` label.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter()
+        # Unhandled exceptions are answered with a 500 further out
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                str(status_code),
+            ).observe(perf_counter() - start)
@@ -0,0 +1,166 @@
+import zlib
+
+import orjson
+import zstandard
+from fastapi import HTTPException, Request
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# zstd can expand a few bytes into a 128 KB block, so compressed data is fed
+# in slices this small to check the size limit before much memory is spent
+ZSTD_SLICE_BYTES = 256
+
+
+class _GzipDecoder:
+    """Decodes every member of a gzip body (e.g. concatenated .gz files), not just the first."""
+
+    def __init__(self):
+        self._decompressor = zlib.decompressobj(wbits=31)  # gzip header and trailer
+
+    @property
+    def eof(self) -> bool:
+        return self._decompressor.eof
+
+    def decompress(self, data: bytes, max_length: int) -> bytes:
+        output = bytearray()
+        while data and len(output) < max_length:
+            if self._decompressor.eof:
+                self._decompressor = zlib.decompressobj(wbits=31)  # next member
+            # Stops after max_length bytes; the rest waits in unconsumed_tail
+            output += self._decompressor.decompress(data, max_length - len(output))
+            data = self._decompressor.unused_data
+        return bytes(output)
+
+
+class _ZstdDecoder:
+    """Decodes every frame of a zstd body, not just the first."""
+
+    def __init__(self):
+        self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+
+    @property
+    def eof(self) -> bool:
+        return self._decompressor.eof
+
+    def decompress(self, data: bytes, max_length: int) -> bytes:
+        output = bytearray()
+        view = memoryview(data)
+        start = 0
+        while start < len(view) and len(output) < max_length:
+            if self._decompressor.eof:
+                self._decompressor = zstandard.ZstdDecompressor().decompressobj()  # next frame
+            piece = view[start : start + ZSTD_SLICE_BYTES]
+            output += self._decompressor.decompress(piece)
+            # The part of the slice after the end of a frame starts the next one
+            start += len(piece) - len(self._decompressor.unused_data if self._decompressor.eof else b"")
+        return bytes(output)
+
+
+DECODERS = {"gzip": _GzipDecoder, "x-gzip": _GzipDecoder, "zstd": _ZstdDecoder}
+
+
+class RequestBodyMiddleware:
+    """
+    Decompress request bodies and enforce a maximum body size.
+
+    Bodies sent with `Content-Encoding: gzip` or `zstd` are decompressed
+    while they are read, so the endpoint sees the plain body (the encoding
+    and length headers are removed). Other encodings get a 415.
+
+    A body longer than `max_body_bytes`, compressed or once decompressed,
+    gets a 413: at once when its Content-Length says so (before it is
+    uploaded, for clients that wait for `100 Continue`), otherwise as soon
+    as the limit is crossed while it is read, never after buffering it.
+    This also stops compressed bodies that expand without bounds.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_bytes: int):
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+
+    def _too_large(self) -> HTTPException:
+        return HTTPException(status_code=413, detail=f"Request body exceeds {self.max_body_bytes} bytes")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        encoding = headers.get("content-encoding", "identity").strip().lower()
+        content_length = headers.get("content-length")
+        declared = int(content_length) if content_length and content_length.isdigit() else None
+
+        error = None
+        if encoding not in DECODERS and encoding != "identity":
+            error = JSONResponse(status_code=415, content={"detail": f"Unsupported Content-Encoding: {encoding}"})
+        elif declared is not None and declared > self.max_body_bytes:
+            error = JSONResponse(status_code=413, content={"detail": self._too_large().detail})
+        if error is not None:
+            await error(scope, receive, send)
+            return
+
+        if encoding == "identity" and declared is not None:
+            # The server never delivers more than the declared length
+            await self.app(scope, receive, send)
+            return
+
+        decoder = DECODERS[encoding]() if encoding != "identity" else None
+        received = decompressed = 0
+
+        async def receive_body() -> Message:
+            nonlocal received, decompressed
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            body = message.get("body", b"")
+            received += len(body)
+            if received > self.max_body_bytes:
+                raise self._too_large()
+            if decoder is not None:
+                try:
+                    body = decoder.decompress(body, self.max_body_bytes - decompressed + 1)
+                except (zlib.error, zstandard.ZstdError) as exc:
+                    raise HTTPException(status_code=400, detail=f"Invalid {encoding} body: {exc}")
+            decompressed += len(body)
+            if decompressed > self.max_body_bytes:
+                raise self._too_large()
+            if decoder is not None and received and not message.get("more_body", False) and not decoder.eof:
+                raise HTTPException(status_code=400, detail=f"Invalid {encoding} body: truncated")
+            return {**message, "body": body}
+
+        if decoder is not None:
+            # Changed in place: routing stores the matched route in the scope,
+            # which the outer middleware (metrics) reads back
+            scope["headers"] = [
+                (name, value) for name, value in scope["headers"] if name not in (b"content-encoding", b"content-length")
+            ]
+        await self.app(scope, receive_body, send)
+
+
+class ORJSONRequest(Request):
+    """A request whose JSON body is parsed with orjson."""
+
+    async def json(self):
+        if not hasattr(self, "_json"):
+            self._json = orjson.loads(await self.body())
+        return self._json
+
+
+class ORJSONRoute(APIRoute):
+    """
+    A route that parses JSON request bodies with orjson (several times
+    faster than the json module on large bodies). Invalid JSON still gets
+    FastAPI's 422, as orjson's decode error is a json.JSONDecodeError.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def orjson_route_handler(request: Request):
+            return await handler(ORJSONRequest(request.scope, request.receive))
+
+        return orjson_route_handler
+
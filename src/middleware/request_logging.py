@@ -0,0 +1,57 @@
+import logging
+import random
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class RequestLoggingMiddleware:
+    """
+    Log every HTTP request and its response status with timing.
+
+    A pure ASGI middleware: messages are passed through untouched, so
+    streamed responses are not buffered. The time logged runs until the
+    response has been fully sent.
+
+    With a `sample_rate` below 1, only that fraction of successful requests
+    is logged; failed requests (status 400 and above) always are.
+    """
+
+    def __init__(self, app: ASGIApp, logger: logging.Logger, sample_rate: float = 1.0):
+        self.app = app
+        self.logger = logger
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.logger.isEnabledFor(logging.INFO):
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        sampled = self.sample_rate >= 1 or random.random() < self.sample_rate
+        client = scope.get("client")
+
+        # Log incoming request
+        if sampled:
+            self.logger.info("🔵 %s %s - Client: %s", scope["method"], scope["path"], client[0] if client else "unknown")
+
+        # Unhandled exceptions are answered with a 500 further out
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Log response with timing
+            if sampled or status_code >= 400:
+                process_time = time.perf_counter() - start_time
+                status_emoji = "🟢" if status_code < 400 else "🔴"
+                self.logger.info(
+                    "%s %s %s - Status: %s - Time: %.3fs",
+                    status_emoji, scope["method"], scope["path"], status_code, process_time,
+                )
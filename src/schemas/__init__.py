@@ -1 +1,12 @@
-from .http_schemas import RequestModel, ResponseModel
\ No newline at end of file
+from .http_schemas import (
+    BatchItemError,
+    BatchItemResult,
+    BatchRequestModel,
+    BatchResponseModel,
+    JobModel,
+    JobRequestModel,
+    RequestModel,
+    ResponseModel,
+    SummaryLength,
+    SummaryStyle,
+)
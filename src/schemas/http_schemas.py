@@ -1,16 +1,19 @@
-from pydantic import BaseModel, Field
-from typing import Literal, Optional
+from pydantic import AnyHttpUrl, BaseModel, Field
+from typing import List, Literal, Optional
+
+SummaryLength = Literal["short", "medium", "long"]
+SummaryStyle = Literal["bullet", "paragraph", "numbered"]
 
 class RequestModel(BaseModel):
     text: str = Field(
         ..., 
         description="The block of text you want to summarize.",
     )
-    length: Literal["short", "medium", "long"] = Field(
+    length: SummaryLength = Field(
         ..., 
         description="The desired length of the summary."
     )
-    style: Literal["bullet", "paragraph", "numbered"] = Field(
+    style: SummaryStyle = Field(
         ..., 
         description="The desired output format for the summary."
     )
@@ -34,7 +37,7 @@ class RequestModel(BaseModel):
 
 class ResponseModel(BaseModel):
     summary: str = Field(description="The generated summary of the text.")
-    meta: dict = Field(description="Metadata about the request, including model, length, style, and focus.")
+    meta: dict = Field(description="Metadata about the request, including model, length, style, focus, whether the summary was served from the cache (`cached`), the token counts of the input before and after normalization (`tokens`), whether it was cut to the token budget (`truncated`), and for summaries reused from a nearly identical text, that text's cache key (`reused_from`) and the estimated `similarity`.")
 
     model_config = {
         "json_schema_extra": {
@@ -45,9 +48,69 @@ class ResponseModel(BaseModel):
                         "model": "gemini-2.5-flash",
                         "length": "short",
                         "style": "bullet",
-                        "focus": "distillation"
+                        "focus": "distillation",
+                        "cached": False,
+                        "tokens": {"input": 62, "prompt": 62, "saved": 0},
+                        "truncated": False
                     }
                 }
             ]
         }
     }
+
+class BatchRequestModel(BaseModel):
+    items: List[RequestModel] = Field(
+        ...,
+        min_length=1,
+        description="The summarization requests to process concurrently.",
+    )
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "items": [
+                        {
+                            "text": "The cost of AI computing is falling. A technique called distillation is making it cheaper to build decent LLMs.",
+                            "length": "short",
+                            "style": "bullet",
+                            "focus": "distillation"
+                        },
+                        {
+                            "text": "This shift excites some and alarms others in the AI ecosystem. Distillation is, at its core, using one model to improve another.",
+                            "length": "short",
+                            "style": "paragraph"
+                        }
+                    ]
+                }
+            ]
+        }
+    }
+
+class BatchItemError(BaseModel):
+    status_code: int = Field(description="The HTTP status code the item would have failed with on /summarize.")
+    detail: str = Field(description="Description of the error.")
+
+class BatchItemResult(BaseModel):
+    index: int = Field(description="Position of the item in the batch request.")
+    summary: Optional[str] = Field(None, description="The generated summary, if the item succeeded.")
+    meta: Optional[dict] = Field(None, description="Metadata about the item, as returned by /summarize.")
+    error: Optional[BatchItemError] = Field(None, description="The error, if the item failed.")
+
+class BatchResponseModel(BaseModel):
+    results: List[BatchItemResult] = Field(description="One result per item, in request order.")
+
+class JobRequestModel(RequestModel):
+    webhook_url: Optional[AnyHttpUrl] = Field(
+        None,
+        description="An optional URL the finished job is POSTed to, in the same format as the job status.",
+    )
+
+class JobModel(BaseModel):
+    id: str = Field(description="The job ID.")
+    status: Literal["queued", "running", "succeeded", "failed"] = Field(description="The job state; `succeeded` and `failed` are final.")
+    attempts: int = Field(description="How many times a worker started the job.")
+    created_at: float = Field(description="When the job was submitted, as a Unix timestamp.")
+    updated_at: float = Field(description="When the job state last changed, as a Unix timestamp.")
+    result: Optional[ResponseModel] = Field(None, description="The summary and meta block, as returned by /summarize, once the job succeeded.")
+    error: Optional[BatchItemError] = Field(None, description="The error, if the job failed.")
@@ -0,0 +1,3 @@
+from .chunking import estimate_tokens, split_into_chunks
+from .map_reduce import map_chunks, map_reduce_summarize
+from .normalize import LineNormalizer, NormalizedText, normalize_text, truncate_to_tokens
@@ -0,0 +1,79 @@
+import re
+from typing import List
+
+# Rough average for English text with Gemini's tokenizer
+CHARS_PER_TOKEN = 4
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate based on the character count."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _split_long_sentence(sentence: str, max_tokens: int) -> List[str]:
+    """Split a sentence that exceeds the budget on word boundaries."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    pieces = []
+    current = []
+    current_chars = 0
+    for word in sentence.split():
+        if current and current_chars + len(word) + 1 > max_chars:
+            pieces.append(" ".join(current))
+            current = []
+            current_chars = 0
+        current.append(word)
+        current_chars += len(word) + 1
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def split_into_chunks(text: str, max_tokens: int) -> List[str]:
+    """
+    Split text into chunks of at most `max_tokens` (estimated) tokens.
+
+    Paragraphs are kept whole when they fit; larger paragraphs are split on
+    sentence boundaries, and only sentences that are themselves too long are
+    split between words. Consecutive pieces are packed greedily.
+
+    Args:
+        text: The document to split
+        max_tokens: Token budget of one chunk
+
+    Returns:
+        The chunks, in document order
+    """
+    if max_tokens < 1:
+        raise ValueError("max_tokens must be at least 1")
+
+    pieces = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= max_tokens:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_END.split(paragraph):
+            if estimate_tokens(sentence) <= max_tokens:
+                pieces.append(sentence)
+            else:
+                pieces.extend(_split_long_sentence(sentence, max_tokens))
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    for piece in pieces:
+        piece_tokens = estimate_tokens(piece) + 1
+        if current and current_tokens + piece_tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            current = []
+            current_tokens = 0
+        current.append(piece)
+        current_tokens += piece_tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
@@ -0,0 +1,93 @@
+import asyncio
+from typing import Awaitable, Callable, List
+
+from ..config.prompts import build_chunk_prompt, build_reduce_prompt
+from .chunking import estimate_tokens, split_into_chunks
+
+# Safety net against partial summaries that do not shrink
+MAX_REDUCE_LEVELS = 4
+
+
+async def _gather_or_cancel(coroutines) -> list:
+    """Like asyncio.gather, but cancels the remaining work on the first error."""
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+async def map_chunks(
+    chunks: List[str],
+    focus: str,
+    generate: Callable[[str], Awaitable[str]],
+    chunk_tokens: int,
+    max_parallel: int,
+) -> List[str]:
+    """
+    Summarize every chunk concurrently (map).
+
+    While the combined partial summaries are still larger than one chunk they
+    are re-chunked and summarized again, so the result always fits into a
+    single reduce prompt.
+
+    Args:
+        chunks: The document chunks, in order
+        focus: Optional topic to emphasize
+        generate: Coroutine function sending one prompt to the LLM
+        chunk_tokens: Token budget of one chunk
+        max_parallel: Maximum number of chunk prompts in flight
+
+    Returns:
+        The partial summaries, in document order
+    """
+    semaphore = asyncio.Semaphore(max_parallel)
+
+    async def summarize_chunk(chunk: str) -> str:
+        async with semaphore:
+            return await generate(build_chunk_prompt(chunk, focus))
+
+    partials = await _gather_or_cancel(summarize_chunk(chunk) for chunk in chunks)
+
+    for _ in range(MAX_REDUCE_LEVELS):
+        combined = "\n\n".join(partials)
+        if len(partials) == 1 or estimate_tokens(combined) <= chunk_tokens:
+            break
+        partials = await _gather_or_cancel(
+            summarize_chunk(chunk) for chunk in split_into_chunks(combined, chunk_tokens)
+        )
+
+    return partials
+
+
+async def map_reduce_summarize(
+    chunks: List[str],
+    length: str,
+    style: str,
+    focus: str,
+    generate: Callable[[str], Awaitable[str]],
+    chunk_tokens: int,
+    max_parallel: int,
+) -> str:
+    """
+    Summarize a document that was split into chunks.
+
+    The chunks are summarized with `map_chunks` and the partial summaries are
+    merged into the final summary with the requested length and style (reduce).
+
+    Args:
+        chunks: The document chunks, in order
+        length: short, medium, or long
+        style: bullet, paragraph, or numbered
+        focus: Optional topic to emphasize
+        generate: Coroutine function sending one prompt to the LLM
+        chunk_tokens: Token budget of one chunk
+        max_parallel: Maximum number of chunk prompts in flight
+
+    Returns:
+        The final summary
+    """
+    partials = await map_chunks(chunks, focus, generate, chunk_tokens, max_parallel)
+    return await generate(build_reduce_prompt(partials, length, style, focus))
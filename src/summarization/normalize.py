@@ -0,0 +1,189 @@
+import re
+from typing import Callable, Iterable, Iterator, NamedTuple
+
+from .chunking import CHARS_PER_TOKEN, estimate_tokens
+
+# Markdown block syntax at the start of a (stripped) line: headings,
+# blockquotes and bullet list markers, possibly nested ("> - item")
+_LINE_PREFIX = re.compile(r"^(?:#{1,6}\s+|>\s?|[*+-]\s+)+")
+# Horizontal rules and setext heading underlines
+_RULE = re.compile(r"^(?:[-*_=]\s*){3,}$")
+# Alignment row of a table: | --- | :---: |
+_TABLE_SEPARATOR = re.compile(r"^\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)+\|?$")
+_CODE_FENCE = re.compile(r"^(?:```|~~~)")
+
+# Inline markup, matched in one pass. Links keep their text (group 1 or 2),
+# autolinks their URL (3), emphasis and code spans their content (5, 7, 9);
+# images, link targets, HTML tags and comments are dropped. Only known tag
+# names with name="value" attributes count as HTML, so "a<b and c>d" is text. Emphasis markers are only
+# stripped as a pair around non-space text, outside words, so "2*x",
+# "5 * 3" and "_private" stay as they are; dunder names (__init__) too. The
+# lookahead lets the scan skip plain characters without trying each branch.
+_INLINE = re.compile(
+    r"(?=[!\[<*_`])(?:"
+    r"!\[[^\]]*\]\([^)]*\)"
+    r"|\[([^\]]*)\]\([^)]*\)"
+    r"|\[([^\]]*)\]\[[^\]]*\]"
+    r"|<!--.*?-->"
+    r"|<((?:https?|ftp)://[^<>\s]+|mailto:[^<>\s]+)>"
+    r"|</?(?:b|i|em|strong|span|div|p|br|a)(?:\s+[\w:-]+\s*=\s*(?:\"[^\"\n]{0,200}\"|'[^'\n]{0,200}'|[^\s\"'<>=]{1,200}))*\s*/?>"
+    r"|(?<![\w*])(\*{1,3})(?![\s*])(.{1,500}?)(?<![\s*])\4(?![\w*])"
+    r"|(?<![\w_])(?!__\w+__(?!\w))(_{1,3})(?![\s_])(.{1,500}?)(?<![\s_])\6(?![\w_])"
+    r"|(`+)(.+?)\8)"
+)
+
+
+def _inline_text(match: "re.Match[str]") -> str:
+    """What a piece of inline markup is replaced with."""
+    link, reference, autolink, _, strong, _, emphasis, _, code = match.groups()
+    if autolink is not None or code is not None:
+        return autolink if autolink is not None else code
+    text = link or reference or strong or emphasis
+    # Link text and emphasis can wrap more markup: **[links](...)**
+    return _INLINE.sub(_inline_text, text) if text else ""
+
+
+# Lines of large texts are split off this many characters at a time
+_SPLIT_CHARS = 1 << 20
+
+
+def _iter_lines(text: str) -> Iterator[str]:
+    """The lines of `text`, as str.splitlines(), without a list of them all at once."""
+    start = 0
+    while start < len(text):
+        # Cut after a newline, so that no line break (not even "\r\n") is split
+        end = text.find("\n", start + _SPLIT_CHARS)
+        end = len(text) if end < 0 else end + 1
+        yield from text[start:end].splitlines()
+        start = end
+
+
+class NormalizedText(NamedTuple):
+    text: str
+    # Tokens of the text before and after normalization
+    input_tokens: int
+    tokens: int
+    duplicate_lines: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.input_tokens - self.tokens
+
+
+class LineNormalizer:
+    """
+    Normalizes a document line by line, so it can be streamed from a file.
+
+    Whitespace runs collapse to one space, and paragraphs stay separated by
+    one blank line. With `markdown`, markup that costs tokens without adding
+    meaning is removed: heading, quote and list markers, rules, emphasis,
+    inline code markers, HTML tags and comments, images and link targets
+    (link text, autolink URLs and code span contents are kept). Table
+    alignment rows are dropped and table rows compacted to "cell | cell",
+    or dropped entirely with `drop_tables`. Fenced code blocks are kept
+    as they are, fences, indentation and blank lines included. With
+    `deduplicate`, lines repeated further down (navigation, footers,
+    boilerplate) are dropped.
+
+    Use one instance per document: it remembers the lines seen so far.
+    """
+
+    def __init__(self, markdown: bool = True, deduplicate: bool = False, drop_tables: bool = False):
+        self.markdown = markdown
+        self.deduplicate = deduplicate
+        self.drop_tables = drop_tables
+        self.duplicate_lines = 0
+
+    def lines(self, raw_lines: Iterable[str]) -> Iterator[str]:
+        """Yield the normalized lines, with "" between paragraphs."""
+        markdown = self.markdown
+        deduplicate = self.deduplicate
+        drop_tables = self.drop_tables
+        strip_prefix = _LINE_PREFIX.sub
+        strip_inline = _INLINE.sub
+        seen = set()
+        in_code = False
+        started = paragraph_break = False
+
+        for raw_line in raw_lines:
+            line = raw_line.strip()
+            if in_code:
+                # Code is kept verbatim, up to and including its closing fence
+                if _CODE_FENCE.match(line):
+                    in_code = False
+                yield raw_line.rstrip("\r\n")
+                continue
+            if not line:
+                paragraph_break = started
+                continue
+
+            if markdown:
+                if _CODE_FENCE.match(line):
+                    in_code = True
+                    if paragraph_break:
+                        yield ""
+                        paragraph_break = False
+                    started = True
+                    yield raw_line.rstrip("\r\n")
+                    continue
+                if "|" in line:
+                    if drop_tables or _TABLE_SEPARATOR.match(line):
+                        continue
+                    if line.startswith("|"):
+                        line = " | ".join(cell.strip() for cell in line.strip("|").split("|"))
+                if _RULE.match(line):
+                    continue
+                if line[0] in "#>*+-":
+                    line = strip_prefix("", line)
+                line = strip_inline(_inline_text, line)
+
+            line = " ".join(line.split())
+            if not line:
+                continue
+            if deduplicate:
+                if line in seen:
+                    self.duplicate_lines += 1
+                    continue
+                seen.add(line)
+
+            if paragraph_break:
+                yield ""
+                paragraph_break = False
+            started = True
+            yield line
+
+
+def normalize_text(
+    text: str,
+    markdown: bool = True,
+    deduplicate: bool = False,
+    drop_tables: bool = False,
+    count_tokens: Callable[[str], int] = estimate_tokens,
+) -> NormalizedText:
+    """
+    Compact text before it is sent to the LLM, in a single pass over its lines.
+
+    See LineNormalizer for what is removed.
+
+    Args:
+        text: The input text
+        markdown: Whether to strip Markdown markup
+        deduplicate: Whether to drop repeated lines
+        drop_tables: Whether to drop table rows instead of compacting them
+        count_tokens: Token counter used for the before/after counts
+
+    Returns:
+        The normalized text with its token counts
+    """
+    normalizer = LineNormalizer(markdown=markdown, deduplicate=deduplicate, drop_tables=drop_tables)
+    normalized = "\n".join(normalizer.lines(_iter_lines(text)))
+    return NormalizedText(normalized, count_tokens(text), count_tokens(normalized), normalizer.duplicate_lines)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to about `max_tokens` estimated tokens, on a word boundary."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars + 1)
+    return text[: cut if cut > 0 else max_chars].rstrip()
@@ -0,0 +1,186 @@
+import asyncio
+from time import monotonic
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ..admission import (
+    AdmissionController,
+    AdmissionMiddleware,
+    AdmissionRejectedError,
+    AIMDLimit,
+    FixedLimit,
+    GradientLimit,
+    PriorityClassifier,
+    current_deadline,
+    current_priority,
+    parse_api_key_priorities,
+    request_context,
+)
+from ..llm import UpstreamBusyError, UpstreamPool, UpstreamTimeoutError
+
+
+def test_waiters_are_admitted_by_priority():
+    controller = AdmissionController(FixedLimit(1))
+    admitted = []
+
+    async def call(priority: str):
+        await controller.acquire(priority)
+        admitted.append(priority)
+        controller.release(0.01)
+
+    async def scenario():
+        await controller.acquire()
+        waiters = [asyncio.ensure_future(call(priority)) for priority in ("low", "normal", "high", "normal")]
+        await asyncio.sleep(0)
+        assert controller.waiting == 4
+        controller.release(0.01)
+        await asyncio.gather(*waiters)
+
+    asyncio.run(scenario())
+    assert admitted == ["high", "normal", "normal", "low"]
+    assert controller.in_flight == 0
+
+
+def test_full_queue_rejects_or_sheds_lower_priority():
+    controller = AdmissionController(FixedLimit(1), max_queue=1)
+
+    async def scenario():
+        await controller.acquire()
+        low = asyncio.ensure_future(controller.acquire("low"))
+        await asyncio.sleep(0)
+
+        # Same or lower priority: rejected at once
+        with pytest.raises(AdmissionRejectedError) as rejected:
+            await controller.acquire("low")
+        assert rejected.value.reason == "queue_full"
+        assert rejected.value.retry_after >= 1
+
+        # Higher priority: takes the place of the queued low priority call
+        high = asyncio.ensure_future(controller.acquire("high"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejectedError) as shed:
+            await low
+        assert shed.value.reason == "shed"
+
+        controller.release(0.01)
+        await high
+        controller.release(0.01)
+
+    asyncio.run(scenario())
+    assert controller.in_flight == 0 and controller.waiting == 0
+
+
+def test_expired_deadline_is_rejected_without_calling_upstream():
+    pool = UpstreamPool(max_concurrency=1, queue_timeout=5, call_timeout=5)
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+
+    async def scenario():
+        with request_context("normal", monotonic() - 1):
+            with pytest.raises(UpstreamBusyError) as rejected:
+                await pool.run(call)
+        assert rejected.value.retry_after >= 1
+
+    asyncio.run(scenario())
+    assert calls == 0
+
+
+def test_request_deadline_cuts_upstream_call_short():
+    pool = UpstreamPool(max_concurrency=1, queue_timeout=5, call_timeout=5)
+
+    async def scenario():
+        with request_context("normal", monotonic() + 0.05):
+            start = monotonic()
+            with pytest.raises(UpstreamTimeoutError, match="deadline"):
+                await pool.run(lambda: asyncio.sleep(1))
+            return monotonic() - start
+
+    assert asyncio.run(scenario()) < 0.5
+    assert pool.in_flight == 0
+
+
+def test_request_deadline_timeouts_leave_the_limit_unchanged():
+    limit = AIMDLimit(32, min_limit=4, backoff_ratio=0.5)
+    pool = UpstreamPool(max_concurrency=32, queue_timeout=1, call_timeout=0.2, limit=limit)
+
+    async def upstream():
+        while True:
+            await asyncio.sleep(0.02)
+            yield "fragment"
+
+    async def open_upstream():
+        return upstream()
+
+    async def scenario():
+        for _ in range(4):
+            with request_context("normal", monotonic() + 0.01):
+                with pytest.raises(UpstreamTimeoutError):
+                    await pool.run(lambda: asyncio.sleep(1))
+            with request_context("normal", monotonic() + 0.01):
+                with pytest.raises(UpstreamTimeoutError):
+                    async for _ in pool.stream(open_upstream):
+                        pass
+        assert limit.limit == 32
+        # A call running past call_timeout still counts as dropped
+        with pytest.raises(UpstreamTimeoutError):
+            await pool.run(lambda: asyncio.sleep(1))
+        assert limit.limit == 16
+
+    asyncio.run(scenario())
+    assert pool.in_flight == 0
+
+
+def test_aimd_limit():
+    limit = AIMDLimit(10, min_limit=2, max_limit=12, backoff_ratio=0.5, latency_threshold=1.0)
+    limit.update(0.1, in_flight=2, dropped=False)
+    assert limit.limit == 10  # Mostly idle: no reason to grow
+    for _ in range(5):
+        limit.update(0.1, in_flight=10, dropped=False)
+    assert limit.limit == 12
+    limit.update(2.0, in_flight=10, dropped=False)
+    assert limit.limit == 6
+    for _ in range(5):
+        limit.update(0.1, in_flight=6, dropped=True)
+    assert limit.limit == 2
+
+
+def test_gradient_limit_follows_latency():
+    limit = GradientLimit(20, min_limit=1, max_limit=100)
+    for _ in range(100):
+        limit.update(0.1, in_flight=limit.limit, dropped=False)
+    grown = limit.limit
+    assert grown > 20
+    for _ in range(30):
+        limit.update(1.0, in_flight=limit.limit, dropped=False)
+    assert limit.limit < grown / 2
+
+
+def test_classifier_and_deadline_middleware():
+    app = FastAPI()
+
+    @app.get("/summarize")
+    async def summarize():
+        return {"priority": current_priority(), "time_left": current_deadline() - monotonic()}
+
+    classifier = PriorityClassifier(parse_api_key_priorities("gold:high, batch-key:low"))
+    app.add_middleware(AdmissionMiddleware, classifier=classifier, request_timeout=30, path_prefixes=("/summarize",))
+    client = TestClient(app)
+
+    def get(**headers) -> dict:
+        return client.get("/summarize", headers=headers).json()
+
+    assert get()["priority"] == "normal"
+    assert get(**{"X-API-Key": "gold"})["priority"] == "high"
+    assert get(**{"X-API-Key": "batch-key"})["priority"] == "low"
+    # The header can lower the class, not raise it
+    assert get(**{"X-API-Key": "gold", "X-Priority": "low"})["priority"] == "low"
+    assert get(**{"X-Priority": "high"})["priority"] == "normal"
+
+    assert 29 < get()["time_left"] <= 30
+    assert get(**{"X-Request-Timeout": "2.5"})["time_left"] <= 2.5
+    assert get(**{"X-Request-Timeout": "900"})["time_left"] <= 30
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Run against the local stub model
+os.environ.setdefault("LLM_PROVIDER", "stub")
+
+TEXT = "Batching sends several texts in one request, which saves a round trip per text. "
+LENGTHS = ["short", "medium", "long"]
+
+
+def make_items(tag: str, count: int = 3) -> list:
+    return [
+        {"text": f"{TEXT}{tag} item {index}.", "length": LENGTHS[index % 3], "style": "bullet"}
+        for index in range(count)
+    ]
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    from .. import main
+
+    stub = asyncio.run(main.llm.start())
+    # Later calls finish first, so that completion order is not request order
+    latencies = iter([0.06, 0.04, 0.02])
+    monkeypatch.setattr(stub, "sample_latency", lambda: next(latencies, 0))
+    return stub
+
+
+def make_client(name: str) -> TestClient:
+    from ..main import app
+
+    # A client address of its own, so that every test starts with a full rate limit quota
+    return TestClient(app, client=(f"batch-test-{name}", 50000))
+
+
+def test_results_are_returned_in_request_order(stub):
+    items = make_items("ordered")
+    response = make_client("order").post("/summarize/batch", json={"items": items})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert [result["meta"]["length"] for result in results] == LENGTHS
+    assert all(result["summary"] and result["error"] is None for result in results)
+
+
+def test_failing_items_do_not_fail_the_batch(stub):
+    items = make_items("partial", 2)
+    items.insert(1, {"text": "   ", "length": "short", "style": "bullet"})
+    response = make_client("errors").post("/summarize/batch", json={"items": items})
+
+    assert response.status_code == 200
+    first, failed, last = response.json()["results"]
+    assert first["summary"] and last["summary"]
+    assert failed["summary"] is None
+    assert failed["error"]["status_code"] == 400
+
+
+def test_results_are_streamed_as_ndjson(stub):
+    items = make_items("streamed")
+    response = make_client("stream").post("/summarize/batch", params={"stream": "true"}, json={"items": items})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.text.endswith("\n")
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(result["index"] for result in results) == [0, 1, 2]
+    # Sent as each item completes: the slowest (first) item comes last
+    assert results[-1]["index"] == 0
+    assert {result["meta"]["length"] for result in results} == set(LENGTHS)
+
+
+def test_too_many_items_are_rejected(stub, monkeypatch):
+    from .. import main
+
+    monkeypatch.setattr(main.settings, "BATCH_MAX_ITEMS", 2)
+    response = make_client("too-many").post("/summarize/batch", json={"items": make_items("too many")})
+
+    assert response.status_code == 413
+
+
+def test_every_item_is_charged_to_the_rate_limit(stub, monkeypatch):
+    from .. import main
+
+    monkeypatch.setattr(stub, "sample_latency", lambda: 0)
+    quota = 10
+    monkeypatch.setattr(main.rate_limiter, "max_requests", quota)
+    client = make_client("rate-limit")
+
+    # Uses 4 requests of the quota
+    assert client.post("/summarize/batch", json={"items": make_items("charged", 4)}).status_code == 200
+    # One item more than the quota left: only the batch request itself is charged
+    rejected = client.post("/summarize/batch", json={"items": make_items("over quota", quota - 3)})
+    assert rejected.status_code == 429
+    assert "Retry-After" in rejected.headers
+    # Exactly the quota left
+    accepted = client.post("/summarize/batch", json={"items": make_items("fits", quota - 5)})
+    assert accepted.status_code == 200
+    assert client.post("/summarize", json=make_items("single", 1)[0]).status_code == 429
+
+
+def test_clients_without_an_address_are_charged_as_unknown(stub, monkeypatch):
+    from .. import main
+
+    async def without_client(scope, receive, send):
+        # As behind a Unix socket, where the server knows no client address
+        await main.app({**scope, "client": None}, receive, send)
+
+    monkeypatch.setattr(stub, "sample_latency", lambda: 0)
+    response = TestClient(without_client).post("/summarize/batch", json={"items": make_items("no address", 2)})
+
+    assert response.status_code == 200
+    assert all(result["summary"] for result in response.json()["results"])
@@ -0,0 +1,63 @@
+import asyncio
+
+from ..summarization import estimate_tokens, map_reduce_summarize, split_into_chunks
+
+
+def test_chunks_respect_the_token_budget_and_keep_all_text():
+    paragraphs = [f"Paragraph {i}. " + "Some sentence here. " * 20 for i in range(30)]
+    text = "\n\n".join(paragraphs)
+
+    chunks = split_into_chunks(text, max_tokens=300)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 300 for chunk in chunks)
+    assert " ".join(" ".join(chunks).split()) == " ".join(" ".join(paragraphs).split())
+
+
+def test_oversized_paragraphs_split_on_sentences_then_words():
+    sentence = "word " * 50 + "end."
+    text = " ".join([sentence] * 5) + " " + "x" * 10 + " " + "long " * 400
+
+    chunks = split_into_chunks(text, max_tokens=100)
+
+    assert all(estimate_tokens(chunk) <= 100 for chunk in chunks)
+    assert chunks[0].endswith("end.")
+
+
+def test_small_text_is_a_single_chunk():
+    assert split_into_chunks("First paragraph.\n\nSecond one.", max_tokens=100) == [
+        "First paragraph.\n\nSecond one."
+    ]
+
+
+def test_map_reduce_summarizes_chunks_then_merges():
+    prompts = []
+
+    async def generate(prompt):
+        prompts.append(prompt)
+        return f"summary {len(prompts)}"
+
+    chunks = [f"chunk {i}" for i in range(4)]
+    summary = asyncio.run(
+        map_reduce_summarize(chunks, "short", "bullet", "costs", generate, chunk_tokens=1000, max_parallel=2)
+    )
+
+    assert summary == "summary 5"
+    assert all("section of a longer document" in prompt for prompt in prompts[:4])
+    assert "short bullet summary" in prompts[4]
+    assert "'costs'" in prompts[4]
+
+
+def test_map_reduce_recurses_when_partials_are_too_large():
+    calls = 0
+
+    async def generate(prompt):
+        nonlocal calls
+        calls += 1
+        return "partial " * 100
+
+    chunks = [f"chunk {i}" for i in range(8)]
+    asyncio.run(map_reduce_summarize(chunks, "short", "bullet", None, generate, chunk_tokens=300, max_parallel=8))
+
+    # 8 map calls, at least one extra level of section summaries, 1 final reduce
+    assert calls > 9
@@ -0,0 +1,45 @@
+import io
+import json
+
+from scripts.clean_markdown import clean_corpus, clean_markdown_file, clean_markdown_for_json, iter_markdown_files
+
+
+def write_corpus(tmp_path):
+    (tmp_path / "a.md").write_text("# Title\n\nSee [docs](https://example.com).\n\n| a | b |\n|---|---|\n", encoding="utf-8")
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "b.md").write_text("**Bold** text\nFooter\nFooter\n", encoding="utf-8")
+    (tmp_path / "nested" / "empty.md").write_text("---\n![img](x.png)\n", encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("not markdown", encoding="utf-8")
+
+
+def test_inputs_expand_directories_and_globs(tmp_path):
+    write_corpus(tmp_path)
+    paths = list(iter_markdown_files([str(tmp_path / "nested"), str(tmp_path / "*.md"), str(tmp_path / "a.md")]))
+    assert [p.replace(str(tmp_path), "") for p in paths] == ["/nested/b.md", "/nested/empty.md", "/a.md"]
+
+
+def test_file_is_cleaned_line_by_line(tmp_path):
+    write_corpus(tmp_path)
+    assert clean_markdown_file(str(tmp_path / "a.md")) == "Title\n\nSee docs."
+    assert clean_markdown_file(str(tmp_path / "a.md"), keep_tables=True) == "Title\n\nSee docs.\n\na | b"
+    assert clean_markdown_for_json(str(tmp_path / "nested" / "b.md")) == "Bold text Footer Footer"
+    assert clean_markdown_file(str(tmp_path / "nested" / "b.md"), deduplicate=True) == "Bold text\nFooter"
+
+
+def test_corpus_is_written_as_ndjson_in_input_order(tmp_path):
+    write_corpus(tmp_path)
+    paths = list(iter_markdown_files([str(tmp_path)])) + [str(tmp_path / "missing.md")]
+    options = {"length": "short", "style": "bullet", "focus": None}
+
+    for workers in (1, 2):
+        output = io.StringIO()
+        stats = clean_corpus(paths, output, options, workers=workers, deduplicate=True, include_source=True)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert [record["text"] for record in records] == ["Title\n\nSee docs.", "Bold text\nFooter"]
+        assert records[0] == {"text": "Title\n\nSee docs.", **options, "source": paths[0]}
+        assert (stats["files"], stats["empty"], stats["failed"]) == (2, 1, 1)
+
+    output = io.StringIO()
+    clean_corpus(paths, output, options, workers=1, batch_size=1)
+    batches = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [len(batch["items"]) for batch in batches] == [1, 1]
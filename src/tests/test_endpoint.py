@@ -3,6 +3,10 @@ from fastapi.testclient import TestClient
 import glob
 import os
 
+# Run against the local stub model (no network, no API key) unless a
+# provider was configured explicitly, e.g. LLM_PROVIDER=gemini
+os.environ.setdefault("LLM_PROVIDER", "stub")
+
 from ..main import app
 from utils.logging_config import setup_logging, get_logger
 
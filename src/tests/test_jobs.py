@@ -0,0 +1,326 @@
+import asyncio
+import os
+import sqlite3
+import time
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from benchmarks.fake_gemini import BackgroundServer
+from ..jobs import (
+    FAILED,
+    QUEUED,
+    RUNNING,
+    SIGNATURE_HEADER,
+    SUCCEEDED,
+    JobError,
+    JobWorkerPool,
+    SQLiteJobQueue,
+    WebhookSender,
+    WebhookURLError,
+    sign_payload,
+)
+
+# The endpoint test runs against the local stub model
+os.environ.setdefault("LLM_PROVIDER", "stub")
+
+
+def make_queue(tmp_path, **options) -> SQLiteJobQueue:
+    return SQLiteJobQueue(str(tmp_path / "jobs.sqlite3"), **options)
+
+
+def test_claimed_jobs_are_not_claimed_twice(tmp_path):
+    queue = make_queue(tmp_path)
+    other = make_queue(tmp_path)
+    first = queue.enqueue({"text": "a"})
+    second = queue.enqueue({"text": "b"}, webhook_url="http://127.0.0.1/hook")
+
+    claimed = [queue.claim(), other.claim()]
+    assert {job.id for job in claimed} == {first.id, second.id}
+    assert all(job.status == RUNNING and job.attempts == 1 for job in claimed)
+    assert queue.claim() is None
+
+    done = queue.complete(claimed[0], {"summary": "s"})
+    assert done.status == SUCCEEDED and done.result == {"summary": "s"}
+    assert other.get(claimed[0].id).finished
+
+
+def test_expired_lease_is_claimed_again_until_out_of_attempts(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0.01, max_attempts=2)
+    job = queue.enqueue({"text": "a"})
+
+    crashed = queue.claim()
+    time.sleep(0.02)
+    retried = queue.claim()
+    assert retried.id == job.id and retried.attempts == 2
+
+    # The first worker lost its lease and cannot finish the job any more
+    assert queue.complete(crashed, {"summary": "late"}) is None
+
+    time.sleep(0.02)
+    assert queue.claim() is None
+    [abandoned] = queue.abandon()
+    assert abandoned.id == job.id
+    assert abandoned.status == FAILED and "2 attempts" in abandoned.error["detail"]
+    assert queue.get(job.id) == abandoned
+    assert queue.abandon() == []
+
+
+def test_failed_attempts_are_retried_and_finished_jobs_expire(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2, ttl_seconds=0.01)
+    job = queue.enqueue({"text": "a"})
+
+    requeued = queue.fail(queue.claim(), {"status_code": 503, "detail": "busy"}, retry_delay=0)
+    assert requeued.status == QUEUED
+    failed = queue.fail(queue.claim(), {"status_code": 503, "detail": "busy"}, retry_delay=0)
+    assert failed.status == FAILED and failed.attempts == 2
+
+    time.sleep(0.02)
+    assert queue.get(job.id) is None
+    assert queue.purge_expired() == 1
+
+
+def test_worker_pool_runs_jobs_and_answers_long_polls(tmp_path):
+    queue = make_queue(tmp_path)
+    calls = []
+
+    async def handler(request: dict) -> dict:
+        calls.append(request["text"])
+        if request["text"] == "flaky" and calls.count("flaky") == 1:
+            raise JobError(503, "busy", retryable=True)
+        if request["text"] == "bad":
+            raise JobError(400, "invalid")
+        await asyncio.sleep(0.05)
+        return {"summary": request["text"].upper()}
+
+    async def scenario():
+        pool = JobWorkerPool(queue, handler, workers=2, poll_interval=0.05, retry_delay=0)
+        pool.start()
+        try:
+            jobs = [await pool.enqueue({"text": text}) for text in ("ok", "flaky", "bad")]
+            return [await pool.wait(job.id, timeout=5) for job in jobs]
+        finally:
+            await pool.stop()
+
+    ok, flaky, bad = asyncio.run(scenario())
+    assert ok.status == SUCCEEDED and ok.result == {"summary": "OK"}
+    assert flaky.status == SUCCEEDED and flaky.attempts == 2
+    assert bad.status == FAILED and bad.error == {"status_code": 400, "detail": "invalid"}
+
+
+def test_stopping_the_pool_puts_running_jobs_back(tmp_path):
+    queue = make_queue(tmp_path)
+    started = asyncio.Event()
+
+    async def handler(request: dict) -> dict:
+        started.set()
+        await asyncio.sleep(60)
+
+    async def scenario():
+        pool = JobWorkerPool(queue, handler, workers=1, poll_interval=0.05)
+        pool.start()
+        job = await pool.enqueue({"text": "a"})
+        await asyncio.wait_for(started.wait(), 5)
+        await pool.stop()
+        return job
+
+    job = asyncio.run(scenario())
+    restarted = queue.get(job.id)
+    assert restarted.status == QUEUED and restarted.attempts == 0
+
+
+def test_workers_survive_queue_errors(tmp_path):
+    queue = make_queue(tmp_path)
+    claim = queue.claim
+    failures = []
+
+    def flaky_claim():
+        # Fails like a database locked by another writer, twice
+        if len(failures) < 2:
+            failures.append(1)
+            raise sqlite3.OperationalError("database is locked")
+        return claim()
+
+    queue.claim = flaky_claim
+
+    async def handler(request: dict) -> dict:
+        return {"summary": request["text"].upper()}
+
+    async def scenario():
+        pool = JobWorkerPool(queue, handler, workers=1, poll_interval=0.01)
+        pool.start()
+        try:
+            job = await pool.enqueue({"text": "ok"})
+            return await pool.wait(job.id, timeout=5), await pool.refresh_counts()
+        finally:
+            await pool.stop()
+
+    job, counts = asyncio.run(scenario())
+    assert len(failures) == 2
+    assert job.status == SUCCEEDED
+    assert counts == {QUEUED: 0, RUNNING: 0}
+
+
+def test_webhook_is_delivered_to_a_local_receiver(tmp_path):
+    receiver = FastAPI()
+    deliveries = []
+
+    @receiver.post("/hook")
+    async def hook(request: Request):
+        deliveries.append((await request.body(), request.headers.get(SIGNATURE_HEADER)))
+        # Fail the first delivery, which must be retried
+        return JSONResponse({"ok": len(deliveries) > 1}, status_code=200 if len(deliveries) > 1 else 503)
+
+    queue = make_queue(tmp_path)
+
+    async def handler(request: dict) -> dict:
+        return {"summary": "done"}
+
+    # Shared by both runs, like a sender reused by a second app lifespan;
+    # the receiver is local, which only an allowlist permits
+    webhooks = WebhookSender(timeout=5, max_attempts=3, base_delay=0.01, secret="s3cret", allowed_hosts=["127.0.0.1"])
+
+    async def scenario(url: str, expected: int):
+        pool = JobWorkerPool(queue, handler, workers=1, poll_interval=0.05, webhooks=webhooks)
+        pool.start()
+        try:
+            job = await pool.enqueue({"text": "a"}, webhook_url=url)
+            await pool.wait(job.id, timeout=5)
+            deadline = time.monotonic() + 5
+            while len(deliveries) < expected and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            return job
+        finally:
+            await pool.stop()
+
+    with BackgroundServer(receiver) as server:
+        job = asyncio.run(scenario(f"{server.url}/hook", 2))
+        again = asyncio.run(scenario(f"{server.url}/hook", 3))
+
+    assert len(deliveries) == 3
+    body, signature = deliveries[1]
+    assert signature == sign_payload("s3cret", body)
+    assert b'"status": "succeeded"' in body and job.id.encode() in body
+    # Delivered again after the pool was stopped and started again
+    assert again.id.encode() in deliveries[2][0]
+
+
+def test_abandoned_jobs_are_announced_like_other_failures(tmp_path):
+    receiver = FastAPI()
+    deliveries = []
+
+    @receiver.post("/hook")
+    async def hook(request: Request):
+        deliveries.append(await request.json())
+        return {"ok": True}
+
+    queue = make_queue(tmp_path, lease_seconds=0.05, max_attempts=1)
+
+    async def handler(request: dict) -> dict:
+        return {"summary": "done"}
+
+    async def scenario(url: str):
+        job = await asyncio.to_thread(queue.enqueue, {"text": "a"}, url)
+        # Claimed by a worker that dies on the job's last attempt
+        await asyncio.to_thread(queue.claim)
+        pool = JobWorkerPool(
+            queue, handler, workers=1, poll_interval=0.5, webhooks=WebhookSender(timeout=5, allowed_hosts=["127.0.0.1"])
+        )
+        waiting = asyncio.ensure_future(pool.wait(job.id, timeout=5))
+        await asyncio.sleep(0.1)
+        start = time.monotonic()
+        pool.start()
+        try:
+            finished = await waiting
+            waited = time.monotonic() - start
+            deadline = time.monotonic() + 5
+            while not deliveries and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            return finished, waited
+        finally:
+            await pool.stop()
+
+    with BackgroundServer(receiver) as server:
+        job, waited = asyncio.run(scenario(f"{server.url}/hook"))
+
+    assert job.status == FAILED and "abandoned" in job.error["detail"]
+    # Woken by the failure, not by the next poll
+    assert waited < 0.4
+    assert [delivery["id"] for delivery in deliveries] == [job.id]
+    assert deliveries[0]["status"] == FAILED
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "http://127.0.0.1:8000/hook",
+        "http://localhost/hook",
+        "http://169.254.169.254/latest/meta-data/",
+        "http://10.0.0.5/hook",
+        "http://192.168.1.1/hook",
+        "http://[::1]/hook",
+        "http://[::ffff:127.0.0.1]/hook",
+        "ftp://example.com/hook",
+    ],
+)
+def test_webhooks_to_internal_hosts_are_refused(url):
+    with pytest.raises(WebhookURLError):
+        asyncio.run(WebhookSender().check_url(url))
+
+
+def test_webhook_allowlist():
+    webhooks = WebhookSender(allowed_hosts=["hooks.example.com", "127.0.0.1"])
+    asyncio.run(webhooks.check_url("https://HOOKS.example.com/hook"))
+    asyncio.run(webhooks.check_url("http://127.0.0.1:8000/hook"))
+    with pytest.raises(WebhookURLError, match="not allowed"):
+        asyncio.run(webhooks.check_url("https://example.com/hook"))
+    # Public addresses pass without an allowlist
+    asyncio.run(WebhookSender().check_url("http://93.184.215.14/hook"))
+
+
+def test_webhook_is_checked_again_before_delivery():
+    receiver = FastAPI()
+    deliveries = []
+
+    @receiver.post("/hook")
+    async def hook(request: Request):
+        deliveries.append(await request.body())
+        return {"ok": True}
+
+    with BackgroundServer(receiver) as server:
+        assert asyncio.run(WebhookSender(timeout=5).send(f"{server.url}/hook", {"id": "job"})) is False
+    assert deliveries == []
+
+
+def test_job_endpoints():
+    from ..main import app
+
+    # Entering the client runs the lifespan, which starts the job workers
+    with TestClient(app) as client:
+        created = client.post(
+            "/summarize/jobs",
+            json={"text": "Distillation makes small models cheaper to build.", "length": "short", "style": "bullet"},
+        )
+        assert created.status_code == 202
+        job = created.json()
+        assert job["status"] in (QUEUED, RUNNING, SUCCEEDED)
+        assert created.headers["Location"] == f"/summarize/jobs/{job['id']}"
+
+        finished = client.get(f"/summarize/jobs/{job['id']}", params={"wait": 10}).json()
+        assert finished["status"] == SUCCEEDED
+        assert finished["result"]["summary"]
+        assert finished["result"]["meta"]["length"] == "short"
+
+        assert client.get("/summarize/jobs/unknown").status_code == 404
+
+        refused = client.post(
+            "/summarize/jobs",
+            json={"text": "Webhooks must not reach internal hosts.", "length": "short", "style": "bullet", "webhook_url": "http://169.254.169.254/latest/meta-data/"},
+        )
+        assert refused.status_code == 400
+        assert "non-public" in refused.json()["detail"]
+
+        metrics = client.get("/metrics").text.splitlines()
+        assert "summary_jobs_running 0" in metrics
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from ..llm import UpstreamPool, UpstreamBusyError, UpstreamTimeoutError
+
+
+def test_pool_limits_concurrency():
+    """No more than `max_concurrency` calls should run at the same time."""
+    pool = UpstreamPool(max_concurrency=3, queue_timeout=5, call_timeout=5)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        peak = max(peak, pool.in_flight)
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    async def scenario():
+        return await asyncio.gather(*(pool.run(call) for _ in range(12)))
+
+    assert asyncio.run(scenario()) == ["ok"] * 12
+    assert peak == 3
+    assert pool.in_flight == 0 and pool.waiting == 0
+
+
+def test_pool_rejects_when_queue_wait_expires():
+    pool = UpstreamPool(max_concurrency=1, queue_timeout=0.05, call_timeout=5)
+
+    async def scenario():
+        slow = asyncio.ensure_future(pool.run(lambda: asyncio.sleep(0.5)))
+        await asyncio.sleep(0)
+        with pytest.raises(UpstreamBusyError):
+            await pool.run(lambda: asyncio.sleep(0))
+        slow.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_pool_enforces_call_deadline():
+    pool = UpstreamPool(max_concurrency=1, queue_timeout=1, call_timeout=0.05)
+
+    async def scenario():
+        with pytest.raises(UpstreamTimeoutError):
+            await pool.run(lambda: asyncio.sleep(1))
+        # The slot must have been released after the timeout
+        assert await pool.run(lambda: asyncio.sleep(0, result="done")) == "done"
+
+    asyncio.run(scenario())
+
+
+def test_stream_releases_slot_and_closes_upstream_when_abandoned():
+    pool = UpstreamPool(max_concurrency=1, queue_timeout=1, call_timeout=5)
+    closed = False
+
+    async def upstream():
+        nonlocal closed
+        try:
+            for index in range(100):
+                await asyncio.sleep(0)
+                yield index
+        finally:
+            closed = True
+
+    async def open_upstream():
+        return upstream()
+
+    async def scenario():
+        stream = pool.stream(open_upstream)
+        assert [await stream.__anext__() for _ in range(3)] == [0, 1, 2]
+        assert pool.in_flight == 1
+        await stream.aclose()
+
+    asyncio.run(scenario())
+    assert closed
+    assert pool.in_flight == 0
+
+
+def test_stream_enforces_call_deadline():
+    pool = UpstreamPool(max_concurrency=1, queue_timeout=1, call_timeout=0.05)
+
+    async def upstream():
+        while True:
+            await asyncio.sleep(0.02)
+            yield "fragment"
+
+    async def open_upstream():
+        return upstream()
+
+    async def scenario():
+        with pytest.raises(UpstreamTimeoutError):
+            async for _ in pool.stream(open_upstream):
+                pass
+
+    asyncio.run(scenario())
+    assert pool.in_flight == 0
@@ -0,0 +1,91 @@
+import asyncio
+import statistics
+
+import pytest
+
+from benchmarks.fake_gemini import BackgroundServer, create_fake_gemini_app
+
+from ..llm import LazyProvider, StubProvider, StubUnavailableError, create_llm_provider, is_retryable
+
+
+async def collect(provider, prompt: str) -> str:
+    fragments = await provider.stream(prompt, "Summarize.")
+    return "".join([fragment async for fragment in fragments])
+
+
+def test_stub_is_deterministic():
+    provider = StubProvider(latency=0, output_words=30)
+    prompt = "Summarize the following text about the cost of running language models."
+
+    first = asyncio.run(provider.generate(prompt, "Summarize."))
+    assert first == asyncio.run(provider.generate(prompt, "Summarize."))
+    assert first != asyncio.run(provider.generate(prompt + " Again.", "Summarize."))
+    assert len(first.replace("* ", "").split()) == 30
+    assert asyncio.run(collect(provider, prompt)) == first
+
+
+@pytest.mark.parametrize("distribution", ["constant", "exponential", "lognormal"])
+def test_stub_latency_median(distribution):
+    provider = StubProvider(latency=0.2, latency_distribution=distribution, seed=1)
+    samples = [provider.sample_latency() for _ in range(5000)]
+    assert min(samples) >= 0
+    assert statistics.median(samples) == pytest.approx(0.2, rel=0.1)
+
+
+def test_stub_injects_retryable_errors():
+    provider = StubProvider(latency=0, error_rate=1.0)
+    with pytest.raises(StubUnavailableError) as raised:
+        asyncio.run(provider.generate("Hello", "Summarize."))
+    assert is_retryable(raised.value)
+
+
+def test_create_llm_provider():
+    assert create_llm_provider("stub").model == "stub"
+    with pytest.raises(ValueError):
+        create_llm_provider("unknown")
+
+
+def test_gemini_provider_against_fake_server():
+    fake = create_fake_gemini_app(latency=0, stream_chunk_delay=0, summary="* A fake summary.")
+
+    with BackgroundServer(fake) as server:
+        provider = create_llm_provider("gemini", model="gemini-test", api_key="test", base_url=server.url)
+
+        async def scenario():
+            try:
+                return await provider.generate("Hello", "Summarize."), await collect(provider, "Hello")
+            finally:
+                await provider.aclose()
+
+        generated, streamed = asyncio.run(scenario())
+
+    assert generated == "* A fake summary."
+    assert streamed == "* A fake summary."
+    assert provider.count_tokens("x" * 400) == 100
+
+
+def test_lazy_provider_is_built_on_first_use():
+    fake = create_fake_gemini_app(latency=0, stream_chunk_delay=0, summary="* A fake summary.")
+
+    with BackgroundServer(fake) as server:
+        provider = create_llm_provider("gemini", model="gemini-test", api_key="test", base_url=server.url, lazy=True)
+        assert isinstance(provider, LazyProvider)
+        assert (provider.name, provider.model, provider.provider) == ("Gemini", "gemini-test", None)
+
+        async def scenario():
+            try:
+                # Concurrent first calls share one provider
+                built = await asyncio.gather(provider.start(), provider.start())
+                await provider.prewarm(2)
+                return built, await provider.generate("Hello", "Summarize.")
+            finally:
+                await provider.aclose()
+
+        built, generated = asyncio.run(scenario())
+
+    assert built[0] is built[1] is provider.provider
+    assert provider.provider.name == "Gemini"
+    assert generated == "* A fake summary."
+    with pytest.raises(ValueError):
+        create_llm_provider("unknown", lazy=True)
+
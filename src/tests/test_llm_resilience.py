@@ -0,0 +1,158 @@
+import asyncio
+
+import pytest
+from google import genai
+from google.genai import types
+
+from benchmarks.fake_gemini import BackgroundServer, create_fake_gemini_app
+
+from ..llm import (
+    Hedging,
+    RetryBudget,
+    RetryPolicy,
+    UpstreamPool,
+    UpstreamTransport,
+    is_retryable,
+    pooled_transport_factory,
+)
+
+
+class Unavailable(Exception):
+    code = 503
+
+
+class InvalidArgument(Exception):
+    code = 400
+
+
+def flaky(failures: int, exc_type=Unavailable):
+    """A call failing `failures` times before it succeeds."""
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        if calls <= failures:
+            raise exc_type("upstream failed")
+        return calls
+
+    return call
+
+
+def test_retries_transient_failures():
+    policy = RetryPolicy(max_attempts=3, base_delay=0.001)
+    assert asyncio.run(policy.run(flaky(2))) == 3
+
+
+def test_gives_up_after_max_attempts():
+    policy = RetryPolicy(max_attempts=3, base_delay=0.001)
+    with pytest.raises(Unavailable):
+        asyncio.run(policy.run(flaky(3)))
+
+
+def test_does_not_retry_client_errors():
+    call = flaky(1, InvalidArgument)
+    with pytest.raises(InvalidArgument):
+        asyncio.run(RetryPolicy(base_delay=0.001).run(call))
+    assert not is_retryable(InvalidArgument())
+    assert is_retryable(Unavailable())
+
+
+def test_retry_budget_stops_retry_storms():
+    budget = RetryBudget(ratio=0.1, min_per_second=0, max_tokens=2)
+    policy = RetryPolicy(max_attempts=5, base_delay=0.001, budget=budget)
+
+    async def scenario():
+        failures = 0
+        for _ in range(10):
+            try:
+                await policy.run(flaky(100))
+            except Unavailable:
+                failures += 1
+        return failures
+
+    assert asyncio.run(scenario()) == 10
+    # The first call spends both tokens; 0.1 per later call never adds up to another retry
+    assert budget.try_spend() is False
+
+
+def test_backoff_is_jittered_and_capped():
+    policy = RetryPolicy(base_delay=0.1, max_delay=0.5)
+    for retry in range(1, 10):
+        delays = [policy.backoff(retry) for _ in range(200)]
+        assert all(0 <= delay <= min(0.5, 0.1 * 2 ** (retry - 1)) for delay in delays)
+        assert len(set(delays)) > 1
+
+
+def test_hedge_wins_against_slow_attempt():
+    hedging = Hedging(percentile=95, min_delay=0.01)
+    for _ in range(hedging.latencies.min_samples):
+        hedging.latencies.record(0.01)
+    policy = RetryPolicy(hedging=hedging)
+    attempts = 0
+
+    async def call():
+        nonlocal attempts
+        attempts += 1
+        await asyncio.sleep(1 if attempts == 1 else 0.01)
+        return attempts
+
+    async def scenario():
+        start = asyncio.get_running_loop().time()
+        result = await policy.run(call)
+        return result, asyncio.get_running_loop().time() - start
+
+    result, elapsed = asyncio.run(scenario())
+    assert result == 2
+    assert elapsed < 0.5
+
+
+def test_stream_retries_failures_before_first_item():
+    pool = UpstreamPool(max_concurrency=1, queue_timeout=1, call_timeout=5, retry=RetryPolicy(base_delay=0.001))
+    opened = 0
+
+    async def upstream():
+        if opened == 1:
+            raise Unavailable("stream failed")
+        yield "a"
+        yield "b"
+
+    async def open_upstream():
+        nonlocal opened
+        opened += 1
+        return upstream()
+
+    async def scenario():
+        return [item async for item in pool.stream(open_upstream)]
+
+    assert asyncio.run(scenario()) == ["a", "b"]
+    assert opened == 2
+    assert pool.in_flight == 0
+
+
+def test_retries_against_failing_upstream():
+    """Calls through the Gemini client should survive injected 503s."""
+    fake = create_fake_gemini_app(latency=0, error_rate=0.3, seed=7)
+    policy = RetryPolicy(max_attempts=5, base_delay=0.001, budget=RetryBudget(ratio=1.0))
+    pool = UpstreamPool(max_concurrency=4, queue_timeout=5, call_timeout=10, retry=policy)
+
+    with BackgroundServer(fake) as server:
+        client = genai.Client(
+            api_key="test",
+            http_options=types.HttpOptions(
+                base_url=server.url,
+                async_client_args={"transport": UpstreamTransport(pooled_transport_factory())},
+            ),
+        )
+
+        async def scenario():
+            return await asyncio.gather(*(
+                pool.run(lambda: client.aio.models.generate_content(model="fake", contents="Hello"))
+                for _ in range(20)
+            ))
+
+        responses = asyncio.run(scenario())
+
+    assert [response.text for response in responses] == ["* A fake summary."] * 20
+    assert fake.state.errors > 0
+    assert fake.state.requests == 20 + fake.state.errors
@@ -0,0 +1,30 @@
+import json
+
+from benchmarks.bench_load import compare_results, load_payloads
+
+BASELINE = {"throughput_rps": 100.0, "p50_ms": 200.0, "p95_ms": 400.0, "p99_ms": 800.0, "error_rate": 0.0, "peak_rss_mb": 100.0}
+
+
+def regressions(results: dict, tolerance: float = 0.1) -> list:
+    return [row["metric"] for row in compare_results(results, BASELINE, tolerance) if row["regressed"]]
+
+
+def test_changes_within_tolerance_pass():
+    results = {**BASELINE, "throughput_rps": 95.0, "p99_ms": 850.0, "peak_rss_mb": 104.0}
+    assert regressions(results) == []
+
+
+def test_regressions_are_flagged_in_the_bad_direction_only():
+    results = {**BASELINE, "throughput_rps": 80.0, "p95_ms": 300.0, "p99_ms": 1000.0, "error_rate": 0.05}
+    assert regressions(results) == ["throughput_rps", "p99_ms", "error_rate"]
+
+
+def test_payloads_from_markdown_and_jsonl(tmp_path):
+    (tmp_path / "doc.md").write_text("# Title\n\nSome text.", encoding="utf-8")
+    backlog = tmp_path / "requests.jsonl"
+    backlog.write_text(json.dumps({"request_id": "r1", "title": "A title", "body": "A body"}) + "\n", encoding="utf-8")
+
+    payloads = load_payloads(str(tmp_path / "*.md"), [str(backlog), str(tmp_path / "missing.jsonl")])
+
+    assert [payload["text"] for payload in payloads] == ["# Title\n\nSome text.", "A title\n\nA body"]
+    assert [payload["length"] for payload in payloads] == ["short", "medium"]
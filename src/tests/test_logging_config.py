@@ -0,0 +1,56 @@
+import json
+import logging
+
+import pytest
+
+from utils.logging_config import setup_logging, stop_logging
+
+
+@pytest.fixture
+def restore_logging():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    log_files = []
+    yield log_files
+    stop_logging()
+    for handler in root.handlers:
+        handler.close()
+    root.handlers[:], root.level = handlers, level
+    for log_file in log_files:
+        for path in log_file.parent.glob(log_file.name + "*"):
+            path.unlink()
+
+
+def test_queue_mode_writes_from_a_background_thread(restore_logging):
+    log_file = setup_logging("test_logging_queue", "tests", use_queue=True)
+    restore_logging.append(log_file)
+    logger = logging.getLogger("test_logging_queue")
+
+    logger.info("📝 Request - Text: %s chars", 1234)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("❌ Failed")
+    stop_logging()
+
+    content = log_file.read_text(encoding="utf-8")
+    assert "test_logging_queue - INFO - 📝 Request - Text: 1234 chars" in content
+    assert "ValueError: boom" in content
+
+
+def test_json_lines_with_size_rotation(restore_logging):
+    log_file = setup_logging("test_logging_json", "tests", use_queue=True, json_lines=True, max_bytes=2000, backup_count=2)
+    restore_logging.append(log_file)
+    logger = logging.getLogger("test_logging_json")
+
+    for index in range(100):
+        logger.info("line %s", index)
+    stop_logging()
+
+    assert log_file.suffix == ".jsonl"
+    assert log_file.stat().st_size <= 2000
+    assert log_file.with_name(log_file.name + ".2").exists()
+    entries = [json.loads(line) for line in log_file.read_text(encoding="utf-8").splitlines()]
+    assert entries[-1]["message"] == "line 99"
+    assert entries[-1]["level"] == "INFO"
+    assert entries[-1]["logger"] == "test_logging_json"
@@ -0,0 +1,66 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ..metrics import REQUEST_LATENCY, STAGE_LATENCY, Counter, FunctionCounter, Histogram, Registry, span
+from ..middleware import MetricsMiddleware
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0), registry=registry)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.labels("/a").observe(value)
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP latency_seconds Latency.", "# TYPE latency_seconds histogram"]
+    assert lines[2:] == [
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a",le="1"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 3.65',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_counters_and_label_escaping():
+    registry = Registry()
+    counter = Counter("errors_total", "Errors.", ("reason",), registry=registry)
+    counter.labels('say "hi"').inc()
+    counter.labels('say "hi"').inc(2)
+    FunctionCounter("hits_total", "Hits.", lambda: 7, registry=registry)
+
+    text = registry.render()
+    assert 'errors_total{reason="say \\"hi\\""} 3' in text
+    assert "hits_total 7" in text
+
+
+def test_span_records_stage_duration_even_on_error():
+    child = STAGE_LATENCY.labels("test_stage")
+    count = sum(child.counts)
+
+    with span("test_stage"):
+        pass
+    try:
+        with span("test_stage"):
+            raise ValueError
+    except ValueError:
+        pass
+
+    assert sum(child.counts) == count + 2
+
+
+def test_middleware_labels_requests_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/nowhere")
+
+    assert sum(REQUEST_LATENCY.labels("GET", "/items/{item_id}", "200").counts) == 2
+    assert sum(REQUEST_LATENCY.labels("GET", "unmatched", "404").counts) >= 1
@@ -0,0 +1,133 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from ..cache.near_duplicates import NearDuplicateIndex, shingle_hashes
+
+# The endpoint test runs against the local stub model
+os.environ.setdefault("LLM_PROVIDER", "stub")
+
+EXAMPLES = Path(__file__).resolve().parents[2] / "docs" / "examples"
+ARTICLE = (EXAMPLES / "example_LLM_costs_overview.md").read_text(encoding="utf-8")
+OTHER_ARTICLE = (EXAMPLES / "example_companies_copying_homework.md").read_text(encoding="utf-8")
+# The same article, as served on another day with another footer
+VARIANT = (
+    "Published 2025-10-17 09:12 UTC\n\n"
+    + ARTICLE.replace("  ", " ")
+    + "\n\nSubscribe to our newsletter for more updates on LLM pricing. Share this article."
+)
+
+
+def test_shingle_hashes_match_a_plain_implementation():
+    text = "The quick  brown fox\njumps over the lazy dog the quick brown fox"
+    hashes = shingle_hashes(text, 3)
+    words = text.lower().split()
+    shingles = {" ".join(words[i : i + 3]) for i in range(len(words) - 2)}
+    assert len(hashes) == len(shingles) == 9
+    # Equal shingles hash equally, wherever they are in the text
+    assert set(shingle_hashes("the quick brown", 3)) <= set(hashes)
+    assert len(shingle_hashes("two words", 3)) == 1
+
+
+def test_variant_is_matched_with_the_same_options_only():
+    index = NearDuplicateIndex(threshold=0.9)
+    index.add("article", index.signature(ARTICLE), "short/bullet", "The summary")
+
+    match = index.lookup(index.signature(VARIANT), "short/bullet")
+    assert match is not None
+    assert match.key == "article"
+    assert match.summary == "The summary"
+    assert 0.9 <= match.similarity < 1
+    assert index.lookup(index.signature(VARIANT), "long/paragraph") is None
+    assert index.lookup(index.signature(OTHER_ARTICLE), "short/bullet") is None
+    assert index.hits == 1
+    # Too short to tell a variant from a different text
+    assert index.signature("A short note about pricing.") is None
+
+
+def test_eviction_and_expiry():
+    index = NearDuplicateIndex(max_entries=2, ttl_seconds=60)
+    signatures = {name: index.signature(text) for name, text in (("a", ARTICLE), ("b", OTHER_ARTICLE))}
+    index.add("a", signatures["a"], "", "A")
+    index.add("b", signatures["b"], "", "B")
+    assert index.lookup(signatures["a"], "") is not None  # "b" is now the least recently used
+
+    third = index.signature(ARTICLE.upper() + " " + OTHER_ARTICLE)
+    index.add("c", third, "", "C")
+    assert len(index) == 2 and index.evictions == 1
+    assert index.lookup(signatures["b"], "") is None
+    assert index.lookup(signatures["a"], "").key == "a"
+
+    index.add("a", signatures["a"], "", "A again")
+    assert len(index) == 2 and index.lookup(signatures["a"], "").summary == "A again"
+
+    expired = NearDuplicateIndex(ttl_seconds=0)
+    expired.add("a", signatures["a"], "", "A")
+    assert expired.lookup(signatures["a"], "") is None
+    assert len(expired) == 0
+
+
+def test_persistence(tmp_path):
+    path = str(tmp_path / "index" / "near_duplicates.npz")
+    # Few enough documents that some are still waiting to be merged
+    index = NearDuplicateIndex(pending_size=2)
+    index.add("article", index.signature(ARTICLE), "short/bullet", "The summary")
+    index.add("other", index.signature(OTHER_ARTICLE), "short/bullet", "Other")
+    index.add("other, long", index.signature(OTHER_ARTICLE), "long/paragraph", "Other, long")
+    index.save(path)
+
+    restored = NearDuplicateIndex()
+    assert restored.load(path) == 3
+    assert restored.lookup(restored.signature(VARIANT), "short/bullet").summary == "The summary"
+    # Signatures of other hashing parameters are not comparable
+    assert NearDuplicateIndex(num_perm=64, bands=8).load(path) == 0
+    assert NearDuplicateIndex().load(str(tmp_path / "missing.npz")) == 0
+
+    expired = NearDuplicateIndex(ttl_seconds=0)
+    expired.add("article", expired.signature(ARTICLE), "short/bullet", "The summary")
+    expired.save(path)
+    assert NearDuplicateIndex().load(path) == 0
+
+
+def test_summarize_reuses_the_summary_of_a_near_duplicate():
+    from ..main import app
+
+    # A client of its own, so that the other endpoint tests keep their rate limit
+    client = TestClient(app, client=("near-duplicate-test", 50000))
+    options = {"length": "short", "style": "bullet", "focus": "costs"}
+    first = client.post("/summarize", json={"text": ARTICLE, **options})
+    second = client.post("/summarize", json={"text": VARIANT, **options})
+    assert first.status_code == second.status_code == 200
+    assert first.json()["meta"]["cached"] is False
+
+    meta = second.json()["meta"]
+    assert second.json()["summary"] == first.json()["summary"]
+    assert meta["cached"] is True
+    assert len(meta["reused_from"]) == 64
+    assert 0.9 <= meta["similarity"] < 1
+
+
+def test_index_is_built_once_when_threads_ask_for_it_together(monkeypatch):
+    from .. import main
+    from ..cache import near_duplicates
+
+    built = []
+
+    class SlowIndex(NearDuplicateIndex):
+        def __init__(self, **options):
+            built.append(self)
+            time.sleep(0.05)
+            super().__init__(**options)
+
+    monkeypatch.setattr(near_duplicates, "NearDuplicateIndex", SlowIndex)
+    monkeypatch.setattr(main, "near_duplicates", None)
+    monkeypatch.setattr(main.settings, "NEAR_DUPLICATE_MAX_ENTRIES", 16)
+    # Like warm_up's worker thread and a request on the event loop
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        indexes = list(executor.map(lambda _: main.near_duplicate_index(), range(4)))
+
+    assert len(built) == 1
+    assert all(index is built[0] for index in indexes)
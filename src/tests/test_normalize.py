@@ -0,0 +1,146 @@
+import asyncio
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ..summarization import estimate_tokens, normalize_text, truncate_to_tokens
+
+# The endpoint test runs against the local stub model
+os.environ.setdefault("LLM_PROVIDER", "stub")
+
+MARKDOWN = """# Pricing overview
+
+> **Note:** prices change _often_, see [the pricing page](https://example.com/pricing).
+
+![chart](chart.png)
+
+| Provider | Input  | Output |
+|----------|:------:|-------:|
+| Gemini   | $0.30  | $2.50  |
+
+- Use `snake_case` names
+- Use `snake_case` names
+
+---
+Subscribe to our newsletter
+```python
+total = price*tokens
+```
+Subscribe to our newsletter
+"""
+
+
+def test_markdown_is_stripped_in_one_pass():
+    normalized = normalize_text(MARKDOWN, deduplicate=True)
+    assert normalized.text == (
+        "Pricing overview\n"
+        "\n"
+        "Note: prices change often, see the pricing page.\n"
+        "\n"
+        "Provider | Input | Output\n"
+        "Gemini | $0.30 | $2.50\n"
+        "\n"
+        "Use snake_case names\n"
+        "\n"
+        "Subscribe to our newsletter\n"
+        "```python\n"
+        "total = price*tokens\n"
+        "```"
+    )
+    assert normalized.duplicate_lines == 2
+    assert normalized.input_tokens == estimate_tokens(MARKDOWN)
+    assert normalized.saved_tokens == normalized.input_tokens - estimate_tokens(normalized.text) > 0
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "If a<b and c>d then done.",
+        "2*x",
+        "5 * 3",
+        "_private",
+        "__init__",
+        "Call __init__ and _private_helper.",
+    ],
+)
+def test_text_that_only_looks_like_markup_is_kept(text):
+    assert normalize_text(text).text == text
+
+
+def test_markup_is_stripped_around_its_content():
+    text = 'See <https://x.com>, <span class="note">**bold** _it_</span><br/> and `a*b*c`.'
+    assert normalize_text(text).text == "See https://x.com, bold it and a*b*c."
+    assert normalize_text("**[Docs](https://x.com)** and __bold text__").text == "Docs and bold text"
+
+
+def test_code_blocks_are_kept_verbatim():
+    code = "```python\ndef total(price, tokens):\n    # **not** markup\n\n    return  price*tokens\n```"
+    assert normalize_text(f"**Code:**\n\n{code}\n\n  After   the code.").text == f"Code:\n\n{code}\n\nAfter the code."
+
+
+def test_repeated_lines_are_kept_unless_deduplication_is_asked_for():
+    text = "Step\nRepeat\nRepeat\nDone"
+    assert normalize_text(text).text == text
+    deduplicated = normalize_text(text, deduplicate=True)
+    assert deduplicated.text == "Step\nRepeat\nDone"
+    assert deduplicated.duplicate_lines == 1
+
+
+def test_options():
+    assert "Gemini" not in normalize_text(MARKDOWN, drop_tables=True).text
+
+    plain = normalize_text("**Keep**   the\tmarkup\n\n**Keep**   the\tmarkup", markdown=False, deduplicate=False)
+    assert plain.text == "**Keep** the markup\n\n**Keep** the markup"
+    assert plain.duplicate_lines == 0
+
+
+def test_large_texts_are_split_into_lines_piece_by_piece(monkeypatch):
+    from ..summarization import normalize
+
+    text = MARKDOWN.replace("\n", "\r\n", 3) + "\rold\x0cstyle\u2028breaks\n"
+    expected = normalize_text(text)
+    monkeypatch.setattr(normalize, "_SPLIT_CHARS", 7)
+    assert list(normalize._iter_lines(text)) == text.splitlines()
+    assert normalize_text(text) == expected
+
+
+def test_truncate_to_tokens_cuts_on_a_word_boundary():
+    text = "word " * 100
+    truncated = truncate_to_tokens(text, 10)
+    assert truncated == ("word " * 8).strip()
+    assert estimate_tokens(truncated) <= 10
+    assert truncate_to_tokens("short", 10) == "short"
+
+
+def test_summarize_reports_token_savings():
+    from ..main import app
+
+    response = TestClient(app).post("/summarize", json={"text": MARKDOWN, "length": "short", "style": "bullet"})
+    assert response.status_code == 200
+    meta = response.json()["meta"]
+    assert meta["tokens"]["saved"] == meta["tokens"]["input"] - meta["tokens"]["prompt"] > 0
+    assert meta["truncated"] is False
+
+
+def test_large_texts_are_prepared_off_the_event_loop(monkeypatch):
+    from .. import main
+
+    on_event_loop = []
+
+    def recording_normalize_text(text, **options):
+        try:
+            asyncio.get_running_loop()
+            on_event_loop.append(True)
+        except RuntimeError:
+            on_event_loop.append(False)
+        return normalize_text(text, **options)
+
+    monkeypatch.setattr(main, "normalize_text", recording_normalize_text)
+    monkeypatch.setattr(main, "PREPARE_IN_THREAD_CHARS", 1000)
+    client = TestClient(main.app, client=("normalize-test", 50000))
+    for text in (MARKDOWN, MARKDOWN * 10):
+        response = client.post("/summarize", json={"text": text, "length": "short", "style": "bullet"})
+        assert response.status_code == 200
+
+    assert on_event_loop == [True, False]
@@ -0,0 +1,219 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from benchmarks.fake_redis import FakeRedisServer
+
+from ..throttling import RateLimiter, RateLimiterMiddleware, RedisRateLimitBackend, SQLiteRateLimitBackend
+from ..throttling import rate_limiter as rate_limiter_module
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A controllable replacement for time.time() inside the rate limiter."""
+    now = [60 * 16_667 + 20.0]  # 20s into a 60s window
+    monkeypatch.setattr(rate_limiter_module, "time", lambda: now[0])
+    return now
+
+
+def hit(limiter, client_id, cost=1):
+    return asyncio.run(limiter.hit(client_id, cost=cost))
+
+
+def test_limiter_allows_up_to_max_requests(clock):
+    limiter = RateLimiter(max_requests=3, window_seconds=60)
+
+    assert [hit(limiter, "1.2.3.4").allowed for _ in range(4)] == [True, True, True, False]
+    assert hit(limiter, "5.6.7.8").allowed is True
+
+
+def test_limiter_charges_batches_atomically(clock):
+    limiter = RateLimiter(max_requests=5, window_seconds=60)
+
+    assert hit(limiter, "1.2.3.4", cost=4).allowed is True
+    # A batch that does not fit is rejected as a whole
+    assert hit(limiter, "1.2.3.4", cost=2).allowed is False
+    assert hit(limiter, "1.2.3.4", cost=1).allowed is True
+    assert hit(limiter, "1.2.3.4").allowed is False
+
+
+def test_previous_window_is_weighted_by_its_overlap(clock):
+    limiter = RateLimiter(max_requests=10, window_seconds=60)
+    for _ in range(10):
+        hit(limiter, "1.2.3.4")
+
+    # Half-way through the next window, half of the previous requests still count
+    clock[0] += 70
+    result = hit(limiter, "1.2.3.4")
+    assert result.allowed
+    assert result.remaining == 4
+
+
+def test_remaining_reset_and_retry_after_are_accurate(clock):
+    limiter = RateLimiter(max_requests=2, window_seconds=60)
+
+    first = hit(limiter, "1.2.3.4")
+    assert first.remaining == 1
+    # The request stops counting once the next window has fully slid past it
+    assert first.reset_after == pytest.approx(100)
+
+    hit(limiter, "1.2.3.4")
+    rejected = hit(limiter, "1.2.3.4")
+    assert not rejected.allowed
+    assert rejected.remaining == 0
+
+    clock[0] += rejected.retry_after - 0.01
+    assert not hit(limiter, "1.2.3.4").allowed
+    clock[0] += 0.02
+    assert hit(limiter, "1.2.3.4").allowed
+
+
+def test_idle_clients_are_evicted(clock):
+    limiter = RateLimiter(max_requests=10, window_seconds=60)
+    for index in range(100):
+        hit(limiter, f"10.0.0.{index}")
+    assert len(limiter.backend) == 100
+
+    clock[0] += 180
+    for _ in range(60):
+        hit(limiter, "1.2.3.4")
+    assert len(limiter.backend) == 1
+
+
+def test_tracked_clients_are_capped(clock):
+    limiter = RateLimiter(max_requests=10, window_seconds=60, max_clients=50)
+    for index in range(1000):
+        hit(limiter, f"10.0.{index // 256}.{index % 256}")
+
+    assert len(limiter.backend) == 50
+
+
+def test_limit_exceeded_response(clock):
+    limiter = RateLimiter(max_requests=1, window_seconds=60)
+    hit(limiter, "1.2.3.4")
+    response = limiter.limit_exceeded_response(hit(limiter, "1.2.3.4"))
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "100"
+    assert response.headers["X-RateLimit-Limit"] == "1"
+    assert response.headers["X-RateLimit-Remaining"] == "0"
+    assert response.headers["X-RateLimit-Reset"] == "100"
+
+
+def test_sqlite_backend_shares_counts_between_workers(clock, tmp_path):
+    path = str(tmp_path / "rate_limits.sqlite3")
+    workers = [
+        RateLimiter(max_requests=3, window_seconds=60, backend=SQLiteRateLimitBackend(path))
+        for _ in range(2)
+    ]
+
+    results = [hit(workers[index % 2], "1.2.3.4").allowed for index in range(4)]
+    assert results == [True, True, True, False]
+
+    # Half-way through the next window, half of the previous requests still count
+    clock[0] += 70
+    result = hit(workers[1], "1.2.3.4")
+    assert result.allowed
+    assert result.remaining == 0
+
+
+def test_redis_backend_shares_counts_between_replicas(clock):
+    with FakeRedisServer() as server:
+        replicas = [
+            RateLimiter(max_requests=5, window_seconds=60, backend=RedisRateLimitBackend(server.url, window_seconds=60))
+            for _ in range(2)
+        ]
+
+        async def burst():
+            results = await asyncio.gather(*(replicas[index % 2].hit("1.2.3.4") for index in range(8)))
+            await asyncio.gather(*(replica.close() for replica in replicas))
+            return results
+
+        results = asyncio.run(burst())
+
+    assert sum(result.allowed for result in results) == 5
+    # Rejected requests were never charged
+    assert server.data[f"ratelimit:1.2.3.4:{int(clock[0] // 60)}".encode()][0] == b"5"
+
+
+def test_redis_backend_rejects_oversized_batches_without_overshooting(clock):
+    with FakeRedisServer() as server:
+        limiter = RateLimiter(max_requests=5, window_seconds=60, backend=RedisRateLimitBackend(server.url, window_seconds=60))
+
+        async def scenario():
+            await limiter.hit("1.2.3.4", cost=4)
+            # A batch over the quota at the same time as a request that fits
+            results = await asyncio.gather(limiter.hit("1.2.3.4", cost=3), limiter.hit("1.2.3.4"))
+            await limiter.close()
+            return results
+
+        batch, single = asyncio.run(scenario())
+
+    assert not batch.allowed and batch.retry_after > 0
+    assert single.allowed
+    assert server.data[f"ratelimit:1.2.3.4:{int(clock[0] // 60)}".encode()][0] == b"5"
+
+
+def test_retry_after_without_counts_waits_for_the_next_window(clock):
+    limiter = RateLimiter(max_requests=5, window_seconds=60)
+
+    # As seen by a rejected caller whose counts were given back concurrently
+    assert limiter._retry_after(previous=0, current=0, offset=20.0, cost=3) == 40.0
+
+
+def test_rejections_are_answered_locally_until_retry_after(clock):
+    with FakeRedisServer() as server:
+        limiter = RateLimiter(max_requests=1, window_seconds=60, backend=RedisRateLimitBackend(server.url, window_seconds=60))
+
+        async def scenario():
+            first = await limiter.hit("1.2.3.4")
+            rejected = await limiter.hit("1.2.3.4")
+            commands = server.commands
+            repeated = [await limiter.hit("1.2.3.4") for _ in range(10)]
+            assert server.commands == commands
+            clock[0] += rejected.retry_after + 0.01
+            later = await limiter.hit("1.2.3.4")
+            await limiter.close()
+            return first, rejected, repeated, later
+
+        first, rejected, repeated, later = asyncio.run(scenario())
+
+    assert first.allowed and not rejected.allowed
+    assert not any(result.allowed for result in repeated)
+    assert later.allowed
+
+
+def test_unavailable_backend_fails_open(clock):
+    with FakeRedisServer() as server:
+        url = server.url
+    limiter = RateLimiter(max_requests=1, window_seconds=60, backend=RedisRateLimitBackend(url, window_seconds=60))
+
+    assert hit(limiter, "1.2.3.4").allowed
+    assert hit(limiter, "1.2.3.4").allowed
+
+
+def test_middleware_adds_headers_and_rejects_with_429(clock):
+    app = FastAPI()
+    app.add_middleware(RateLimiterMiddleware, max_requests=2, window_seconds=60)
+
+    @app.get("/stream")
+    async def stream():
+        async def fragments():
+            yield "a"
+            yield "b"
+        return StreamingResponse(fragments(), media_type="text/plain")
+
+    client = TestClient(app)
+    first = client.get("/stream")
+    assert first.status_code == 200
+    assert first.text == "ab"
+    assert first.headers["X-RateLimit-Remaining"] == "1"
+
+    client.get("/stream")
+    rejected = client.get("/stream")
+    assert rejected.status_code == 429
+    assert rejected.json()["error"] == "Rate limit exceeded"
+    assert rejected.headers["Retry-After"] == "70"
@@ -0,0 +1,126 @@
+import gzip
+import os
+
+import orjson
+import zstandard
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from ..metrics import REQUEST_LATENCY
+from ..middleware import MetricsMiddleware, ORJSONRoute, RequestBodyMiddleware
+
+# The endpoint tests run against the local stub model
+os.environ.setdefault("LLM_PROVIDER", "stub")
+
+LIMIT = 1000
+
+
+class Echo(BaseModel):
+    text: str
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+    app.router.route_class = ORJSONRoute
+
+    @app.post("/echo")
+    async def echo(body: Echo):
+        return {"length": len(body.text)}
+
+    app.add_middleware(RequestBodyMiddleware, max_body_bytes=LIMIT)
+    app.add_middleware(MetricsMiddleware)
+    return TestClient(app)
+
+
+def chunks(data: bytes, size: int = 100):
+    # A generator body is sent chunked, without a Content-Length
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+def test_compressed_bodies_are_decompressed():
+    client = make_client()
+    body = orjson.dumps({"text": "é" * 300})
+    for encoding, compressed in (("gzip", gzip.compress(body)), ("zstd", zstandard.ZstdCompressor().compress(body))):
+        response = client.post("/echo", content=compressed, headers={"Content-Encoding": encoding, "Content-Type": "application/json"})
+        assert response.status_code == 200, encoding
+        assert response.json() == {"length": 300}
+
+    response = client.post("/echo", content=chunks(body), headers={"Content-Type": "application/json"})
+    assert response.json() == {"length": 300}
+
+
+def test_every_gzip_member_and_zstd_frame_is_decompressed():
+    client = make_client()
+    headers = {"Content-Type": "application/json"}
+    parts = [b'{"text": "', "é".encode() * 200, b"x" * 100, b'"}']
+    compressor = zstandard.ZstdCompressor()
+    bodies = {
+        "gzip": b"".join(gzip.compress(part) for part in parts),
+        "zstd": b"".join(compressor.compress(part) for part in parts),
+    }
+    routed = sum(REQUEST_LATENCY.labels("POST", "/echo", "200").counts)
+    for encoding, body in bodies.items():
+        # In one piece, and with the members split across uploaded chunks
+        for content in (body, chunks(body, 7)):
+            response = client.post("/echo", content=content, headers={**headers, "Content-Encoding": encoding})
+            assert response.status_code == 200, encoding
+            assert response.json() == {"length": 300}
+    # Compressed requests are still labelled with their route in the metrics
+    assert sum(REQUEST_LATENCY.labels("POST", "/echo", "200").counts) == routed + 4
+
+    # A last member or frame cut short is still an invalid body
+    for encoding, body in bodies.items():
+        truncated = body + bodies[encoding][:12]
+        assert client.post("/echo", content=truncated, headers={**headers, "Content-Encoding": encoding}).status_code == 400
+
+
+def test_oversized_bodies_are_rejected_early():
+    client = make_client()
+    body = orjson.dumps({"text": "x" * LIMIT})
+    # By their Content-Length, by what was read of a chunked body, and once decompressed
+    assert client.post("/echo", content=body, headers={"Content-Type": "application/json"}).status_code == 413
+    assert client.post("/echo", content=chunks(body), headers={"Content-Type": "application/json"}).status_code == 413
+    bombs = {"gzip": gzip.compress(b'{"text": "' + b" " * 500_000 + b'"}'), "zstd": zstandard.ZstdCompressor().compress(b" " * 10**7)}
+    for encoding, bomb in bombs.items():
+        assert len(bomb) < LIMIT
+        response = client.post("/echo", content=bomb, headers={"Content-Encoding": encoding, "Content-Type": "application/json"})
+        assert response.status_code == 413, encoding
+        assert response.json()["detail"] == f"Request body exceeds {LIMIT} bytes"
+
+
+def test_invalid_bodies():
+    client = make_client()
+    headers = {"Content-Type": "application/json"}
+    assert client.post("/echo", content=b"{}", headers={**headers, "Content-Encoding": "br"}).status_code == 415
+    assert client.post("/echo", content=b"not gzip", headers={**headers, "Content-Encoding": "gzip"}).status_code == 400
+    truncated = gzip.compress(orjson.dumps({"text": "abc"}))[:-8]
+    assert client.post("/echo", content=truncated, headers={**headers, "Content-Encoding": "gzip"}).status_code == 400
+    # orjson's decode errors still get FastAPI's validation error
+    response = client.post("/echo", content=b'{"text": ', headers=headers)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "json_invalid"
+
+
+def test_summarize_plain_text():
+    from ..main import app
+
+    # A client of its own, so that the other endpoint tests keep their rate limit
+    client = TestClient(app, client=("plain-text-test", 50000))
+    text = "Distillation uses one model to improve another. It makes decent LLMs cheaper to build."
+    response = client.post(
+        "/summarize/text?length=short&style=bullet&focus=costs",
+        content=zstandard.ZstdCompressor().compress(text.encode()),
+        headers={"Content-Type": "text/plain; charset=utf-8", "Content-Encoding": "zstd"},
+    )
+    assert response.status_code == 200
+    meta = response.json()["meta"]
+    assert (meta["length"], meta["style"], meta["focus"]) == ("short", "bullet", "costs")
+    assert meta["tokens"]["input"] > 0
+
+    latin1 = client.post("/summarize/text?length=short&style=bullet", content="Café prices rose.".encode("latin-1"), headers={"Content-Type": "text/plain; charset=latin-1"})
+    assert latin1.status_code == 200
+    assert client.post("/summarize/text?length=short&style=bullet", content=b"\xff\xfe", headers={"Content-Type": "text/plain"}).status_code == 400
+    assert client.post("/summarize/text?length=tiny&style=bullet", content=b"Some text.").status_code == 422
+    assert client.post("/summarize/text?length=short&style=bullet", content=b"  \n ").status_code == 400
@@ -0,0 +1,62 @@
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ..middleware import RequestLoggingMiddleware
+
+logger = logging.getLogger("test_request_logging")
+
+
+def make_client():
+    app = FastAPI()
+    app.add_middleware(RequestLoggingMiddleware, logger=logger)
+
+    @app.get("/ok")
+    async def ok():
+        return {"ok": True}
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def logged_messages(caplog) -> list:
+    # Other loggers (e.g. httpx) also log at INFO once the root logger is configured
+    return [record.getMessage() for record in caplog.records if record.name == logger.name]
+
+
+def test_requests_are_logged_with_status_and_timing(caplog):
+    with caplog.at_level(logging.INFO, logger=logger.name):
+        assert make_client().get("/ok").status_code == 200
+
+    messages = logged_messages(caplog)
+    assert messages[0] == "🔵 GET /ok - Client: testclient"
+    assert messages[1].startswith("🟢 GET /ok - Status: 200 - Time: ")
+
+
+def test_unhandled_exceptions_are_logged_as_500(caplog):
+    with caplog.at_level(logging.INFO, logger=logger.name):
+        assert make_client().get("/boom").status_code == 500
+
+    assert logged_messages(caplog)[-1].startswith("🔴 GET /boom - Status: 500 - Time: ")
+
+
+def test_sampling_keeps_only_a_fraction_of_successful_requests(caplog):
+    app = FastAPI()
+    app.add_middleware(RequestLoggingMiddleware, logger=logger, sample_rate=0.0)
+
+    @app.get("/ok")
+    async def ok():
+        return {"ok": True}
+
+    client = TestClient(app)
+    with caplog.at_level(logging.INFO, logger=logger.name):
+        client.get("/ok")
+        client.get("/missing")
+
+    messages = logged_messages(caplog)
+    assert len(messages) == 1
+    assert messages[0].startswith("🔴 GET /missing - Status: 404 - Time: ")
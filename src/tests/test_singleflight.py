@@ -0,0 +1,122 @@
+import asyncio
+import os
+from time import monotonic
+
+import httpx
+import pytest
+
+from ..cache import SingleFlight
+
+# The endpoint test runs against the local stub model
+os.environ.setdefault("LLM_PROVIDER", "stub")
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return "summary"
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do("key", call) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert calls == 1
+    assert [summary for summary, _ in results] == ["summary"] * 5
+    assert [shared for _, shared in results] == [False, True, True, True, True]
+    assert flights.coalesced == 4
+    assert len(flights) == 0
+
+
+def test_errors_are_propagated_to_every_caller():
+    flights = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream failed")
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do("key", call) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(flights) == 0
+
+
+def test_cancelling_one_caller_keeps_the_shared_call_running():
+    flights = SingleFlight()
+
+    async def scenario():
+        first = asyncio.ensure_future(flights.do("key", lambda: asyncio.sleep(0.05, result="done")))
+        second = asyncio.ensure_future(flights.do("key", lambda: asyncio.sleep(0, result="other")))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == ("done", True)
+
+
+def test_cancelling_the_last_caller_cancels_the_call():
+    flights = SingleFlight()
+    finished = False
+
+    async def call():
+        nonlocal finished
+        await asyncio.sleep(0.05)
+        finished = True
+
+    async def scenario():
+        caller = asyncio.ensure_future(flights.do("key", call))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        await asyncio.sleep(0.1)
+
+    asyncio.run(scenario())
+    assert finished is False
+    assert len(flights) == 0
+
+
+def test_each_caller_waits_until_its_own_deadline():
+    flights = SingleFlight()
+
+    async def scenario():
+        impatient = asyncio.ensure_future(
+            flights.do("key", lambda: asyncio.sleep(0.05, result="done"), deadline=monotonic() + 0.01)
+        )
+        patient = asyncio.ensure_future(flights.do("key", lambda: asyncio.sleep(0, result="other"), deadline=monotonic() + 1))
+        with pytest.raises(TimeoutError):
+            await impatient
+        return await patient
+
+    assert asyncio.run(scenario()) == ("done", True)
+
+
+def test_coalesced_requests_keep_their_own_deadline(monkeypatch):
+    from .. import main
+
+    # Constant latency, so that the shared call outlives the first deadline only
+    stub = asyncio.run(main.llm.start())
+    monkeypatch.setattr(stub, "latency", 0.3)
+    monkeypatch.setattr(stub, "latency_distribution", "constant")
+    # A client address of its own, so that the other endpoint tests keep their rate limit
+    transport = httpx.ASGITransport(app=main.app, client=("singleflight-test", 50000))
+    body = {"text": "Deadlines of coalesced requests are checked one by one. " * 20, "length": "short", "style": "bullet"}
+    coalesced = main.single_flight.coalesced
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+            impatient = asyncio.ensure_future(client.post("/summarize", json=body, headers={"X-Request-Timeout": "0.1"}))
+            await asyncio.sleep(0.02)
+            patient = await client.post("/summarize", json=body)
+            return await impatient, patient
+
+    impatient, patient = asyncio.run(scenario())
+    assert main.single_flight.coalesced == coalesced + 1
+    assert impatient.status_code == 504
+    assert patient.status_code == 200 and patient.json()["summary"]
@@ -0,0 +1,59 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# The endpoint tests run against the local stub model (set before the settings are read)
+os.environ.setdefault("LLM_PROVIDER", "stub")
+
+from ..config import settings
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Prints which heavy packages importing the modules pulled in
+IMPORTED_PACKAGES = """
+import json, sys
+import src.main, tools.langchain_integration
+print(json.dumps(sorted({name.split(".")[0] for name in sys.modules} & {"google", "numpy", "langchain_community"})))
+"""
+
+
+def test_imports_defer_heavy_packages():
+    # Gemini without a key: importing must neither fail nor build the client
+    environment = {**os.environ, "LLM_PROVIDER": "gemini", "GEMINI_API_KEY": ""}
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORTED_PACKAGES], cwd=PROJECT_ROOT, env=environment, capture_output=True, text=True, check=True
+    )
+    assert json.loads(result.stdout) == []
+
+
+def test_invalid_settings_are_rejected_by_the_factory(monkeypatch):
+    from ..main import check_settings
+
+    monkeypatch.setattr(settings, "LLM_PROVIDER", "gemini")
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "")
+    with pytest.raises(ValueError):
+        check_settings()
+
+
+def test_health_and_readiness():
+    from ..main import create_app
+
+    app = create_app()
+    # Without the lifespan the client is never built: alive, but not ready
+    client = TestClient(app)
+    assert client.get("/health").json() == {"status": "ok"}
+    assert client.get("/ready").status_code == 503
+
+    with TestClient(app) as client:
+        deadline = time.monotonic() + 10
+        while (response := client.get("/ready")).status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert response.json() == {"status": "ready", "provider": True}
+    assert client.get("/health").status_code == 200
+    assert app.state.ready is False
@@ -0,0 +1,205 @@
+import asyncio
+import json
+import os
+import time
+
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from langchain_core.callbacks import AsyncCallbackHandler, BaseCallbackHandler
+from langchain_core.tools import ToolException
+
+from benchmarks.bench_agent_tool import CountingApp
+from benchmarks.fake_gemini import BackgroundServer
+from tools.langchain_integration import StreamingSummarizationTool
+from tools.summarization_client import SummarizationClient
+
+# Run against the local stub model
+os.environ.setdefault("LLM_PROVIDER", "stub")
+
+TEXT = "Streaming sends the first words of a summary long before the whole summary is ready. "
+
+
+def parse_events(body: str) -> list:
+    """(event, data) pairs of a server-sent events body; fails on malformed framing."""
+    events = []
+    for block in body.split("\n\n")[:-1]:
+        event, data = block.split("\n")
+        assert event.startswith("event: ") and data.startswith("data: ")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    assert body.endswith("\n\n")
+    return events
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    from .. import main
+
+    stub = asyncio.run(main.llm.start())
+    monkeypatch.setattr(stub, "latency", 0)
+    monkeypatch.setattr(stub, "chunk_delay", 0)
+    return stub
+
+
+@pytest.fixture
+def client():
+    from ..main import app
+
+    # A client address of its own, so that the other endpoint tests keep their rate limit
+    return TestClient(app, client=("stream-test", 50000))
+
+
+def test_summary_is_streamed_then_replayed_from_the_cache(stub, client):
+    request = {"text": TEXT + "Fresh.", "length": "short", "style": "bullet"}
+
+    response = client.post("/summarize/stream", json=request)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    names = [event for event, _ in events]
+    assert names[-1] == "meta" and set(names[:-1]) == {"summary"} and len(names) > 2
+    summary = "".join(data["text"] for event, data in events if event == "summary")
+    meta = events[-1][1]
+    assert meta["length"] == "short" and meta["style"] == "bullet" and meta["cached"] is False
+
+    replayed = parse_events(client.post("/summarize/stream", json=request).text)
+    assert [event for event, _ in replayed] == ["summary", "meta"]
+    assert replayed[0][1]["text"] == summary.strip()
+    assert replayed[1][1]["cached"] is True
+
+
+def test_upstream_failure_after_the_first_fragment_is_an_error_event(stub, client, monkeypatch):
+    async def failing_fragments(summary: str):
+        yield "First"
+        raise RuntimeError("connection reset")
+
+    monkeypatch.setattr(stub, "_fragments", failing_fragments)
+    response = client.post("/summarize/stream", json={"text": TEXT + "Failing.", "length": "short", "style": "bullet"})
+
+    assert response.status_code == 200
+    events = parse_events(response.text)
+    assert events[0] == ("summary", {"text": "First"})
+    assert events[-1][0] == "error" and "connection reset" in events[-1][1]["detail"]
+    assert "meta" not in [event for event, _ in events]
+
+
+def test_client_disconnect_closes_the_upstream_stream(stub, monkeypatch):
+    from ..main import app
+
+    closed = asyncio.Event()
+
+    async def endless_fragments(summary: str):
+        try:
+            while True:
+                yield "word "
+                await asyncio.sleep(0.01)
+        finally:
+            closed.set()
+
+    monkeypatch.setattr(stub, "_fragments", endless_fragments)
+    body = orjson.dumps({"text": TEXT + "Disconnecting.", "length": "short", "style": "bullet"})
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/summarize/stream",
+        "raw_path": b"/summarize/stream",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("stream-disconnect-test", 50000),
+        "server": ("testserver", 80),
+    }
+
+    async def scenario():
+        first_chunk = asyncio.Event()
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # The client goes away once the first fragment arrived
+            await first_chunk.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                first_chunk.set()
+
+        start = time.perf_counter()
+        await asyncio.wait_for(app(scope, receive, send), 5)
+        await asyncio.wait_for(closed.wait(), 1)
+        return time.perf_counter() - start
+
+    # The response ends with the disconnect, not after the (endless) stream
+    assert asyncio.run(scenario()) < 1
+
+
+class TextCollector(BaseCallbackHandler):
+    def __init__(self):
+        self.fragments = []
+
+    def on_text(self, text: str, **kwargs):
+        self.fragments.append(text)
+
+
+class AsyncTextCollector(AsyncCallbackHandler):
+    def __init__(self):
+        self.fragments = []
+
+    async def on_text(self, text: str, **kwargs):
+        self.fragments.append(text)
+
+
+def create_streaming_app() -> FastAPI:
+    """An API with /summarize/stream only, streaming fixed fragments or an error event."""
+    app = FastAPI()
+
+    @app.post("/summarize/stream")
+    async def summarize_stream(request: dict):
+        def event(name: str, data: dict) -> str:
+            return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+        async def events():
+            yield event("summary", {"text": "Hello"})
+            if request["text"] == "fail":
+                yield event("error", {"detail": "Error generating summary: boom"})
+                return
+            yield event("summary", {"text": " world"})
+            yield event("meta", {"length": request["length"]})
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def test_streaming_tool_forwards_fragments_and_raises_error_events():
+    app = CountingApp(create_streaming_app())
+    arguments = {"text": "text", "length": "short", "style": "bullet"}
+    with BackgroundServer(app) as server:
+        tool = StreamingSummarizationTool(client=SummarizationClient(base_url=server.url, timeout=5))
+        collector = TextCollector()
+        assert tool.invoke(arguments, config={"callbacks": [collector]}) == "Hello world"
+        assert collector.fragments == ["Hello", " world"]
+        with pytest.raises(ToolException, match="boom"):
+            tool.invoke({**arguments, "text": "fail"})
+
+        async def main():
+            collector = AsyncTextCollector()
+            summary = await tool.ainvoke(arguments, config={"callbacks": [collector]})
+            with pytest.raises(ToolException, match="boom"):
+                await tool.ainvoke({**arguments, "text": "fail"})
+            await tool.client.aclose()
+            return summary, collector.fragments
+
+        assert asyncio.run(main()) == ("Hello world", ["Hello", " world"])
+        tool.client.close()
+
+    # One pooled connection for the sync calls, one for the async calls
+    assert app.requests == 4 and len(app.connections) == 2
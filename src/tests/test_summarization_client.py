@@ -0,0 +1,124 @@
+import asyncio
+import os
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from langchain_core.tools import ToolException
+
+from benchmarks.fake_gemini import BackgroundServer
+from tools.langchain_integration import SummarizationTool
+from tools.summarization_client import SummarizationClient, SummarizationError
+
+# The client tests run against the local stub model
+os.environ.setdefault("LLM_PROVIDER", "stub")
+
+TEXTS = [f"Distillation uses one model to improve another, which makes LLM number {index} cheaper to build." for index in range(4)]
+
+
+def create_single_endpoint_app() -> FastAPI:
+    """An API with /summarize only (no batch endpoint), that counts its requests."""
+    app = FastAPI()
+    app.state.requests = 0
+
+    @app.post("/summarize")
+    async def summarize(request: dict):
+        app.state.requests += 1
+        return {"summary": request["text"].upper(), "meta": {"length": request["length"]}}
+
+    return app
+
+
+def api_client(**options) -> SummarizationClient:
+    from ..main import app
+
+    # A client address of its own, so that the other endpoint tests keep their rate limit
+    transport = httpx.ASGITransport(app=app, client=("summarization-client-test", 50000))
+    return SummarizationClient(base_url="http://api", transport=transport, **options)
+
+
+def test_concurrent_calls_are_batched_and_cached():
+    client = api_client()
+
+    async def main():
+        calls = [client.asummarize(text, "short", "bullet") for text in TEXTS]
+        # Identical to the first call: shares its batch item
+        calls.append(client.asummarize(TEXTS[0], "short", "bullet"))
+        results = await asyncio.gather(*calls)
+        again = await client.asummarize(TEXTS[1], "short", "bullet")
+        await client.aclose()
+        return results, again
+
+    results, again = asyncio.run(main())
+    assert client.requests == client.batches == 1
+    assert client.batch_supported is True
+    assert client.coalesced == 1
+    assert all(result["summary"] and result["meta"]["style"] == "bullet" for result in results)
+    assert results[4] == results[0]
+    # Served from the LRU, without a request
+    assert again == results[1]
+    assert client.hits == 1 and client.requests == 1
+
+
+def test_batch_item_errors_fail_their_call_only():
+    client = api_client(cache_size=0)
+
+    async def main():
+        return await asyncio.gather(
+            client.asummarize("   ", "short", "bullet"),
+            client.asummarize(TEXTS[0], "long", "paragraph"),
+            return_exceptions=True,
+        )
+
+    failed, succeeded = asyncio.run(main())
+    assert isinstance(failed, SummarizationError) and failed.status_code == 400
+    assert succeeded["summary"]
+
+
+def test_calls_are_sent_one_by_one_without_a_batch_endpoint():
+    app = create_single_endpoint_app()
+    client = SummarizationClient(base_url="http://api", transport=httpx.ASGITransport(app=app), cache_size=2)
+
+    async def main():
+        first = await asyncio.gather(*(client.asummarize(text, "short", "bullet") for text in TEXTS[:3]))
+        second = await asyncio.gather(*(client.asummarize(text, "short", "bullet") for text in TEXTS[:3]))
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert [result["summary"] for result in first] == [text.upper() for text in TEXTS[:3]]
+    assert second == first
+    assert client.batch_supported is False
+    # One rejected batch, three calls, then the two most recent from the LRU and one again
+    assert client.batches == 1 and app.state.requests == 4
+    assert client.hits == 2
+
+
+def test_tool_sync_and_async():
+    app = create_single_endpoint_app()
+    with BackgroundServer(app) as server:
+        tool = SummarizationTool(client=SummarizationClient(base_url=server.url, timeout=5))
+        arguments = {"text": TEXTS[0], "length": "short", "style": "bullet"}
+        assert tool.invoke(arguments) == TEXTS[0].upper()
+        assert asyncio.run(tool.ainvoke({**arguments, "text": TEXTS[1]})) == TEXTS[1].upper()
+        assert tool.invoke(arguments) == TEXTS[0].upper()
+        assert app.state.requests == 2
+        tool.client.close()
+
+    failing = SummarizationTool(client=api_client())
+    with pytest.raises(ToolException):
+        asyncio.run(failing.ainvoke({"text": " ", "length": "short", "style": "bullet"}))
+
+
+def test_client_of_a_finished_event_loop_is_closed():
+    client = api_client(cache_size=0)
+    clients = []
+
+    async def main():
+        await client.asummarize(TEXTS[0], "short", "bullet")
+        clients.append(client._async.client)
+
+    # Each asyncio.run is a new event loop, which needs a client of its own
+    asyncio.run(main())
+    assert clients[0].is_closed
+    asyncio.run(main())
+    assert clients[1] is not clients[0] and clients[1].is_closed
@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+from ..cache import MemoryCacheBackend, SQLiteCacheBackend, SummaryCache
+
+
+def make_key(text, **overrides):
+    options = {
+        "length": "short",
+        "style": "bullet",
+        "focus": None,
+        "model": "gemini-2.5-flash",
+        "system_instruction": "sys",
+    }
+    options.update(overrides)
+    return SummaryCache.make_key(text=text, **options)
+
+
+def test_key_ignores_whitespace_but_not_options():
+    assert make_key("Hello   world\n") == make_key(" Hello world")
+    assert make_key("Hello world") != make_key("Hello world", length="long")
+    assert make_key("Hello world") != make_key("Hello world", focus="costs")
+    assert make_key("Hello world") != make_key("Hello world", system_instruction="other")
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryCacheBackend(max_entries=2, ttl_seconds=60)
+    backend.set("a", "1")
+    backend.set("b", "2")
+    backend.get("a")
+    backend.set("c", "3")
+
+    assert backend.get("b") is None
+    assert backend.get("a") == "1"
+    assert backend.get("c") == "3"
+    assert backend.evictions == 1
+
+
+def test_memory_backend_expires_entries():
+    backend = MemoryCacheBackend(max_entries=10, ttl_seconds=0.01)
+    backend.set("a", "1")
+    time.sleep(0.02)
+    assert backend.get("a") is None
+    assert backend.evictions == 1
+
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    writer = SQLiteCacheBackend(path, max_entries=2, ttl_seconds=60)
+    reader = SQLiteCacheBackend(path, max_entries=2, ttl_seconds=60)
+
+    writer.set("a", "1")
+    assert reader.get("a") == "1"
+
+    writer.set("b", "2")
+    writer.set("c", "3")
+    assert len(reader) == 2
+    assert writer.evictions == 1
+
+
+def test_summary_cache_counts_hits_and_misses(tmp_path):
+    cache = SummaryCache(SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), max_entries=10, ttl_seconds=60))
+
+    async def scenario():
+        assert await cache.get("k") is None
+        await cache.set("k", "summary")
+        assert await cache.get("k") == "summary"
+
+    asyncio.run(scenario())
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_disabled_cache_stores_nothing():
+    cache = SummaryCache(None)
+
+    async def scenario():
+        await cache.set("k", "summary")
+        return await cache.get("k")
+
+    assert asyncio.run(scenario()) is None
+    assert cache.stats()["enabled"] is False
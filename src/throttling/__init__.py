@@ -1 +1,8 @@
-from .rate_limiter import RateLimiterMiddleware
\ No newline at end of file
+from .backends import (
+    MemoryRateLimitBackend,
+    RateLimitBackend,
+    RedisRateLimitBackend,
+    SQLiteRateLimitBackend,
+    create_rate_limit_backend,
+)
+from .rate_limiter import RateLimiter, RateLimiterMiddleware, RateLimitResult, client_key
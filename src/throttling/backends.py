@@ -0,0 +1,421 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import weakref
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+
+class RateLimitBackend:
+    """
+    Interface of a rate limit state backend.
+
+    A backend stores the request counts of every client in the current and the
+    previous fixed window, and implements the check-and-increment of the
+    sliding-window counter atomically, so that several processes sharing one
+    backend never admit more requests than the limit together.
+    """
+
+    # Whether other processes update the counts too
+    shared = False
+
+    async def hit(self, client_id: str, window: int, weight: float, cost: int, max_requests: int) -> Tuple[int, int, bool]:
+        """
+        Charge `cost` requests to a client if its quota allows it.
+
+        Args:
+            client_id: The client to charge
+            window: Index of the current fixed window
+            weight: Fraction of the previous window still inside the sliding window
+            cost: Number of requests to charge at once
+            max_requests: The client's quota
+
+        Returns:
+            The client's previous and current window counts after the call,
+            and whether the requests were allowed
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+def _roll_window(stored_window: int, previous: int, current: int, window: int) -> Tuple[int, int]:
+    """Shift stored counts into `window`, returning its (previous, current) counts."""
+    if stored_window == window:
+        return previous, current
+    return (current if stored_window == window - 1 else 0), 0
+
+
+class _ClientWindow:
+    """Request counts of one client in the current and previous window."""
+
+    __slots__ = ("window", "previous", "current")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.previous = 0
+        self.current = 0
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process counts, kept in LRU order.
+
+    Clients whose counts have fully expired are evicted lazily (a few per
+    call, oldest first), and at most `max_clients` are tracked at once; past
+    that the least recently seen client is dropped.
+    """
+
+    # Idle clients evicted per call, which keeps the cost of a call O(1)
+    EVICTIONS_PER_HIT = 2
+
+    def __init__(self, max_clients: int = 100_000):
+        self.max_clients = max_clients
+        self.clients = OrderedDict()
+        # First window in which the least recently seen client may be idle
+        self._next_sweep_window = 0
+
+    async def hit(self, client_id: str, window: int, weight: float, cost: int, max_requests: int) -> Tuple[int, int, bool]:
+        clients = self.clients
+
+        # Lazily evict the least recently seen clients once their counts
+        # have fully expired (older than the previous window)
+        if window >= self._next_sweep_window:
+            self._evict_idle(window)
+
+        state = clients.get(client_id)
+        if state is None:
+            state = clients[client_id] = _ClientWindow(window)
+            if len(clients) > self.max_clients:
+                clients.popitem(last=False)
+        else:
+            clients.move_to_end(client_id)
+            if state.window != window:
+                state.previous, state.current = _roll_window(state.window, state.previous, state.current, window)
+                state.window = window
+
+        allowed = state.previous * weight + state.current + cost <= max_requests
+        if allowed:
+            state.current += cost
+        return state.previous, state.current, allowed
+
+    def _evict_idle(self, window: int) -> None:
+        clients = self.clients
+        for _ in range(self.EVICTIONS_PER_HIT):
+            if not clients:
+                self._next_sweep_window = window + 2
+                return
+            oldest_id = next(iter(clients))
+            oldest_window = clients[oldest_id].window
+            if oldest_window >= window - 1:
+                self._next_sweep_window = oldest_window + 2
+                return
+            del clients[oldest_id]
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """
+    On-disk counts shared by every worker process on the host.
+
+    Each check-and-increment runs in its own write transaction (BEGIN
+    IMMEDIATE), which serializes it with the other processes, on a worker
+    thread so the event loop is not blocked. Rows of clients idle for a full
+    window are deleted once per window.
+    """
+
+    shared = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._next_sweep_window = 0
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            " client TEXT PRIMARY KEY,"
+            " window INTEGER NOT NULL,"
+            " previous INTEGER NOT NULL,"
+            " current INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS rate_limits_window ON rate_limits (window)")
+
+    async def hit(self, client_id: str, window: int, weight: float, cost: int, max_requests: int) -> Tuple[int, int, bool]:
+        return await asyncio.to_thread(self._hit, client_id, window, weight, cost, max_requests)
+
+    def _hit(self, client_id: str, window: int, weight: float, cost: int, max_requests: int) -> Tuple[int, int, bool]:
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT window, previous, current FROM rate_limits WHERE client = ?", (client_id,)
+                ).fetchone()
+                previous, current = _roll_window(*row, window) if row else (0, 0)
+
+                allowed = previous * weight + current + cost <= max_requests
+                if allowed:
+                    current += cost
+                conn.execute(
+                    "INSERT OR REPLACE INTO rate_limits (client, window, previous, current) VALUES (?, ?, ?, ?)",
+                    (client_id, window, previous, current),
+                )
+
+                if window >= self._next_sweep_window:
+                    conn.execute("DELETE FROM rate_limits WHERE window < ?", (window - 1,))
+                    self._next_sweep_window = window + 1
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return previous, current, allowed
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+
+class RedisError(Exception):
+    """An error reply from the Redis server."""
+
+
+class _RedisConnection:
+    """
+    One RESP connection with pipelining.
+
+    Commands are written as soon as they are issued, without waiting for the
+    replies of earlier ones; a reader task matches replies to commands in
+    order. Concurrent requests therefore share round-trips instead of queueing
+    behind each other.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._pending = deque()
+        self.closed = False
+        self._reader_task = asyncio.create_task(self._read_replies())
+
+    @classmethod
+    async def open(cls, host: str, port: int, db: int, password: Optional[str]) -> "_RedisConnection":
+        reader, writer = await asyncio.open_connection(host, port)
+        connection = cls(reader, writer)
+        setup = []
+        if password:
+            setup.append(("AUTH", password))
+        if db:
+            setup.append(("SELECT", db))
+        if setup:
+            try:
+                await connection.execute_many(setup)
+            except BaseException:
+                await connection.close()
+                raise
+        return connection
+
+    @staticmethod
+    def _encode(command) -> bytes:
+        parts = [b"*%d\r\n" % len(command)]
+        for arg in command:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    async def execute_many(self, commands) -> list:
+        """Send several commands in one write and return their replies."""
+        if self.closed:
+            raise ConnectionError("Redis connection is closed")
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in commands]
+        self._pending.extend(futures)
+        self._writer.write(b"".join(self._encode(command) for command in commands))
+        replies = await asyncio.gather(*futures, return_exceptions=True)
+        for reply in replies:
+            if isinstance(reply, BaseException):
+                raise reply
+        return replies
+
+    async def execute(self, *command):
+        return (await self.execute_many([command]))[0]
+
+    async def _read_reply(self):
+        line = await self._reader.readuntil(b"\r\n")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode("utf-8")
+        if kind == b"-":
+            return RedisError(payload.decode("utf-8"))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            return (await self._reader.readexactly(length + 2))[:-2]
+        if kind == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            return [await self._read_reply() for _ in range(length)]
+        raise ConnectionError(f"Unexpected reply from Redis: {line!r}")
+
+    async def _read_replies(self):
+        try:
+            while True:
+                reply = await self._read_reply()
+                future = self._pending.popleft()
+                if future.done():
+                    continue
+                if isinstance(reply, RedisError):
+                    future.set_exception(reply)
+                else:
+                    future.set_result(reply)
+        except (asyncio.IncompleteReadError, ConnectionError, OSError) as exc:
+            error = ConnectionError(f"Redis connection lost: {exc}")
+        except asyncio.CancelledError:
+            error = ConnectionError("Redis connection closed")
+        self.closed = True
+        while self._pending:
+            future = self._pending.popleft()
+            if not future.done():
+                future.set_exception(error)
+
+    async def close(self) -> None:
+        self.closed = True
+        self._reader_task.cancel()
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+
+# Check-and-increment of one client, run atomically by the Redis server.
+# KEYS: current and previous window counts; ARGV: weight, cost, quota, TTL
+REDIS_HIT_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or 0)
+local previous = tonumber(redis.call('GET', KEYS[2]) or 0)
+if previous * tonumber(ARGV[1]) + current + tonumber(ARGV[2]) > tonumber(ARGV[3]) then
+    return {previous, current, 0}
+end
+current = redis.call('INCRBY', KEYS[1], ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return {previous, current, 1}
+"""
+REDIS_HIT_SCRIPT_SHA = hashlib.sha1(REDIS_HIT_SCRIPT.encode()).hexdigest()
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Counts shared by every replica through a Redis server.
+
+    Each window's count is a separate key that expires after two windows.
+    A call is a single round-trip: a Lua script (EVALSHA, sent with EVAL
+    the first time a server lacks it) checks the quota and increments the
+    current window atomically, so the count never overshoots and concurrent
+    callers never see each other's rejected requests. Only the RESP protocol
+    is used, so any Redis-compatible server works and no client library is
+    required.
+
+    Connections are bound to an event loop, so one is opened per loop.
+    """
+
+    shared = True
+
+    def __init__(self, url: str, window_seconds: int, key_prefix: str = "ratelimit:"):
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError(f"Unsupported Redis URL: {url!r}")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.key_ttl = 2 * window_seconds
+        self.key_prefix = key_prefix
+        self._connections = weakref.WeakKeyDictionary()
+        self._connect_locks = weakref.WeakKeyDictionary()
+
+    async def _connection(self) -> _RedisConnection:
+        loop = asyncio.get_running_loop()
+        connection = self._connections.get(loop)
+        if connection is not None and not connection.closed:
+            return connection
+        lock = self._connect_locks.setdefault(loop, asyncio.Lock())
+        async with lock:
+            connection = self._connections.get(loop)
+            if connection is None or connection.closed:
+                connection = await _RedisConnection.open(self.host, self.port, self.db, self.password)
+                self._connections[loop] = connection
+        return connection
+
+    async def hit(self, client_id: str, window: int, weight: float, cost: int, max_requests: int) -> Tuple[int, int, bool]:
+        connection = await self._connection()
+        keys_and_args = (
+            2,
+            f"{self.key_prefix}{client_id}:{window}",
+            f"{self.key_prefix}{client_id}:{window - 1}",
+            repr(weight),
+            cost,
+            max_requests,
+            self.key_ttl,
+        )
+        try:
+            previous, current, allowed = await connection.execute("EVALSHA", REDIS_HIT_SCRIPT_SHA, *keys_and_args)
+        except RedisError as exc:
+            if not str(exc).startswith("NOSCRIPT"):
+                raise
+            # Not in the server's script cache yet (or flushed): EVAL caches it
+            previous, current, allowed = await connection.execute("EVAL", REDIS_HIT_SCRIPT, *keys_and_args)
+        return previous, current, bool(allowed)
+
+    async def close(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        connection = self._connections.pop(loop, None)
+        if connection is not None:
+            await connection.close()
+
+
+def create_rate_limit_backend(
+    kind: str,
+    window_seconds: int,
+    max_clients: int = 100_000,
+    sqlite_path: str = None,
+    redis_url: str = None,
+) -> RateLimitBackend:
+    """
+    Build the rate limit backend selected by configuration.
+
+    Args:
+        kind: memory, sqlite, or redis
+        window_seconds: Rate limit window length
+        max_clients: Maximum clients tracked by the memory backend
+        sqlite_path: Database file for the sqlite backend
+        redis_url: Server URL for the redis backend (redis://[:password@]host:port/db)
+
+    Returns:
+        The backend
+    """
+    if kind == "memory":
+        return MemoryRateLimitBackend(max_clients=max_clients)
+    if kind == "sqlite":
+        return SQLiteRateLimitBackend(sqlite_path)
+    if kind == "redis":
+        return RedisRateLimitBackend(redis_url, window_seconds=window_seconds)
+    raise ValueError(f"Unknown rate limit backend: {kind!r}")
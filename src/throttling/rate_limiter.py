@@ -1,43 +1,206 @@
-from collections import defaultdict
-from fastapi import FastAPI, Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
+import math
+from collections import OrderedDict
+from typing import NamedTuple
+from starlette.datastructures import MutableHeaders
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from time import time
 
-class RateLimiterMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app: FastAPI, max_requests: int, window_seconds: int):
-        super().__init__(app)
+from utils.logging_config import get_logger
+
+from ..metrics import span
+from .backends import MemoryRateLimitBackend, RateLimitBackend
+
+logger = get_logger(__name__)
+
+def client_key(scope: Scope) -> str:
+    """The client a request is rate limited as: its address, or "unknown" without one (e.g. on a Unix socket)."""
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    # Seconds until the full quota is available again
+    reset_after: float
+    # Seconds until the rejected request would have been allowed
+    retry_after: float
+
+class RateLimiter:
+    """
+    Allows at most `max_requests` per `window_seconds` for each client.
+
+    Uses a sliding-window counter: each client only stores the request counts
+    of the current and the previous fixed window, and the previous count is
+    weighted by how much of it still overlaps the sliding window. Memory per
+    client is constant.
+
+    The counts live in a pluggable backend: in process memory by default, or
+    in a store shared by every worker and replica. With a shared backend, a
+    rejected client is remembered locally until its Retry-After has passed,
+    so clients hammering the API past their quota cost no round-trips.
+    """
+
+    def __init__(
+        self,
+        max_requests: int,
+        window_seconds: int,
+        max_clients: int = 100_000,
+        backend: RateLimitBackend = None,
+    ):
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self.clients = defaultdict(list)
-
-    async def dispatch(self, request: Request, call_next):
-        client_ip = request.client.host
-        current_time = time()
-
-        # Clean up old requests
-        self.clients[client_ip] = [
-            timestamp for timestamp in self.clients[client_ip]
-            if current_time - timestamp < self.window_seconds
-        ]
-
-        # Check if the client exceeds the rate limit
-        if len(self.clients[client_ip]) >= self.max_requests:
-            return JSONResponse(
-                status_code=429,
-                content={
-                    "error": "Rate limit exceeded",
-                    "message": f"Maximum {self.max_requests} requests per {self.window_seconds} seconds allowed",
-                    "retry_after_seconds": self.window_seconds
-                },
-                headers={
-                    "Retry-After": str(self.window_seconds),
-                    "X-RateLimit-Limit": str(self.max_requests),
-                    "X-RateLimit-Window": str(self.window_seconds)
-                }
-            )
-
-        # Record the current request
-        self.clients[client_ip].append(current_time)
-
-        return await call_next(request)
\ No newline at end of file
+        self.max_clients = max_clients
+        self.backend = backend if backend is not None else MemoryRateLimitBackend(max_clients)
+        # client_id -> (retry at, rejected cost, reset at), for shared backends
+        self._rejected = OrderedDict()
+        # Number of rejected calls
+        self.rejections = 0
+
+    async def hit(self, client_id: str, cost: int = 1) -> RateLimitResult:
+        """
+        Charge `cost` requests to a client if its quota allows it.
+
+        If the backend is unavailable the request is allowed (fail open).
+
+        Args:
+            client_id: The client to charge (e.g. its IP address)
+            cost: Number of requests to charge at once
+
+        Returns:
+            Whether the requests were allowed, with the client's remaining quota
+        """
+        now = time()
+        if self._rejected:
+            rejected = self._rejected.get(client_id)
+            if rejected is not None:
+                retry_at, rejected_cost, reset_at = rejected
+                if now < retry_at and cost >= rejected_cost:
+                    self.rejections += 1
+                    return RateLimitResult(False, self.max_requests, 0, reset_at - now, retry_at - now)
+                del self._rejected[client_id]
+
+        window_seconds = self.window_seconds
+        window = int(now // window_seconds)
+        offset = now - window * window_seconds
+        weight = 1 - offset / window_seconds
+
+        try:
+            previous, current, allowed = await self.backend.hit(client_id, window, weight, cost, self.max_requests)
+        except Exception as exc:
+            logger.warning("⚠️ Rate limit backend unavailable, allowing request: %s: %s", type(exc).__name__, exc)
+            return RateLimitResult(True, self.max_requests, max(0, self.max_requests - cost), 0.0, 0.0)
+
+        used = previous * weight + current
+        reset_after = self._reset_after(previous, current, offset)
+        retry_after = 0.0 if allowed else self._retry_after(previous, current, offset, cost)
+        if not allowed:
+            self.rejections += 1
+            if self.backend.shared:
+                self._rejected[client_id] = (now + retry_after, cost, now + reset_after)
+                if len(self._rejected) > self.max_clients:
+                    self._rejected.popitem(last=False)
+
+        return RateLimitResult(
+            allowed,
+            self.max_requests,
+            max(0, int(self.max_requests - used)),
+            reset_after,
+            retry_after,
+        )
+
+    def _reset_after(self, previous: int, current: int, offset: float) -> float:
+        if current:
+            return 2 * self.window_seconds - offset
+        if previous:
+            return self.window_seconds - offset
+        return 0.0
+
+    def _retry_after(self, previous: int, current: int, offset: float, cost: int) -> float:
+        free = self.max_requests - cost
+        if free < 0:
+            # The request can never fit
+            return float(self.window_seconds)
+        # Still within the current window, once enough of the previous one slid out
+        if current <= free and previous:
+            needed_overlap = (free - current) / previous
+            return max(0.0, self.window_seconds * (1 - needed_overlap) - offset)
+        if not current:
+            # Nothing to wait for in this window (the counts changed since
+            # the check): retry once it rolls over
+            return self.window_seconds - offset
+        # In the next window, where the current count becomes the previous one
+        needed_overlap = free / current
+        return self.window_seconds - offset + self.window_seconds * (1 - needed_overlap)
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+    def headers(self, result: RateLimitResult) -> dict:
+        """Rate limit headers describing the client's quota after a request."""
+        return {
+            "X-RateLimit-Limit": str(result.limit),
+            "X-RateLimit-Remaining": str(result.remaining),
+            "X-RateLimit-Reset": str(math.ceil(result.reset_after)),
+            "X-RateLimit-Window": str(self.window_seconds)
+        }
+
+    def limit_exceeded_response(self, result: RateLimitResult) -> JSONResponse:
+        """The 429 response returned once a client exceeds its quota."""
+        retry_after = max(1, math.ceil(result.retry_after))
+        return JSONResponse(
+            status_code=429,
+            content={
+                "error": "Rate limit exceeded",
+                "message": f"Maximum {self.max_requests} requests per {self.window_seconds} seconds allowed",
+                "retry_after_seconds": retry_after
+            },
+            headers={"Retry-After": str(retry_after), **self.headers(result)}
+        )
+
+class RateLimiterMiddleware:
+    """
+    Reject clients over their quota with a 429 and add the rate limit
+    headers to every other response.
+
+    A pure ASGI middleware, so it adds no per-request task and does not
+    buffer streamed responses. Requests to `exempt_paths` (e.g. the metrics
+    scraped by monitoring) are not charged.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_requests: int = None,
+        window_seconds: int = None,
+        limiter: RateLimiter = None,
+        exempt_paths: tuple = (),
+    ):
+        self.app = app
+        # Share `limiter` with endpoints that charge more than one request (batches)
+        self.limiter = limiter or RateLimiter(max_requests, window_seconds)
+        self.exempt_paths = frozenset(exempt_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        client_ip = client_key(scope)
+
+        with span("rate_limit"):
+            result = await self.limiter.hit(client_ip)
+        if not result.allowed:
+            response = self.limiter.limit_exceeded_response(result)
+            await response(scope, receive, send)
+            return
+
+        rate_limit_headers = self.limiter.headers(result)
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(rate_limit_headers)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
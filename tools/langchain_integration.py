@@ -1,20 +1,123 @@
-from pathlib import Path
-from langchain_community.tools import RequestsPostTool
-from langchain_community.utilities import RequestsWrapper
+import os
+from typing import Optional, Type
+
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun, CallbackManagerForToolRun
+from langchain_core.tools import BaseTool, ToolException
+from pydantic import BaseModel, Field
 
 from src.schemas import RequestModel
+from tools.summarization_client import DEFAULT_BASE_URL, SummarizationClient, SummarizationError
+
+
+# Where the summarization API runs, for the tools defined below
+API_URL = os.getenv("SUMMARIZATION_API_URL", DEFAULT_BASE_URL).rstrip("/")
+API_TIMEOUT_SECONDS = float(os.getenv("SUMMARIZATION_API_TIMEOUT_SECONDS", "120"))
+
+
+class SummarizationTool(BaseTool):
+    """
+    Summarization tool backed by /summarize, with native async support.
+
+    Calls go through a SummarizationClient: pooled connections, concurrent
+    async calls (parallel tool calls of an agent, or several agents on one
+    event loop) merged into /summarize/batch requests, and an LRU of recent
+    results. Pass a client of your own for another base URL or timeouts.
+    API errors are raised as ToolException, which agents can handle with
+    `handle_tool_error`.
+    """
+
+    name: str = "text_summarizer"
+    description: str = "Summarizes text with customizable length, style, and focus. Use this when you need to create summaries of long text content."
+    args_schema: Type[BaseModel] = RequestModel
+    client: SummarizationClient = Field(
+        default_factory=lambda: SummarizationClient(base_url=API_URL, timeout=API_TIMEOUT_SECONDS)
+    )
+
+    def _run(
+        self,
+        text: str,
+        length: str,
+        style: str,
+        focus: Optional[str] = None,
+        run_manager: Optional[CallbackManagerForToolRun] = None,
+    ) -> str:
+        try:
+            return self.client.summarize(text, length, style, focus)["summary"]
+        except SummarizationError as exc:
+            raise ToolException(str(exc)) from exc
+
+    async def _arun(
+        self,
+        text: str,
+        length: str,
+        style: str,
+        focus: Optional[str] = None,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+    ) -> str:
+        try:
+            return (await self.client.asummarize(text, length, style, focus))["summary"]
+        except SummarizationError as exc:
+            raise ToolException(str(exc)) from exc
+
+
+# The summarization tool, for the API at SUMMARIZATION_API_URL
+summarization_tool = SummarizationTool()
+
+
+class StreamingSummarizationTool(BaseTool):
+    """
+    Summarization tool backed by /summarize/stream, with native async support.
+
+    Fragments are forwarded to the callback handlers (`on_text`) as soon as
+    they arrive, so agents and UIs can start consuming the summary early.
+    Calls go through the pooled connections of a SummarizationClient, and
+    API errors (including error events mid-stream) are raised as
+    ToolException.
+    """
+
+    name: str = "text_summarizer_stream"
+    description: str = "Summarizes text with customizable length, style, and focus, streaming the summary as it is generated. Use this when you need to create summaries of long text content."
+    args_schema: Type[BaseModel] = RequestModel
+    client: SummarizationClient = Field(
+        default_factory=lambda: SummarizationClient(base_url=API_URL, timeout=API_TIMEOUT_SECONDS)
+    )
+
+    def _run(
+        self,
+        text: str,
+        length: str,
+        style: str,
+        focus: Optional[str] = None,
+        run_manager: Optional[CallbackManagerForToolRun] = None,
+    ) -> str:
+        fragments = []
+        try:
+            for fragment in self.client.stream(text, length, style, focus):
+                fragments.append(fragment)
+                if run_manager:
+                    run_manager.on_text(fragment)
+        except SummarizationError as exc:
+            raise ToolException(str(exc)) from exc
+        return "".join(fragments).strip()
 
-# Create a requests wrapper
-requests_wrapper = RequestsWrapper()
+    async def _arun(
+        self,
+        text: str,
+        length: str,
+        style: str,
+        focus: Optional[str] = None,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+    ) -> str:
+        fragments = []
+        try:
+            async for fragment in self.client.astream(text, length, style, focus):
+                fragments.append(fragment)
+                if run_manager:
+                    await run_manager.on_text(fragment)
+        except SummarizationError as exc:
+            raise ToolException(str(exc)) from exc
+        return "".join(fragments).strip()
 
-# Define the LangChain tool for text summarization
-summarization_tool = RequestsPostTool(
-    name="text_summarizer",
-    description="Summarizes text with customizable length, style, and focus. Use this when you need to create summaries of long text content.",
-    url="http://127.0.0.1:8000/summarize",
-    headers={"Content-Type": "application/json"},
-    schema=RequestModel,
-    requests_wrapper=requests_wrapper,
-    allow_dangerous_requests=True,
-)
 
+# Streaming variant of the summarization tool
+streaming_summarization_tool = StreamingSummarizationTool()
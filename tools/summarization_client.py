@@ -0,0 +1,363 @@
+import asyncio
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+DEFAULT_BASE_URL = "http://127.0.0.1:8000"
+
+
+class SummarizationError(Exception):
+    """The summarization API answered a request with an error."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _error(response: httpx.Response) -> SummarizationError:
+    try:
+        detail = response.json().get("detail", response.text)
+    except (ValueError, AttributeError):
+        detail = response.text
+    return SummarizationError(response.status_code, str(detail))
+
+
+class _SummaryEvents:
+    """Turns the lines of a /summarize/stream response into summary fragments."""
+
+    def __init__(self):
+        self.event = None
+
+    def feed(self, line: str) -> Optional[str]:
+        """The summary fragment a line carries, if any; raises SummarizationError on an error event."""
+        if line.startswith("event:"):
+            self.event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data = json.loads(line[len("data:"):])
+            if self.event == "summary":
+                return data["text"]
+            if self.event == "error":
+                raise SummarizationError(500, data["detail"])
+        return None
+
+
+class _AsyncState:
+    """What the async side of a client needs, bound to one event loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient):
+        self.loop = loop
+        self.client = client
+        # Calls waiting for the batch window to close, and calls in flight by key
+        self.pending: List[Tuple[str, dict, asyncio.Future]] = []
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        # The loop only keeps weak references to tasks
+        self.tasks = set()
+        # Closes the client when the loop shuts down (asyncio.run cancels the
+        # tasks left over): once the loop is closed, the client cannot be
+        self.closer = loop.create_task(self._close_on_shutdown())
+
+    async def _close_on_shutdown(self) -> None:
+        try:
+            await self.loop.create_future()
+        finally:
+            await self.client.aclose()
+
+    def close(self) -> None:
+        """Close the client in its own loop, from any thread."""
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.closer.cancel)
+
+
+class SummarizationClient:
+    """
+    Client of the summarization API for agents and tools.
+
+    Requests go through keep-alive connection pools (one for `summarize`
+    and `stream`, one for `asummarize` and `astream`), so agent steps do
+    not open a connection each.
+
+    Concurrent `asummarize` calls that start within `batch_window` seconds
+    of each other are sent as one POST /summarize/batch request (at most
+    `max_batch_size` items; a call alone goes to /summarize), and identical
+    calls in flight together share one item. Batch results are streamed, so
+    a call does not wait for the slowest item of its batch. If the server has no batch
+    endpoint (404 or 405), calls are sent one by one from then on.
+
+    The results of the last `cache_size` distinct requests are kept in an
+    LRU and served without a request (0 disables it). The `requests`,
+    `batches`, `coalesced`, `hits` and `misses` counters report what was sent.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        timeout: float = 120.0,
+        connect_timeout: float = 5.0,
+        max_connections: int = 20,
+        batch_window: float = 0.005,
+        max_batch_size: int = 16,
+        cache_size: int = 128,
+        headers: Dict[str, str] = None,
+        transport: httpx.AsyncBaseTransport = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.cache_size = cache_size
+        self.headers = headers or {}
+        # Only used by asummarize (e.g. httpx.ASGITransport in tests)
+        self.transport = transport
+        # None until the server answered a batch request
+        self.batch_supported: Optional[bool] = None
+        self._cache: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._client: Optional[httpx.Client] = None
+        self._async: Optional[_AsyncState] = None
+        self.requests = 0
+        self.batches = 0
+        self.coalesced = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(request: dict) -> str:
+        """Hash of a request body, the key of its result in the LRU."""
+        return hashlib.blake2b(json.dumps(request, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+    def _cached(self, key: str) -> Optional[dict]:
+        if not self.cache_size:
+            return None
+        with self._lock:
+            result = self._cache.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def _remember(self, key: str, result: dict) -> None:
+        if not self.cache_size:
+            return
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def summarize(self, text: str, length: str, style: str, focus: str = None) -> dict:
+        """
+        Summarize one text (blocking).
+
+        Returns:
+            The /summarize response body: `summary` and `meta`
+
+        Raises:
+            SummarizationError: If the API answered with an error
+            httpx.HTTPError: If the API could not be reached
+        """
+        request = {"text": text, "length": length, "style": style, "focus": focus}
+        key = self.make_key(request)
+        result = self._cached(key)
+        if result is not None:
+            return result
+
+        self.requests += 1
+        response = self._sync_client().post("/summarize", json=request)
+        if not response.is_success:
+            raise _error(response)
+        result = response.json()
+        self._remember(key, result)
+        return result
+
+    def stream(self, text: str, length: str, style: str, focus: str = None) -> Iterator[str]:
+        """
+        Yield the fragments of a summary from /summarize/stream as they arrive (blocking).
+
+        Raises:
+            SummarizationError: If the API answered with an error, or sent an error event
+            httpx.HTTPError: If the API could not be reached
+        """
+        request = {"text": text, "length": length, "style": style, "focus": focus}
+        self.requests += 1
+        with self._sync_client().stream("POST", "/summarize/stream", json=request) as response:
+            if not response.is_success:
+                response.read()
+                raise _error(response)
+            events = _SummaryEvents()
+            for line in response.iter_lines():
+                fragment = events.feed(line)
+                if fragment is not None:
+                    yield fragment
+
+    def _sync_client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(base_url=self.base_url, timeout=self.timeout, limits=self.limits, headers=self.headers)
+        return self._client
+
+    async def asummarize(self, text: str, length: str, style: str, focus: str = None) -> dict:
+        """
+        Summarize one text, batched with concurrent calls.
+
+        Returns:
+            The /summarize response body: `summary` and `meta`
+
+        Raises:
+            SummarizationError: If the API answered with an error
+            httpx.HTTPError: If the API could not be reached
+        """
+        request = {"text": text, "length": length, "style": style, "focus": focus}
+        key = self.make_key(request)
+        result = self._cached(key)
+        if result is not None:
+            return result
+
+        state = self._async_state()
+        future = state.in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = state.loop.create_future()
+            state.in_flight[key] = future
+            future.add_done_callback(lambda _: state.in_flight.pop(key, None))
+            state.pending.append((key, request, future))
+            if len(state.pending) >= self.max_batch_size or self.batch_supported is False:
+                self._flush(state)
+            elif state.flush_handle is None:
+                state.flush_handle = state.loop.call_later(self.batch_window, self._flush, state)
+        # Callers that give up do not cancel the call shared with others
+        return await asyncio.shield(future)
+
+    async def astream(self, text: str, length: str, style: str, focus: str = None) -> AsyncIterator[str]:
+        """
+        Yield the fragments of a summary from /summarize/stream as they arrive.
+
+        Raises:
+            SummarizationError: If the API answered with an error, or sent an error event
+            httpx.HTTPError: If the API could not be reached
+        """
+        request = {"text": text, "length": length, "style": style, "focus": focus}
+        client = self._async_state().client
+        self.requests += 1
+        async with client.stream("POST", "/summarize/stream", json=request) as response:
+            if not response.is_success:
+                await response.aread()
+                raise _error(response)
+            events = _SummaryEvents()
+            async for line in response.aiter_lines():
+                fragment = events.feed(line)
+                if fragment is not None:
+                    yield fragment
+
+    def _async_state(self) -> _AsyncState:
+        # Connections and futures belong to the event loop they were made in
+        loop = asyncio.get_running_loop()
+        if self._async is None or self._async.loop is not loop:
+            if self._async is not None:
+                self._async.close()
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                headers=self.headers,
+                transport=self.transport,
+            )
+            self._async = _AsyncState(loop, client)
+        return self._async
+
+    def _flush(self, state: _AsyncState) -> None:
+        if state.flush_handle is not None:
+            state.flush_handle.cancel()
+            state.flush_handle = None
+        calls, state.pending = state.pending, []
+        if calls:
+            task = state.loop.create_task(self._send(state, calls))
+            state.tasks.add(task)
+            task.add_done_callback(state.tasks.discard)
+
+    async def _send(self, state: _AsyncState, calls: List[Tuple[str, dict, asyncio.Future]]) -> None:
+        try:
+            if len(calls) > 1 and self.batch_supported is not False:
+                if await self._send_batch(state.client, calls):
+                    return
+            results = await asyncio.gather(
+                *(self._post_one(state.client, request) for _, request, _ in calls), return_exceptions=True
+            )
+            for call, result in zip(calls, results):
+                self._resolve(call, result)
+        except Exception as exc:
+            for call in calls:
+                self._resolve(call, exc)
+
+    def _resolve(self, call: Tuple[str, dict, asyncio.Future], result) -> None:
+        key, _, future = call
+        if future.done():
+            return
+        if isinstance(result, BaseException):
+            future.set_exception(result)
+        else:
+            self._remember(key, result)
+            future.set_result(result)
+
+    async def _post_one(self, client: httpx.AsyncClient, request: dict) -> dict:
+        self.requests += 1
+        response = await client.post("/summarize", json=request)
+        if not response.is_success:
+            raise _error(response)
+        return response.json()
+
+    async def _send_batch(self, client: httpx.AsyncClient, calls: List[Tuple[str, dict, asyncio.Future]]) -> bool:
+        """
+        Send calls as one batch, streamed as NDJSON so that each call is
+        resolved as soon as its own result arrives.
+
+        Returns:
+            False if the server has no batch endpoint (nothing was resolved)
+        """
+        self.requests += 1
+        self.batches += 1
+        items = [request for _, request, _ in calls]
+        async with client.stream("POST", "/summarize/batch", params={"stream": "true"}, json={"items": items}) as response:
+            if response.status_code in (404, 405):
+                self.batch_supported = False
+                return False
+            if not response.is_success:
+                await response.aread()
+                raise _error(response)
+            self.batch_supported = True
+
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                item = json.loads(line)
+                error = item.get("error")
+                if error:
+                    result = SummarizationError(error["status_code"], error["detail"])
+                else:
+                    result = {"summary": item["summary"], "meta": item["meta"]}
+                self._resolve(calls[item["index"]], result)
+
+        for call in calls:
+            self._resolve(call, SummarizationError(502, "Missing from the batch response"))
+        return True
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self) -> None:
+        if self._async is not None:
+            self._async.closer.cancel()
+            await self._async.client.aclose()
+            self._async = None
@@ -1,43 +1,135 @@
 import os
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 
-def setup_logging(script_name: str, logs_subdir: str = None):
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Background writer of the queue-based logging mode, if running
+_listener = None
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format each record as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hand records to the background writer without formatting them.
+
+    The stock QueueHandler formats the message on the calling thread; here
+    only tracebacks are rendered up front (the frames may change once the
+    caller moves on), and the message is formatted by the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def _file_handler(log_file: Path, max_bytes: int, rotate_when: str, backup_count: int) -> logging.Handler:
+    if rotate_when:
+        return logging.handlers.TimedRotatingFileHandler(log_file, when=rotate_when, backupCount=backup_count, encoding="utf-8")
+    if max_bytes:
+        return logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    return logging.FileHandler(log_file, encoding="utf-8")
+
+def stop_logging():
+    """Flush and stop the background writer of the queue-based mode"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+atexit.register(stop_logging)
+
+def setup_logging(
+    script_name: str,
+    logs_subdir: str = None,
+    use_queue: bool = False,
+    json_lines: bool = False,
+    max_bytes: int = 0,
+    rotate_when: str = None,
+    backup_count: int = 5,
+    level=logging.INFO,
+):
     """
     Set up logging with timestamped files in a centralized logs directory
-    
+
     Args:
         script_name: Name of the script (e.g., 'agent_demo', 'test_endpoint')
         logs_subdir: Optional subdirectory within logs (e.g., 'tests', 'examples')
+        use_queue: Write records from a background thread (QueueHandler/QueueListener),
+            so that callers never block on disk or console I/O
+        json_lines: Write the log file as JSON lines instead of plain text
+        max_bytes: Rotate the log file once it reaches this size (0 disables)
+        rotate_when: Rotate the log file on a schedule instead (e.g. 'midnight', 'H')
+        backup_count: Rotated files to keep
+        level: Minimum level of the root logger (number or name, e.g. 'INFO')
     """
+    global _listener
+
     # Find project root (go up until we find main project files)
     current_dir = Path(__file__).parent
     project_root = current_dir.parent
-    
+
     # Create logs directory structure
     logs_dir = project_root / "logs"
     if logs_subdir:
         logs_dir = logs_dir / logs_subdir
     logs_dir.mkdir(parents=True, exist_ok=True)
-    
+
     # Create timestamped log file
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = logs_dir / f"{script_name}_{timestamp}.log"
-    
+    log_file = logs_dir / f"{script_name}_{timestamp}.{'jsonl' if json_lines else 'log'}"
+
+    file_handler = _file_handler(log_file, max_bytes, rotate_when, backup_count)
+    file_handler.setFormatter(JsonLinesFormatter() if json_lines else logging.Formatter(LOG_FORMAT))
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    handlers = [file_handler, stream_handler]
+
+    previous_listener, _listener = _listener, None
+    if use_queue:
+        records = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        _listener.start()
+        handlers = [LazyQueueHandler(records)]
+
     # Configure logging
     logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()
-        ],
+        level=level,
+        handlers=handlers,
         force=True
     )
-    
+
+    # Drain and close the writer of a previous setup
+    if previous_listener is not None:
+        previous_listener.stop()
+        for handler in previous_listener.handlers:
+            handler.close()
+
     return log_file
 
 def get_logger(name: str):
     """Get a logger instance"""
-    return logging.getLogger(name)
\ No newline at end of file
+    return logging.getLogger(name)